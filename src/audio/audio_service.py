@@ -1,231 +1,302 @@
 # src/audio/audio_service.py
-from ctypes import POINTER, cast, CDLL
+from concurrent.futures import Future
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
-import pythoncom
-import comtypes
-from pathlib import Path
-from comtypes import CLSCTX_ALL
-from pycaw.constants import CLSID_MMDeviceEnumerator
-from pycaw.pycaw import (
-    DEVICE_STATE,
-    AudioUtilities,
-    EDataFlow,
-    ERole,
-    IAudioEndpointVolume,
-    IMMDeviceEnumerator,
-)
+import threading
+
+from audio.backend import AudioBackend, SessionInfo
+from audio.com_executor import ComExecutor, ExecutorAudioBackend
+from audio.device_registry import DeviceRegistry
+from audio.session_index import SessionIndex
+from audio.volume_cache import EndpointVolumeCache
+from audio.volume_watcher import VolumeWatcher
 
 logger = logging.getLogger(__name__)
 
-audioDll = CDLL("./src/audio/AudioDLL.dll")
+UNMUTE, MUTE, TOGGLE = 0, 1, 2
 
 
-class COMContextManager:
-    """Context manager for COM initialization and uninitialization."""
+def _log_volume_write(device_id: str, future: Future) -> None:
+    try:
+        if not future.result():
+            logger.warning(f"Device with ID {device_id} not found.")
+    except Exception as e:
+        logger.error(f"Error setting volume: {e}")
 
-    def __enter__(self):
-        pythoncom.CoInitialize()
 
-    def __exit__(self, exc_type, exc_value, traceback):
-        pythoncom.CoUninitialize()
+class AudioService:
+    _backend = None
+    _registry = None
+    _volume_cache = None
+    _session_index = None
+    _volume_watcher = None
+    _executor = None
+    _volume_writes: Dict[str, Tuple[float, Future]] = {}  # device_id -> (scalar, future) of its last queued write
+    _lock = threading.Lock()
+    _volume_lock = threading.Lock()
 
+    @staticmethod
+    def get_backend() -> AudioBackend:
+        """Return the audio backend, creating the pycaw one on first use.
+
+        The pycaw backend is wrapped so that every call runs on one ComExecutor thread, which joins the COM
+        apartment once for the lifetime of the process instead of around each call.
+        """
+        with AudioService._lock:
+            if AudioService._backend is None:
+                from audio.pycaw_backend import PycawAudioBackend
+                AudioService._backend = ExecutorAudioBackend(PycawAudioBackend())
+                AudioService._executor = AudioService._backend.executor
+            return AudioService._backend
+
+    @staticmethod
+    def set_backend(backend: AudioBackend) -> None:
+        """Replace the audio backend, e.g. with a simulated one, optionally wrapped in an ExecutorAudioBackend."""
+        with AudioService._lock:
+            if AudioService._registry is not None:
+                AudioService._registry.stop()
+                AudioService._registry = None
+            if AudioService._volume_cache is not None:
+                AudioService._volume_cache.clear()
+                AudioService._volume_cache = None
+            if AudioService._session_index is not None:
+                AudioService._session_index.stop()
+                AudioService._session_index = None
+            if AudioService._volume_watcher is not None:
+                AudioService._volume_watcher.stop()
+                AudioService._volume_watcher = None
+            AudioService._volume_writes = {}
+            executor = AudioService._executor
+            AudioService._executor = backend.executor if isinstance(backend, ExecutorAudioBackend) else None
+            AudioService._backend = backend
+        # Calls still queued may need the lock, so the old executor is drained outside it.
+        if executor is not None and executor is not AudioService._executor:
+            executor.stop()
+
+    @staticmethod
+    def get_executor() -> ComExecutor:
+        """Return the executor audio calls are submitted to, the backend's own if it runs on one."""
+        AudioService.get_backend()
+        with AudioService._lock:
+            if AudioService._executor is None:
+                AudioService._executor = ComExecutor(AudioService._backend.initialize_thread,
+                                                     AudioService._backend.uninitialize_thread)
+            return AudioService._executor
+
+    @staticmethod
+    def get_registry() -> DeviceRegistry:
+        """Return the process-wide device registry, subscribing it to endpoint notifications on first use."""
+        backend = AudioService.get_backend()
+        with AudioService._lock:
+            if AudioService._registry is None:
+                AudioService._registry = DeviceRegistry(backend)
+                AudioService._registry.start()
+            return AudioService._registry
+
+    @staticmethod
+    def get_volume_cache() -> EndpointVolumeCache:
+        """Return the cache of endpoint volume interfaces, evicted whenever its device changes."""
+        registry = AudioService.get_registry()
+        with AudioService._lock:
+            if AudioService._volume_cache is None:
+                AudioService._volume_cache = EndpointVolumeCache(AudioService._backend)
+                registry.add_listener(AudioService._volume_cache.evict)
+            return AudioService._volume_cache
+
+    @staticmethod
+    def get_session_index() -> SessionIndex:
+        """Return the index of processes owning an audio session, subscribing it to notifications on first use."""
+        registry = AudioService.get_registry()
+        with AudioService._lock:
+            if AudioService._session_index is None:
+                AudioService._session_index = SessionIndex(AudioService._backend)
+                AudioService._session_index.start()
+                registry.add_listener(AudioService._session_index.on_devices_changed)
+            return AudioService._session_index
+
+    @staticmethod
+    def get_volume_watcher() -> VolumeWatcher:
+        """Return the watcher of endpoint master volumes, subscribing it to notifications on first use."""
+        registry = AudioService.get_registry()
+        with AudioService._lock:
+            if AudioService._volume_watcher is None:
+                AudioService._volume_watcher = VolumeWatcher(AudioService._backend)
+                AudioService._volume_watcher.start()
+                registry.add_listener(AudioService._volume_watcher.on_devices_changed)
+            return AudioService._volume_watcher
+
+    @staticmethod
+    def refresh_devices() -> None:
+        """Force the next device lookup to enumerate endpoints again."""
+        AudioService.get_registry().invalidate()
 
-class AudioService:
     @staticmethod
     def get_all_output_devices() -> dict:
         """Get all active output devices."""
-        devices = {}
-
-        with COMContextManager():
-            device_enumerator = comtypes.CoCreateInstance(
-                CLSID_MMDeviceEnumerator,
-                IMMDeviceEnumerator,
-                comtypes.CLSCTX_INPROC_SERVER,
-            )
-            if not device_enumerator:
-                logger.error("Failed to create device enumerator.")
-                return devices
-
-            collection = device_enumerator.EnumAudioEndpoints(
-                EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value
-            )
-            if not collection:
-                logger.error("No active audio endpoints found.")
-                return devices
-
-            for i in range(collection.GetCount()):
-                device = collection.Item(i)
-                if device:
-                    device_object = AudioUtilities.CreateDevice(device)
-                    if ": None" not in str(device_object):
-                        devices[device_object.FriendlyName] = device_object.id
-                    device_object._dev.Release()
-
-        return devices
-
-    @staticmethod
-    def set_application_output_device(pid: int, device_id: str) -> None:
-        """Set the output device for a specific application."""
-        with COMContextManager():
-            try:
-                result = audioDll.SetApplicationEndpoint(device_id, 0, pid)
-                if result != 0:
-                    logger.error(f"Failed to change audio device for pid: {pid}, app might not have sound")
-            except Exception as e:
-                logger.error(f"Error changing audio device: {e}")
+        return AudioService.get_registry().devices()
+
+    @staticmethod
+    def get_active_endpoints() -> dict:
+        """Get an endpoint ID -> friendly name map of all active output devices."""
+        return AudioService.get_registry().endpoints()
+
+    @staticmethod
+    def set_application_output_device(pid: int, device_id: str) -> bool:
+        """Set the output device for a specific application and return whether it succeeded."""
+        try:
+            if not AudioService.get_backend().set_application_endpoint(pid, device_id):
+                logger.warning(f"Failed to change audio device for pid: {pid}, app might not have sound")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Error changing audio device: {e}")
+            return False
+
+    @staticmethod
+    def set_applications_output_device(pids: List[int], device_id: str) -> Dict[int, bool]:
+        """Set the output device of several applications in one backend call; return whether each succeeded."""
+        try:
+            results = AudioService.get_backend().set_application_endpoints(pids, device_id)
+        except Exception as e:
+            logger.error(f"Error changing audio device: {e}")
+            return {pid: False for pid in pids}
+        for pid in pids:
+            if not results.get(pid):
+                logger.warning(f"Failed to change audio device for pid: {pid}, app might not have sound")
+        return results
+
+    @staticmethod
+    def _call_cache(method, *args):
+        # A backend running its calls on the executor runs the cache's on it too, see EndpointVolumeCache.
+        cache = AudioService.get_volume_cache()
+        if isinstance(AudioService.get_backend(), ExecutorAudioBackend):
+            return AudioService.get_executor().call(method, cache, *args)
+        return method(cache, *args)
+
+    @staticmethod
+    def submit_volume(device_id: str, volume_level: float) -> Future:
+        """Queue a volume change on the executor; a change of device_id still queued is replaced by this one.
+
+        The future resolves to whether the device was available, or raises the backend's error, in which case the
+        device's cached interface is released.
+        """
+        return AudioService.get_executor().submit(AudioService.get_volume_cache().set_volume, device_id,
+                                                  max(0.0, min(volume_level / 100, 1.0)), key=("volume", device_id))
 
     @staticmethod
     def get_device_volume(device_id: str) -> float:
         """Get the volume level of a specific device."""
-        with COMContextManager():
-            try:
-                device_object = AudioService.get_device_object(device_id)
-                if not device_object:
-                    logger.warning(f"Device with ID {device_id} not found.")
-                    return 0.0
-
-                volume = cast(device_object, POINTER(IAudioEndpointVolume))
-                vol_level = volume.GetMasterVolumeLevelScalar()
-                result = round(vol_level * 100)
-                # Explicitly release COM objects
-                volume.Release()
-                device_object.Release()
-                return result
-            except Exception as e:
-                logger.error(f"Error getting volume: {e}")
+        try:
+            scalar = AudioService._call_cache(EndpointVolumeCache.get_volume, device_id)
+            if scalar is None:
+                logger.warning(f"Device with ID {device_id} not found.")
                 return 0.0
-            finally:
-                # Ensure we attempt to release objects even if an error occurred
-                try:
-                    if 'volume' in locals():
-                        volume.Release()
-                    if 'device_object' in locals():
-                        device_object.Release()
-                except:
-                    pass
+            return round(scalar * 100)
+        except Exception as e:
+            logger.error(f"Error getting volume: {e}")
+            return 0.0
 
     @staticmethod
     def set_device_volume(device_id: str, volume_level: float) -> None:
-        """Set the volume level of a specific device."""
-        with COMContextManager():
+        """Set the volume level of a specific device, queueing the write without waiting for it."""
+        try:
+            with AudioService._volume_lock:
+                AudioService._queue_volume(device_id, max(0.0, min(volume_level / 100, 1.0)))
+        except Exception as e:
+            logger.error(f"Error setting volume: {e}")
+
+    @staticmethod
+    def adjust_device_volume(device_id: str, delta: float) -> Optional[float]:
+        """Change the volume level of a specific device by delta and return the new level.
+
+        A change made while an earlier write is still queued starts from that write's level and replaces it, so a
+        burst of changes costs one backend call. Otherwise the level is read and written in one executor call.
+        """
+        try:
+            with AudioService._volume_lock:
+                scalar, future = AudioService._volume_writes.get(device_id, (None, None))
+                if future is None or future.done():
+                    scalar = AudioService._call_cache(EndpointVolumeCache.adjust_volume, device_id, delta / 100)
+                    if scalar is None:
+                        logger.warning(f"Device with ID {device_id} not found.")
+                        return None
+                else:
+                    scalar = max(0.0, min(scalar + delta / 100, 1.0))
+                    AudioService._queue_volume(device_id, scalar)
+            return round(scalar * 100)
+        except Exception as e:
+            logger.error(f"Error adjusting volume: {e}")
+            return None
+
+    @staticmethod
+    def _queue_volume(device_id: str, scalar: float) -> None:
+        # Called with _volume_lock held; the write's outcome is only logged.
+        future = AudioService.submit_volume(device_id, scalar * 100)
+        AudioService._volume_writes[device_id] = (scalar, future)
+        future.add_done_callback(lambda done: _log_volume_write(device_id, done))
+
+    @staticmethod
+    def list_sessions(device_id: Optional[str] = None) -> List[SessionInfo]:
+        """Return the live audio sessions, only those on device_id if given, from the session index."""
+        return AudioService.get_session_index().sessions(device_id)
+
+    @staticmethod
+    def _set_mute(groups: Dict[object, List[SessionInfo]], value: int) -> Dict[object, Optional[bool]]:
+        # Each group ends up in one state: a toggle mutes it unless every session is muted already.
+        # Only sessions not yet in that state are changed, with one backend call per state.
+        if value not in (UNMUTE, MUTE, TOGGLE):
+            raise ValueError(f"Invalid mute value {value}, expected {UNMUTE}, {MUTE} or {TOGGLE}")
+        results = {}
+        changes: Dict[bool, List[str]] = {True: [], False: []}
+        for key, sessions in groups.items():
+            if not sessions:
+                results[key] = None
+                continue
+            muted = not all(session.muted for session in sessions) if value == TOGGLE else value == MUTE
+            changes[muted].extend(session.session_id for session in sessions if session.muted != muted)
+            results[key] = muted
+        index = AudioService.get_session_index()
+        for muted, session_ids in changes.items():
+            if not session_ids:
+                continue
             try:
-                device_object = AudioService.get_device_object(device_id)
-                if not device_object:
-                    logger.warning(f"Device with ID {device_id} not found.")
-                    return
-
-                volume = cast(device_object, POINTER(IAudioEndpointVolume))
-                scalar_volume = max(0.0, min(volume_level / 100, 1.0))
-                volume.SetMasterVolumeLevelScalar(scalar_volume, None)
-                # Explicitly release COM objects
-                volume.Release()
-                device_object.Release()
+                AudioService.get_backend().set_session_mute(session_ids, muted)
+                index.mark_muted(session_ids, muted)
             except Exception as e:
-                logger.error(f"Error setting volume: {e}")
-            finally:
-                # Ensure we attempt to release objects even if an error occurred
-                try:
-                    if 'volume' in locals():
-                        volume.Release()
-                    if 'device_object' in locals():
-                        device_object.Release()
-                except:
-                    pass
+                logger.error(f"Error {'muting' if muted else 'unmuting'} sessions: {e}")
+        return results
+
+    @staticmethod
+    def set_processes_mute(process_names: Iterable[str], value: int) -> Dict[str, Optional[bool]]:
+        """Unmute (0), mute (1) or toggle (2) every session of each named process; return whether each is now muted.
+
+        A process without a session maps to None.
+        """
+        index = AudioService.get_session_index()
+        return AudioService._set_mute({name: index.sessions_for_name(name) for name in process_names}, value)
+
+    @staticmethod
+    def set_pids_mute(pids: Iterable[int], value: int) -> Dict[int, Optional[bool]]:
+        """Like set_processes_mute, for processes given by PID."""
+        index = AudioService.get_session_index()
+        return AudioService._set_mute({pid: index.sessions_for_pid(pid) for pid in pids}, value)
 
     @staticmethod
     def mute_unmute_audio_process(process_name: str, value: int) -> None:
         """Mute or unmute an audio process."""
-        with COMContextManager():
-            try:
-                sessions = AudioUtilities.GetAllSessions()
-                for session in sessions:
-                    if session.Process and session.Process.name() == process_name:
-                        if value == 2:
-                            value = 0 if session.SimpleAudioVolume.GetMute() == 1 else 1
-                        elif value == 1:
-                            value = 1
-                        elif value == 0:
-                            value = 0
-                        session.SimpleAudioVolume.SetMute(value, None)
-            except Exception as e:
-                logger.error(f"Error muting process: {e}")
+        AudioService.set_processes_mute([process_name], value)
 
     @staticmethod
     def get_device_object(device_id: str):
-        """Get the device object for a specific device ID."""
-        with COMContextManager():
-            try:
-                device_enumerator = comtypes.CoCreateInstance(
-                    CLSID_MMDeviceEnumerator,
-                    IMMDeviceEnumerator,
-                    comtypes.CLSCTX_INPROC_SERVER,
-                )
-                if not device_enumerator:
-                    logger.error("Failed to create device enumerator.")
-                    return None
-
-                collection = device_enumerator.EnumAudioEndpoints(
-                    EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value
-                )
-
-                for device in collection:
-                    if device.GetId() == device_id:
-                        return device.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        """Get the cached endpoint volume interface of a specific device ID; it is owned by the cache."""
+        return AudioService._call_cache(EndpointVolumeCache.get, device_id)
 
-            except Exception as e:
-                logger.error(f"Error getting device object: {e}")
-                return None
-
-        return None
-    
     @staticmethod
     def get_default_output_device():
         """Get the default output device."""
-        STGM_READ = 0x00000000
-        PKEY_Device_FriendlyName = "{a45c254e-df1c-4efd-8020-67d146a850e0} 14".upper()
-        device = {}
-        with COMContextManager():
-            try:
-                device_enumerator = comtypes.CoCreateInstance(
-                    CLSID_MMDeviceEnumerator,
-                    IMMDeviceEnumerator,
-                    comtypes.CLSCTX_INPROC_SERVER)
-
-                default_device = device_enumerator.GetDefaultAudioEndpoint(EDataFlow.eRender.value, ERole.eMultimedia.value)
-                property_store = default_device.OpenPropertyStore(STGM_READ)
-
-                for i in range(property_store.GetCount()):
-                    prop_key = property_store.GetAt(i)
-                    if str(prop_key) == PKEY_Device_FriendlyName:
-                        value = property_store.GetValue(prop_key).GetValue()
-                        device[value] = default_device.GetId()
-                        return device
-            except Exception as e:
-                logger.error(f"Error getting default output device: {e}")
-                return None
+        return AudioService.get_registry().default_device()
 
     @staticmethod
     def validate_device_id(device_id: str) -> bool:
         """Validate if a device ID still exists in the system."""
-        with COMContextManager():
-            try:
-                device_enumerator = comtypes.CoCreateInstance(
-                    CLSID_MMDeviceEnumerator,
-                    IMMDeviceEnumerator,
-                    comtypes.CLSCTX_INPROC_SERVER,
-                )
-                if not device_enumerator:
-                    return False
-
-                collection = device_enumerator.EnumAudioEndpoints(
-                    EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value
-                )
-                
-                for device in collection:
-                    if device.GetId() == device_id:
-                        return True
-                return False
-                
-            except Exception as e:
-                logger.error(f"Error validating device ID: {e}")
-                return False
\ No newline at end of file
+        return AudioService.get_registry().is_active(device_id)
@@ -0,0 +1,351 @@
+# src/audio/backend.py
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+
+class DeviceNotificationHandler:
+    """Receiver of endpoint notifications; the methods may be called from any thread."""
+
+    def on_device_added(self, device_id: str) -> None:
+        pass
+
+    def on_device_removed(self, device_id: str) -> None:
+        pass
+
+    def on_device_state_changed(self, device_id: str, active: bool) -> None:
+        pass
+
+    def on_default_device_changed(self, device_id: Optional[str]) -> None:
+        pass
+
+    def on_device_name_changed(self, device_id: str) -> None:
+        pass
+
+
+class SessionInfo(NamedTuple):
+    session_id: str  # session instance identifier, unique per session
+    pid: int
+    device_id: str
+    muted: bool
+
+
+class SessionNotificationHandler:
+    """Receiver of audio session notifications; the methods may be called from any thread."""
+
+    def on_session_created(self, session: SessionInfo) -> None:
+        pass
+
+    def on_session_expired(self, session_id: str) -> None:
+        """The session was closed or disconnected, e.g. because its process exited or its device went away."""
+
+    def on_session_mute_changed(self, session_id: str, muted: bool) -> None:
+        pass
+
+
+class VolumeNotificationHandler:
+    """Receiver of endpoint volume notifications; the methods may be called from any thread."""
+
+    def on_volume_changed(self, device_id: str, scalar: float, muted: bool) -> None:
+        pass
+
+
+class AudioBackend:
+    """Interface over the Core Audio calls used by AudioService and DeviceRegistry."""
+
+    def initialize_thread(self) -> None:
+        """Prepare the calling thread for the calls below, e.g. by joining a COM apartment."""
+
+    def uninitialize_thread(self) -> None:
+        """Undo initialize_thread on the calling thread."""
+
+    def enumerate_output_devices(self) -> List[Tuple[str, str]]:
+        """Return (endpoint ID, friendly name) for every active render endpoint."""
+        raise NotImplementedError
+
+    def get_output_device(self, device_id: str) -> Optional[Tuple[str, bool]]:
+        """Return (friendly name, is active) of a render endpoint, or None if it does not exist."""
+        raise NotImplementedError
+
+    def get_default_output_device_id(self) -> Optional[str]:
+        raise NotImplementedError
+
+    def activate_endpoint_volume(self, device_id: str):
+        """Return the endpoint volume interface of a render endpoint, or None if it does not exist."""
+        raise NotImplementedError
+
+    def release_endpoint_volume(self, endpoint_volume) -> None:
+        """Release an interface returned by activate_endpoint_volume."""
+
+    def get_volume(self, endpoint_volume) -> float:
+        """Return the master volume as a scalar between 0.0 and 1.0."""
+        raise NotImplementedError
+
+    def set_volume(self, endpoint_volume, scalar: float) -> None:
+        raise NotImplementedError
+
+    def set_application_endpoint(self, pid: int, device_id: str) -> bool:
+        """Make device_id the output endpoint of every audio session of pid; return whether it succeeded."""
+        raise NotImplementedError
+
+    def set_application_endpoints(self, pids: List[int], device_id: str) -> Dict[int, bool]:
+        """Route several processes to device_id; return whether each succeeded."""
+        return {pid: self.set_application_endpoint(pid, device_id) for pid in pids}
+
+    def register_notifications(self, handler: DeviceNotificationHandler) -> bool:
+        """Deliver endpoint notifications to handler; return False if notifications are unavailable."""
+        return False
+
+    def unregister_notifications(self) -> None:
+        pass
+
+    def list_sessions(self) -> List[SessionInfo]:
+        """Return the audio sessions on every active render endpoint."""
+        raise NotImplementedError
+
+    def list_session_pids(self) -> Set[int]:
+        """Return the PIDs owning an audio session on any active render endpoint."""
+        return {session.pid for session in self.list_sessions()}
+
+    def get_process_name(self, pid: int) -> Optional[str]:
+        """Return the executable name of a process, e.g. 'Discord.exe', or None if it does not exist."""
+        raise NotImplementedError
+
+    def set_session_mute(self, session_ids: List[str], muted: bool) -> int:
+        """Mute or unmute the given sessions in one go; return how many were changed."""
+        raise NotImplementedError
+
+    def register_session_notifications(self, handler: SessionNotificationHandler) -> bool:
+        """Deliver session notifications to handler; return False if they are unavailable."""
+        return False
+
+    def refresh_session_notifications(self) -> None:
+        """Follow the current set of endpoints after devices were added or removed."""
+
+    def unregister_session_notifications(self) -> None:
+        pass
+
+    def register_volume_notifications(self, handler: VolumeNotificationHandler) -> bool:
+        """Deliver master volume changes of every active render endpoint to handler; return False if unavailable."""
+        return False
+
+    def refresh_volume_notifications(self) -> None:
+        """Follow the current set of endpoints after devices were added or removed."""
+
+    def unregister_volume_notifications(self) -> None:
+        pass
+
+
+class SimulatedEndpointVolume:
+    """Stand-in for an activated IAudioEndpointVolume."""
+
+    def __init__(self, device_id: str):
+        self.device_id = device_id
+        self.released = False
+
+
+class SimulatedAudioBackend(AudioBackend):
+    """In-memory set of endpoints that raises notifications like the real device enumerator.
+
+    latencies maps a backend method name to the seconds each call to it sleeps, to stand in for slow COM calls.
+    """
+
+    def __init__(self, notifications: bool = True, latencies: Optional[Dict[str, float]] = None):
+        self.calls = Counter()
+        self.latencies = dict(latencies or {})
+        self.endpoints: Dict[str, dict] = {}
+        self.default_id = None
+        self.notifications = notifications
+        self.sessions: Set[int] = set()  # PIDs with at least one session
+        self.session_states: Dict[str, dict] = {}  # session ID -> pid, device_id, muted
+        self._pid_sessions: Dict[int, Set[str]] = {}
+        self.process_names: Dict[int, str] = {}
+        self.routes: Dict[int, str] = {}
+        self._next_session = 0
+        self._handler = None
+        self._session_handler = None
+        self._volume_handler = None
+
+    def _call(self, name: str) -> None:
+        self.calls[name] += 1
+        delay = self.latencies.get(name)
+        if delay:
+            time.sleep(delay)
+
+    def add_endpoint(self, device_id: str, name: str, active: bool = True, volume: float = 0.5) -> None:
+        self.endpoints[device_id] = {"name": name, "active": active, "volume": volume}
+        if self.default_id is None and active:
+            self.default_id = device_id
+        if self._handler:
+            self._handler.on_device_added(device_id)
+
+    def remove_endpoint(self, device_id: str) -> None:
+        self.endpoints.pop(device_id, None)
+        if self._handler:
+            self._handler.on_device_removed(device_id)
+        if self.default_id == device_id:
+            self.set_default(next((d for d, e in self.endpoints.items() if e["active"]), None))
+
+    def set_state(self, device_id: str, active: bool) -> None:
+        self.endpoints[device_id]["active"] = active
+        if self._handler:
+            self._handler.on_device_state_changed(device_id, active)
+
+    def rename(self, device_id: str, name: str) -> None:
+        self.endpoints[device_id]["name"] = name
+        if self._handler:
+            self._handler.on_device_name_changed(device_id)
+
+    def set_default(self, device_id: Optional[str]) -> None:
+        self.default_id = device_id
+        if self._handler:
+            self._handler.on_default_device_changed(device_id)
+
+    def change_volume(self, device_id: str, scalar: float) -> None:
+        """Change the master volume from outside the app, e.g. with the keyboard volume keys."""
+        self.endpoints[device_id]["volume"] = scalar
+        if self._volume_handler:
+            self._volume_handler.on_volume_changed(device_id, scalar, False)
+
+    def start_session(self, pid: int, device_id: Optional[str] = None, name: Optional[str] = None,
+                      muted: bool = False) -> str:
+        """Open an audio session for pid on device_id (the default device if None); return its session ID."""
+        self._next_session += 1
+        session_id = f"session-{self._next_session}|{pid}"
+        device_id = device_id or self.default_id
+        self.session_states[session_id] = {"pid": pid, "device_id": device_id, "muted": muted}
+        self._pid_sessions.setdefault(pid, set()).add(session_id)
+        self.sessions.add(pid)
+        if name:
+            self.process_names[pid] = name
+        if self._session_handler:
+            self._session_handler.on_session_created(SessionInfo(session_id, pid, device_id, muted))
+        return session_id
+
+    def end_session(self, session_id: str) -> None:
+        state = self.session_states.pop(session_id)
+        pid_sessions = self._pid_sessions[state["pid"]]
+        pid_sessions.discard(session_id)
+        if not pid_sessions:
+            del self._pid_sessions[state["pid"]]
+            self.sessions.discard(state["pid"])
+        if self._session_handler:
+            self._session_handler.on_session_expired(session_id)
+
+    def change_session_mute(self, session_id: str, muted: bool) -> None:
+        """Mute a session from outside the app, e.g. in the Windows volume mixer."""
+        self.session_states[session_id]["muted"] = muted
+        if self._session_handler:
+            self._session_handler.on_session_mute_changed(session_id, muted)
+
+    def initialize_thread(self) -> None:
+        self._call("initialize_thread")
+
+    def uninitialize_thread(self) -> None:
+        self._call("uninitialize_thread")
+
+    def enumerate_output_devices(self) -> List[Tuple[str, str]]:
+        self._call("enumerate_output_devices")
+        return [(device_id, e["name"]) for device_id, e in self.endpoints.items() if e["active"]]
+
+    def get_output_device(self, device_id: str) -> Optional[Tuple[str, bool]]:
+        self._call("get_output_device")
+        endpoint = self.endpoints.get(device_id)
+        return (endpoint["name"], endpoint["active"]) if endpoint else None
+
+    def get_default_output_device_id(self) -> Optional[str]:
+        self._call("get_default_output_device_id")
+        return self.default_id
+
+    def activate_endpoint_volume(self, device_id: str):
+        self._call("activate_endpoint_volume")
+        endpoint = self.endpoints.get(device_id)
+        if endpoint is None or not endpoint["active"]:
+            return None
+        return SimulatedEndpointVolume(device_id)
+
+    def release_endpoint_volume(self, endpoint_volume) -> None:
+        self._call("release_endpoint_volume")
+        endpoint_volume.released = True
+
+    def _endpoint_for(self, endpoint_volume) -> dict:
+        endpoint = self.endpoints.get(endpoint_volume.device_id)
+        if endpoint_volume.released or endpoint is None or not endpoint["active"]:
+            raise OSError(f"Endpoint {endpoint_volume.device_id} is no longer available")
+        return endpoint
+
+    def get_volume(self, endpoint_volume) -> float:
+        self._call("get_volume")
+        return self._endpoint_for(endpoint_volume)["volume"]
+
+    def set_volume(self, endpoint_volume, scalar: float) -> None:
+        self._call("set_volume")
+        self._endpoint_for(endpoint_volume)["volume"] = scalar
+        if self._volume_handler:
+            self._volume_handler.on_volume_changed(endpoint_volume.device_id, scalar, False)
+
+    def set_application_endpoint(self, pid: int, device_id: str) -> bool:
+        self._call("set_application_endpoint")
+        endpoint = self.endpoints.get(device_id)
+        if pid not in self.sessions or endpoint is None or not endpoint["active"]:
+            return False
+        self.routes[pid] = device_id
+        # Windows moves the streams: the sessions on the old endpoint expire and new ones open on device_id.
+        moved = [(session_id, self.session_states[session_id]) for session_id in self._pid_sessions[pid]
+                 if self.session_states[session_id]["device_id"] != device_id]
+        for session_id, state in moved:
+            self.end_session(session_id)
+            self.start_session(pid, device_id, muted=state["muted"])
+        return True
+
+    def register_notifications(self, handler: DeviceNotificationHandler) -> bool:
+        if not self.notifications:
+            return False
+        self._handler = handler
+        return True
+
+    def unregister_notifications(self) -> None:
+        self._handler = None
+
+    def list_sessions(self) -> List[SessionInfo]:
+        self._call("list_sessions")
+        return [SessionInfo(session_id, s["pid"], s["device_id"], s["muted"])
+                for session_id, s in self.session_states.items()]
+
+    def get_process_name(self, pid: int) -> Optional[str]:
+        self._call("get_process_name")
+        return self.process_names.get(pid, f"process{pid}.exe" if pid in self.sessions else None)
+
+    def set_session_mute(self, session_ids: List[str], muted: bool) -> int:
+        self._call("set_session_mute")
+        changed = 0
+        for session_id in session_ids:
+            state = self.session_states.get(session_id)
+            if state is None:
+                continue
+            state["muted"] = muted
+            changed += 1
+            if self._session_handler:
+                self._session_handler.on_session_mute_changed(session_id, muted)
+        return changed
+
+    def register_session_notifications(self, handler: SessionNotificationHandler) -> bool:
+        if not self.notifications:
+            return False
+        self._session_handler = handler
+        return True
+
+    def unregister_session_notifications(self) -> None:
+        self._session_handler = None
+
+    def register_volume_notifications(self, handler: VolumeNotificationHandler) -> bool:
+        if not self.notifications:
+            return False
+        self._volume_handler = handler
+        return True
+
+    def unregister_volume_notifications(self) -> None:
+        self._volume_handler = None
@@ -0,0 +1,212 @@
+# src/audio/com_executor.py
+from typing import Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+import logging
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+from audio.backend import (
+    AudioBackend,
+    DeviceNotificationHandler,
+    SessionInfo,
+    SessionNotificationHandler,
+    VolumeNotificationHandler,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class _Task:
+    __slots__ = ("fn", "args", "key", "future")
+
+    def __init__(self, fn: Callable, args: tuple, key: Optional[Hashable]):
+        self.fn = fn
+        self.args = args
+        self.key = key
+        self.future = Future()
+
+
+class ComExecutor:
+    """One long-lived thread that owns the COM apartment and runs audio calls in submission order.
+
+    The thread joins the apartment once, when the first call is submitted, and leaves it in stop. A call submitted
+    with a key that is still queued under that key replaces the queued call's function and arguments, so the
+    latest request wins and every submitter gets the same future.
+    """
+
+    def __init__(self, initialize: Optional[Callable[[], None]] = None,
+                 uninitialize: Optional[Callable[[], None]] = None, name: str = "ComExecutor"):
+        self.initialize = initialize
+        self.uninitialize = uninitialize
+        self.name = name
+        self._cond = threading.Condition()
+        self._queue: Deque[_Task] = deque()
+        self._queued: Dict[Hashable, _Task] = {}  # key -> queued task, for coalescing
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+        self.submitted = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def _start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Run the calls already queued, then leave the apartment and end the thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def on_thread(self) -> bool:
+        """Whether the caller is the executor thread, where calls run inline."""
+        return self._thread is threading.current_thread()
+
+    def submit(self, fn: Callable, *args, key: Optional[Hashable] = None) -> Future:
+        """Queue fn(*args) and return a future of its result; a queued call with the same key is replaced."""
+        with self._cond:
+            if self._stopped:
+                raise RuntimeError(f"{self.name} is stopped")
+            self.submitted += 1
+            if key is not None:
+                task = self._queued.get(key)
+                if task is not None:
+                    task.fn, task.args = fn, args
+                    self.coalesced += 1
+                    return task.future
+            task = _Task(fn, args, key)
+            if key is not None:
+                self._queued[key] = task
+            self._queue.append(task)
+            if self._thread is None:
+                self._start()
+            self._cond.notify()
+            return task.future
+
+    def call(self, fn: Callable, *args, key: Optional[Hashable] = None):
+        """Run fn(*args) on the executor thread and return its result, or raise its exception.
+
+        Called from the executor thread itself, e.g. by a nested AudioService call, fn runs inline.
+        """
+        if self.on_thread():
+            return fn(*args)
+        return self.submit(fn, *args, key=key).result()
+
+    def _run(self) -> None:
+        if self.initialize is not None:
+            try:
+                self.initialize()
+            except Exception as e:
+                logger.error(f"Error initializing COM on {self.name}: {e}")
+        while True:
+            with self._cond:
+                while not (self._queue or self._stopped):
+                    self._cond.wait()
+                if not self._queue:
+                    break
+                task = self._queue.popleft()
+                if task.key is not None:
+                    del self._queued[task.key]
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = task.fn(*task.args)
+            except BaseException as e:
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+            self.executed += 1
+        if self.uninitialize is not None:
+            try:
+                self.uninitialize()
+            except Exception as e:
+                logger.error(f"Error uninitializing COM on {self.name}: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"queued": len(self._queue), "submitted": self.submitted, "executed": self.executed,
+                    "coalesced": self.coalesced}
+
+
+class ExecutorAudioBackend(AudioBackend):
+    """Runs every call of another backend on a ComExecutor, whichever thread makes it.
+
+    Registering and unregistering notifications passes straight through: those calls manage threads of their own,
+    whose callbacks may in turn call the backend. The wrapped backend must deliver notifications on such threads,
+    as the pycaw one does; a handler run on the executor thread that waits for a lock held by a thread waiting for
+    the executor would deadlock.
+    """
+
+    def __init__(self, backend: AudioBackend, executor: Optional[ComExecutor] = None):
+        self.backend = backend
+        self.executor = executor or ComExecutor(backend.initialize_thread, backend.uninitialize_thread)
+
+    def __getattr__(self, name: str):
+        # Anything beyond the interface, e.g. the call counters of a simulated backend, is the wrapped one's.
+        return getattr(self.backend, name)
+
+    def enumerate_output_devices(self) -> List[Tuple[str, str]]:
+        return self.executor.call(self.backend.enumerate_output_devices)
+
+    def get_output_device(self, device_id: str) -> Optional[Tuple[str, bool]]:
+        return self.executor.call(self.backend.get_output_device, device_id)
+
+    def get_default_output_device_id(self) -> Optional[str]:
+        return self.executor.call(self.backend.get_default_output_device_id)
+
+    def activate_endpoint_volume(self, device_id: str):
+        return self.executor.call(self.backend.activate_endpoint_volume, device_id)
+
+    def release_endpoint_volume(self, endpoint_volume) -> None:
+        self.executor.call(self.backend.release_endpoint_volume, endpoint_volume)
+
+    def get_volume(self, endpoint_volume) -> float:
+        return self.executor.call(self.backend.get_volume, endpoint_volume)
+
+    def set_volume(self, endpoint_volume, scalar: float) -> None:
+        self.executor.call(self.backend.set_volume, endpoint_volume, scalar)
+
+    def set_application_endpoint(self, pid: int, device_id: str) -> bool:
+        return self.executor.call(self.backend.set_application_endpoint, pid, device_id)
+
+    def set_application_endpoints(self, pids: List[int], device_id: str) -> Dict[int, bool]:
+        return self.executor.call(self.backend.set_application_endpoints, pids, device_id)
+
+    def list_sessions(self) -> List[SessionInfo]:
+        return self.executor.call(self.backend.list_sessions)
+
+    def list_session_pids(self) -> Set[int]:
+        return self.executor.call(self.backend.list_session_pids)
+
+    def get_process_name(self, pid: int) -> Optional[str]:
+        return self.executor.call(self.backend.get_process_name, pid)
+
+    def set_session_mute(self, session_ids: List[str], muted: bool) -> int:
+        return self.executor.call(self.backend.set_session_mute, session_ids, muted)
+
+    def register_notifications(self, handler: DeviceNotificationHandler) -> bool:
+        return self.backend.register_notifications(handler)
+
+    def unregister_notifications(self) -> None:
+        self.backend.unregister_notifications()
+
+    def register_session_notifications(self, handler: SessionNotificationHandler) -> bool:
+        return self.backend.register_session_notifications(handler)
+
+    def refresh_session_notifications(self) -> None:
+        self.backend.refresh_session_notifications()
+
+    def unregister_session_notifications(self) -> None:
+        self.backend.unregister_session_notifications()
+
+    def register_volume_notifications(self, handler: VolumeNotificationHandler) -> bool:
+        return self.backend.register_volume_notifications(handler)
+
+    def refresh_volume_notifications(self) -> None:
+        self.backend.refresh_volume_notifications()
+
+    def unregister_volume_notifications(self) -> None:
+        self.backend.unregister_volume_notifications()
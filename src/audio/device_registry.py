@@ -0,0 +1,185 @@
+# src/audio/device_registry.py
+from typing import Callable, Dict, List, Optional
+import logging
+import threading
+import time
+
+from audio.backend import AudioBackend, DeviceNotificationHandler
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_TTL = 5.0  # seconds a snapshot stays valid when notifications are unavailable
+
+
+class DeviceRegistry(DeviceNotificationHandler):
+    """Process-wide cache of active output endpoints, kept current by endpoint notifications."""
+
+    def __init__(self, backend: AudioBackend):
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._names: Dict[str, str] = {}  # endpoint ID -> friendly name
+        self._ids: Dict[str, str] = {}  # friendly name -> endpoint ID
+        self._default_id = None
+        self._loaded_at = None
+        self._pending = set()  # endpoint IDs announced by notifications but not read yet
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+        self.notifications_active = False
+        self.hits = 0
+        self.misses = 0
+        self.device_reads = 0
+
+    def start(self) -> None:
+        """Subscribe to endpoint notifications; without them the cache expires after FALLBACK_TTL."""
+        self.notifications_active = self.backend.register_notifications(self)
+        if not self.notifications_active:
+            logger.warning("Endpoint notifications unavailable, device list will be re-read periodically.")
+
+    def stop(self) -> None:
+        if self.notifications_active:
+            self.backend.unregister_notifications()
+            self.notifications_active = False
+
+    def add_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call listener(device_id) from the notifying thread when an endpoint changes; None means all of them."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, device_id: Optional[str]) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(device_id)
+            except Exception as e:
+                logger.error(f"Error in device listener: {e}")
+
+    def invalidate(self) -> None:
+        """Drop the cached snapshot so the next read enumerates again."""
+        with self._lock:
+            self._loaded_at = None
+        self._notify(None)
+
+    def _ensure_loaded(self) -> None:
+        with self._lock:
+            fresh = self._loaded_at is not None and (
+                self.notifications_active or time.monotonic() - self._loaded_at < FALLBACK_TTL
+            )
+            if fresh:
+                self.hits += 1
+                while self._pending and self._loaded_at is not None:
+                    self._read_device(self._pending.pop())
+                if self._loaded_at is not None:
+                    return
+            self.misses += 1
+            METRICS.incr("com.enumerations")
+            with METRICS.timer("device_enumeration_ms"):
+                devices = self.backend.enumerate_output_devices()
+            self._names = dict(devices)
+            self._ids = {name: device_id for device_id, name in devices}
+            self._default_id = self.backend.get_default_output_device_id()
+            self._pending.clear()
+            self._loaded_at = time.monotonic()
+
+    def devices(self) -> Dict[str, str]:
+        """Return a friendly name -> endpoint ID map of active output devices."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._ids)
+
+    def endpoints(self) -> Dict[str, str]:
+        """Return an endpoint ID -> friendly name map of active output devices; unlike devices(), names may repeat."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._names)
+
+    def device_id(self, name: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._ids.get(name)
+
+    def device_name(self, device_id: str) -> Optional[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return self._names.get(device_id)
+
+    def is_active(self, device_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return device_id in self._names
+
+    def default_device(self) -> Optional[Dict[str, str]]:
+        """Return the default output device as a {friendly name: endpoint ID} dict."""
+        with self._lock:
+            self._ensure_loaded()
+            if self._default_id not in self._names:
+                return None
+            return {self._names[self._default_id]: self._default_id}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "device_reads": self.device_reads,
+            "devices": len(self._names),
+        }
+
+    def _set_device(self, device_id: str, name: Optional[str]) -> None:
+        old_name = self._names.pop(device_id, None)
+        if old_name is not None and self._ids.get(old_name) == device_id:
+            del self._ids[old_name]
+            # Another endpoint may share the friendly name.
+            for other_id, other_name in self._names.items():
+                if other_name == old_name:
+                    self._ids[old_name] = other_id
+        if name is not None:
+            self._names[device_id] = name
+            self._ids[name] = device_id
+
+    def _read_device(self, device_id: str) -> None:
+        self.device_reads += 1
+        METRICS.incr("com.device_reads")
+        try:
+            info = self.backend.get_output_device(device_id)
+        except Exception as e:
+            logger.error(f"Error reading device {device_id}, invalidating device cache: {e}")
+            self._loaded_at = None
+            return
+        active = info is not None and info[1]
+        self._set_device(device_id, info[0] if active else None)
+
+    def _reload_device(self, device_id: str) -> None:
+        # Notification callbacks must not call back into the enumerator, so the
+        # device is only marked here and read by the next caller.
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            self._pending.add(device_id)
+        self._notify(device_id)
+
+    def on_device_added(self, device_id: str) -> None:
+        self._reload_device(device_id)
+
+    def on_device_removed(self, device_id: str) -> None:
+        with self._lock:
+            self._pending.discard(device_id)
+            self._set_device(device_id, None)
+        self._notify(device_id)
+
+    def on_device_state_changed(self, device_id: str, active: bool) -> None:
+        if active:
+            self._reload_device(device_id)
+        else:
+            self.on_device_removed(device_id)
+
+    def on_default_device_changed(self, device_id: Optional[str]) -> None:
+        with self._lock:
+            self._default_id = device_id
+        self._notify(device_id)
+
+    def on_device_name_changed(self, device_id: str) -> None:
+        with self._lock:
+            known = device_id in self._names
+        if known:
+            self._reload_device(device_id)
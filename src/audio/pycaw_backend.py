@@ -0,0 +1,494 @@
+# src/audio/pycaw_backend.py
+from typing import Dict, List, Optional, Tuple
+import logging
+import queue
+import threading
+from ctypes import POINTER, cast
+
+import comtypes
+from comtypes import CLSCTX_ALL
+import pythoncom
+from pycaw.api.mmdeviceapi import IMMEndpoint
+from pycaw.api.audioclient import ISimpleAudioVolume
+from pycaw.callbacks import (
+    AudioEndpointVolumeCallback,
+    AudioSessionEvents,
+    AudioSessionNotification,
+    MMNotificationClient,
+)
+from pycaw.constants import CLSID_MMDeviceEnumerator
+from pycaw.pycaw import (
+    DEVICE_STATE,
+    AudioUtilities,
+    EDataFlow,
+    ERole,
+    IAudioEndpointVolume,
+    IAudioSessionControl2,
+    IAudioSessionManager2,
+    IMMDeviceEnumerator,
+)
+
+from audio.backend import (
+    AudioBackend,
+    DeviceNotificationHandler,
+    SessionInfo,
+    SessionNotificationHandler,
+    VolumeNotificationHandler,
+)
+from audio.routing import NativeRoutingBackend, RoutingBackend
+
+logger = logging.getLogger(__name__)
+
+PKEY_DEVICE_FRIENDLY_NAME_FMTID = "{A45C254E-DF1C-4EFD-8020-67D146A850E0}"
+PKEY_DEVICE_FRIENDLY_NAME_PID = 14
+AUDIO_SESSION_STATE_EXPIRED = 2
+SESSION_COMMAND_TIMEOUT = 5.0  # seconds to wait for the session thread to answer a mute request
+
+
+def create_device_enumerator():
+    return comtypes.CoCreateInstance(
+        CLSID_MMDeviceEnumerator,
+        IMMDeviceEnumerator,
+        comtypes.CLSCTX_INPROC_SERVER,
+    )
+
+
+class _NotificationClient(MMNotificationClient):
+    """Forwards IMMNotificationClient callbacks for render endpoints to a handler."""
+
+    def __init__(self, handler: DeviceNotificationHandler):
+        super().__init__()
+        self.handler = handler
+
+    def on_device_added(self, added_device_id):
+        self.handler.on_device_added(added_device_id)
+
+    def on_device_removed(self, removed_device_id):
+        self.handler.on_device_removed(removed_device_id)
+
+    def on_device_state_changed(self, device_id, new_state, new_state_id):
+        self.handler.on_device_state_changed(device_id, new_state_id == DEVICE_STATE.ACTIVE.value)
+
+    def on_default_device_changed(self, flow, flow_id, role, role_id, default_device_id):
+        if flow_id == EDataFlow.eRender.value and role_id == ERole.eMultimedia.value:
+            self.handler.on_default_device_changed(default_device_id)
+
+    def on_property_value_changed(self, device_id, property_struct, fmtid, pid):
+        if str(fmtid).upper() == PKEY_DEVICE_FRIENDLY_NAME_FMTID and pid == PKEY_DEVICE_FRIENDLY_NAME_PID:
+            self.handler.on_device_name_changed(device_id)
+
+
+class _SessionNotificationClient(AudioSessionNotification):
+    """Hands sessions created on one endpoint to the session thread, which tracks them."""
+
+    def __init__(self, commands: queue.Queue, device_id: str):
+        super().__init__()
+        self.commands = commands
+        self.device_id = device_id
+
+    def on_session_created(self, new_session):
+        self.commands.put(("add", self.device_id, new_session))
+
+
+class _SessionEventsClient(AudioSessionEvents):
+    """Forwards the IAudioSessionEvents of one session to a handler."""
+
+    def __init__(self, handler: SessionNotificationHandler, commands: queue.Queue, session_id: str):
+        super().__init__()
+        self.handler = handler
+        self.commands = commands
+        self.session_id = session_id
+
+    def _expired(self):
+        self.handler.on_session_expired(self.session_id)
+        # Unregistering from inside a callback deadlocks, so the session thread drops it.
+        self.commands.put(("drop", self.session_id))
+
+    def on_simple_volume_changed(self, new_volume, new_mute, event_context):
+        self.handler.on_session_mute_changed(self.session_id, bool(new_mute))
+
+    def on_state_changed(self, new_state, new_state_id):
+        if new_state_id == AUDIO_SESSION_STATE_EXPIRED:
+            self._expired()
+
+    def on_session_disconnected(self, disconnect_reason, disconnect_reason_id):
+        self._expired()
+
+
+class _VolumeNotificationClient(AudioEndpointVolumeCallback):
+    """Forwards IAudioEndpointVolumeCallback notifications of one endpoint to a handler."""
+
+    def __init__(self, handler: VolumeNotificationHandler, device_id: str):
+        super().__init__()
+        self.handler = handler
+        self.device_id = device_id
+
+    def on_notify(self, new_volume, new_mute, event_context, channels, channel_volumes):
+        self.handler.on_volume_changed(self.device_id, new_volume, bool(new_mute))
+
+
+def active_render_devices() -> Dict[str, object]:
+    """Return every active render endpoint, keyed by endpoint ID."""
+    collection = create_device_enumerator().EnumAudioEndpoints(
+        EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value
+    )
+    devices = {}
+    for i in range(collection.GetCount()):
+        device = collection.Item(i)
+        devices[device.GetId()] = device
+    return devices
+
+
+def session_managers() -> Dict[str, object]:
+    """Return the IAudioSessionManager2 of every active render endpoint, keyed by endpoint ID."""
+    managers = {}
+    for device_id, device in active_render_devices().items():
+        manager = device.Activate(IAudioSessionManager2._iid_, CLSCTX_ALL, None)
+        managers[device_id] = cast(manager, POINTER(IAudioSessionManager2))
+    return managers
+
+
+def _session_controls(manager):
+    """Yield the IAudioSessionControl2 of every session of a session manager."""
+    sessions = manager.GetSessionEnumerator()
+    for i in range(sessions.GetCount()):
+        yield sessions.GetSession(i).QueryInterface(IAudioSessionControl2)
+
+
+class PycawAudioBackend(AudioBackend):
+    """Audio backend on top of pycaw and the MMDevice API.
+
+    The calls expect a thread that has joined the multithreaded apartment; AudioService runs them all on its
+    ComExecutor. The notification threads join the apartment themselves.
+    """
+
+    def __init__(self, routing: Optional[RoutingBackend] = None):
+        # AudioDLL.dll is only loaded by the first route.
+        self.routing = routing or NativeRoutingBackend()
+        self._notification_thread = None
+        self._stop_notifications = threading.Event()
+        self._session_thread = None
+        self._session_commands = queue.Queue()
+        self._volume_thread = None
+        self._volume_commands = queue.Queue()
+
+    def initialize_thread(self) -> None:
+        pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+
+    def uninitialize_thread(self) -> None:
+        pythoncom.CoUninitialize()
+
+    def enumerate_output_devices(self) -> List[Tuple[str, str]]:
+        devices = []
+
+        device_enumerator = create_device_enumerator()
+        if not device_enumerator:
+            logger.error("Failed to create device enumerator.")
+            return devices
+
+        collection = device_enumerator.EnumAudioEndpoints(
+            EDataFlow.eRender.value, DEVICE_STATE.ACTIVE.value
+        )
+        if not collection:
+            logger.error("No active audio endpoints found.")
+            return devices
+
+        for i in range(collection.GetCount()):
+            device = collection.Item(i)
+            if device:
+                device_object = AudioUtilities.CreateDevice(device)
+                if ": None" not in str(device_object):
+                    devices.append((device_object.id, device_object.FriendlyName))
+                device_object._dev.Release()
+
+        return devices
+
+    def get_output_device(self, device_id: str) -> Optional[Tuple[str, bool]]:
+        try:
+            device = create_device_enumerator().GetDevice(device_id)
+        except comtypes.COMError:
+            return None
+        if device.QueryInterface(IMMEndpoint).GetDataFlow() != EDataFlow.eRender.value:
+            return None
+        device_object = AudioUtilities.CreateDevice(device)
+        return device_object.FriendlyName, device.GetState() == DEVICE_STATE.ACTIVE.value
+
+    def get_default_output_device_id(self) -> Optional[str]:
+        try:
+            default_device = create_device_enumerator().GetDefaultAudioEndpoint(
+                EDataFlow.eRender.value, ERole.eMultimedia.value
+            )
+            return default_device.GetId()
+        except comtypes.COMError:
+            return None
+
+    def activate_endpoint_volume(self, device_id: str):
+        try:
+            device = create_device_enumerator().GetDevice(device_id)
+        except comtypes.COMError:
+            return None
+        if device.GetState() != DEVICE_STATE.ACTIVE.value:
+            return None
+        interface = device.Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+        return cast(interface, POINTER(IAudioEndpointVolume))
+
+    def release_endpoint_volume(self, endpoint_volume) -> None:
+        # comtypes calls Release() when the last reference to the pointer goes away,
+        # so releasing explicitly here would drop the reference count twice.
+        pass
+
+    def get_volume(self, endpoint_volume) -> float:
+        return endpoint_volume.GetMasterVolumeLevelScalar()
+
+    def set_volume(self, endpoint_volume, scalar: float) -> None:
+        endpoint_volume.SetMasterVolumeLevelScalar(scalar, None)
+
+    def set_application_endpoint(self, pid: int, device_id: str) -> bool:
+        result = self.routing.set_endpoint(pid, device_id)
+        if not result:
+            logger.debug(f"Routing PID {pid} to {device_id} failed: {result.error}")
+        return result.ok
+
+    def set_application_endpoints(self, pids: List[int], device_id: str) -> Dict[int, bool]:
+        results = {}
+        for result in self.routing.set_endpoints(pids, device_id):
+            if not result:
+                logger.debug(f"Routing PID {result.pid} to {device_id} failed: {result.error}")
+            results[result.pid] = result.ok
+        return results
+
+    def register_notifications(self, handler: DeviceNotificationHandler) -> bool:
+        ready = threading.Event()
+        registered = []
+
+        def run():
+            # Notifications are delivered on MMDevAPI worker threads, so this thread joins the MTA.
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            try:
+                device_enumerator = create_device_enumerator()
+                client = _NotificationClient(handler)
+                device_enumerator.RegisterEndpointNotificationCallback(client)
+                registered.append(True)
+            except Exception as e:
+                logger.error(f"Error registering endpoint notifications: {e}")
+            ready.set()
+
+            if registered:
+                self._stop_notifications.wait()
+                device_enumerator.UnregisterEndpointNotificationCallback(client)
+            pythoncom.CoUninitialize()
+
+        self._stop_notifications.clear()
+        self._notification_thread = threading.Thread(target=run, name="EndpointNotifications", daemon=True)
+        self._notification_thread.start()
+        ready.wait()
+        return bool(registered)
+
+    def unregister_notifications(self) -> None:
+        if self._notification_thread is not None:
+            self._stop_notifications.set()
+            self._notification_thread.join()
+            self._notification_thread = None
+
+    def list_sessions(self) -> List[SessionInfo]:
+        sessions = []
+        for device_id, manager in session_managers().items():
+            for control in _session_controls(manager):
+                pid = control.GetProcessId()
+                if pid:
+                    muted = bool(control.QueryInterface(ISimpleAudioVolume).GetMute())
+                    sessions.append(SessionInfo(control.GetSessionInstanceIdentifier(), pid, device_id, muted))
+        return sessions
+
+    def get_process_name(self, pid: int) -> Optional[str]:
+        import psutil
+        try:
+            return psutil.Process(pid).name()
+        except (psutil.NoSuchProcess, psutil.AccessDenied, ValueError):
+            return None
+
+    def set_session_mute(self, session_ids: List[str], muted: bool) -> int:
+        if self._session_thread is not None:
+            # The session thread already holds every session's volume interface.
+            reply = queue.Queue()
+            self._session_commands.put(("mute", session_ids, muted, reply))
+            try:
+                return reply.get(timeout=SESSION_COMMAND_TIMEOUT)
+            except queue.Empty:
+                logger.error("Timed out waiting for the session thread to change mute state")
+                return 0
+        wanted = set(session_ids)
+        changed = 0
+        for manager in session_managers().values():
+            for control in _session_controls(manager):
+                if control.GetSessionInstanceIdentifier() in wanted:
+                    control.QueryInterface(ISimpleAudioVolume).SetMute(muted, None)
+                    changed += 1
+        return changed
+
+    def register_session_notifications(self, handler: SessionNotificationHandler) -> bool:
+        ready = threading.Event()
+        registered = []
+        commands = self._session_commands
+        clients: Dict[str, object] = {}  # device ID -> session notification client
+        tracked: Dict[str, tuple] = {}  # session ID -> (control, simple volume, events client)
+
+        def track(device_id: str, session) -> None:
+            control = session.QueryInterface(IAudioSessionControl2)
+            pid = control.GetProcessId()
+            session_id = control.GetSessionInstanceIdentifier()
+            if not pid or session_id in tracked:
+                return
+            volume = control.QueryInterface(ISimpleAudioVolume)
+            events = _SessionEventsClient(handler, commands, session_id)
+            control.RegisterAudioSessionNotification(events)
+            tracked[session_id] = (control, volume, events)
+            handler.on_session_created(SessionInfo(session_id, pid, device_id, bool(volume.GetMute())))
+
+        def drop(session_id: str) -> None:
+            entry = tracked.pop(session_id, None)
+            if entry is not None:
+                try:
+                    entry[0].UnregisterAudioSessionNotification(entry[2])
+                except comtypes.COMError:
+                    pass
+
+        def mute(session_ids: List[str], muted: bool) -> int:
+            changed = 0
+            for session_id in session_ids:
+                entry = tracked.get(session_id)
+                if entry is not None:
+                    entry[1].SetMute(muted, None)
+                    changed += 1
+            return changed
+
+        def sync(managers: Dict[str, object]):
+            current = session_managers()
+            for device_id in set(managers) - set(current):
+                try:
+                    managers.pop(device_id).UnregisterSessionNotification(clients.pop(device_id))
+                except comtypes.COMError:
+                    pass
+            for device_id in set(current) - set(managers):
+                manager = current[device_id]
+                clients[device_id] = _SessionNotificationClient(commands, device_id)
+                manager.RegisterSessionNotification(clients[device_id])
+                managers[device_id] = manager
+                # Notifications only start once the session enumerator has been requested.
+                for control in _session_controls(manager):
+                    track(device_id, control)
+
+        def run():
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            managers = {}
+            try:
+                sync(managers)
+                registered.append(True)
+            except Exception as e:
+                logger.error(f"Error registering session notifications: {e}")
+            ready.set()
+
+            while registered:
+                command, *args = commands.get()
+                if command == "stop":
+                    break
+                result = 0
+                try:
+                    if command == "refresh":
+                        sync(managers)
+                    elif command == "add":
+                        track(*args)
+                    elif command == "drop":
+                        drop(*args)
+                    elif command == "mute":
+                        result = mute(args[0], args[1])
+                except Exception as e:
+                    logger.error(f"Error handling session command {command}: {e}")
+                finally:
+                    if command == "mute":
+                        args[2].put(result)
+            for session_id in list(tracked):
+                drop(session_id)
+            for device_id, manager in managers.items():
+                try:
+                    manager.UnregisterSessionNotification(clients[device_id])
+                except comtypes.COMError:
+                    pass
+            pythoncom.CoUninitialize()
+
+        self._session_thread = threading.Thread(target=run, name="SessionNotifications", daemon=True)
+        self._session_thread.start()
+        ready.wait()
+        if not registered:
+            self._session_thread.join()
+            self._session_thread = None
+        return bool(registered)
+
+    def refresh_session_notifications(self) -> None:
+        if self._session_thread is not None:
+            self._session_commands.put(("refresh",))
+
+    def unregister_session_notifications(self) -> None:
+        if self._session_thread is not None:
+            self._session_commands.put(("stop",))
+            self._session_thread.join()
+            self._session_thread = None
+
+    def register_volume_notifications(self, handler: VolumeNotificationHandler) -> bool:
+        ready = threading.Event()
+        registered = []
+
+        def sync(watched: Dict[str, tuple]):
+            current = active_render_devices()
+            for device_id in set(watched) - set(current):
+                endpoint_volume, client = watched.pop(device_id)
+                try:
+                    endpoint_volume.UnregisterControlChangeNotify(client)
+                except comtypes.COMError:
+                    pass
+            for device_id in set(current) - set(watched):
+                interface = current[device_id].Activate(IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
+                endpoint_volume = cast(interface, POINTER(IAudioEndpointVolume))
+                client = _VolumeNotificationClient(handler, device_id)
+                endpoint_volume.RegisterControlChangeNotify(client)
+                watched[device_id] = (endpoint_volume, client)
+
+        def run():
+            pythoncom.CoInitializeEx(pythoncom.COINIT_MULTITHREADED)
+            watched = {}
+            try:
+                sync(watched)
+                registered.append(True)
+            except Exception as e:
+                logger.error(f"Error registering volume notifications: {e}")
+            ready.set()
+
+            while registered and self._volume_commands.get() != "stop":
+                try:
+                    sync(watched)
+                except Exception as e:
+                    logger.error(f"Error refreshing volume notifications: {e}")
+            for endpoint_volume, client in watched.values():
+                try:
+                    endpoint_volume.UnregisterControlChangeNotify(client)
+                except comtypes.COMError:
+                    pass
+            pythoncom.CoUninitialize()
+
+        self._volume_thread = threading.Thread(target=run, name="VolumeNotifications", daemon=True)
+        self._volume_thread.start()
+        ready.wait()
+        if not registered:
+            self._volume_thread.join()
+            self._volume_thread = None  # so a later call can try again
+        return bool(registered)
+
+    def refresh_volume_notifications(self) -> None:
+        if self._volume_thread is not None:
+            self._volume_commands.put("refresh")
+
+    def unregister_volume_notifications(self) -> None:
+        if self._volume_thread is not None:
+            self._volume_commands.put("stop")
+            self._volume_thread.join()
+            self._volume_thread = None
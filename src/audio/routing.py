@@ -0,0 +1,136 @@
+# src/audio/routing.py
+import ctypes
+import logging
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DLL_PATH = Path(__file__).resolve().parent / "AudioDLL.dll"
+
+S_OK = 0
+E_ACCESSDENIED = 0x80070005
+E_INVALIDARG = 0x80070057
+E_NOTFOUND = 0x80070490
+E_FAIL = 0x80004005
+ROUTE_ERRORS = {
+    E_ACCESSDENIED: "access denied",
+    E_INVALIDARG: "invalid endpoint or process",
+    E_NOTFOUND: "no audio session",
+    E_FAIL: "failed",
+}
+
+
+class RoutingUnavailable(OSError):
+    """The native routing library could not be loaded or lacks the routing entry point."""
+
+
+class RouteResult(NamedTuple):
+    """The outcome of routing one process; true if it succeeded."""
+    pid: int
+    device_id: str
+    hresult: int  # as an unsigned 32-bit value
+
+    @property
+    def ok(self) -> bool:
+        return self.hresult & 0x80000000 == 0
+
+    @property
+    def error(self) -> Optional[str]:
+        """A short description of the failure, or None if the route succeeded."""
+        if self.ok:
+            return None
+        return ROUTE_ERRORS.get(self.hresult, f"HRESULT 0x{self.hresult:08X}")
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+
+class RoutingBackend:
+    """Interface over the call that moves every audio session of a process to an output endpoint."""
+
+    def set_endpoint(self, pid: int, device_id: str) -> RouteResult:
+        raise NotImplementedError
+
+    def set_endpoints(self, pids: Iterable[int], device_id: str) -> List[RouteResult]:
+        """Route several processes to one endpoint; implementations may do it in fewer native round trips."""
+        return [self.set_endpoint(pid, device_id) for pid in pids]
+
+
+class NativeRoutingBackend(RoutingBackend):
+    """Routes through SetApplicationEndpoint of AudioDLL.dll, loaded from next to this module on first use.
+
+    HRESULT SetApplicationEndpoint(LPCWSTR device_id, int role, DWORD pid) is declared once, so ctypes does not
+    infer the argument conversions on every call; a batch converts the endpoint ID once for all its processes.
+    """
+
+    def __init__(self, path: Path = DLL_PATH, role: int = 0):
+        self.path = Path(path)
+        self.role = role  # ERole; 0 routes the console role, as the DLL's callers always have
+        self._lock = threading.Lock()
+        self._function = None
+
+    def _load(self):
+        with self._lock:
+            if self._function is None:
+                try:
+                    library = ctypes.CDLL(str(self.path))
+                    function = library.SetApplicationEndpoint
+                except (OSError, AttributeError) as e:
+                    raise RoutingUnavailable(f"Cannot load SetApplicationEndpoint from {self.path}: {e}") from e
+                function.argtypes = (ctypes.c_wchar_p, ctypes.c_int, ctypes.c_uint32)
+                function.restype = ctypes.c_long
+                self._function = function
+                logger.info(f"Loaded the native routing library {self.path}")
+            return self._function
+
+    def set_endpoint(self, pid: int, device_id: str) -> RouteResult:
+        return RouteResult(pid, device_id, self._load()(device_id, self.role, pid) & 0xFFFFFFFF)
+
+    def set_endpoints(self, pids: Iterable[int], device_id: str) -> List[RouteResult]:
+        function = self._load()
+        device = ctypes.create_unicode_buffer(device_id)
+        return [RouteResult(pid, device_id, function(device, self.role, pid) & 0xFFFFFFFF) for pid in pids]
+
+
+class MemoryRoutingBackend(RoutingBackend):
+    """Keeps routes in a dict, for running and benchmarking routing where the native library is unavailable.
+
+    failures maps a pid to the HRESULT its routes fail with; latency is the seconds each route takes, as the
+    native call would, batched or not.
+    """
+
+    def __init__(self, failures: Optional[Dict[int, int]] = None, latency: float = 0.0):
+        self.routes: Dict[int, str] = {}
+        self.failures = dict(failures or {})
+        self.latency = latency
+        self.calls = Counter()
+
+    def _route(self, pid: int, device_id: str) -> RouteResult:
+        hresult = self.failures.get(pid, S_OK)
+        if hresult == S_OK:
+            self.routes[pid] = device_id
+        return RouteResult(pid, device_id, hresult)
+
+    def _wait(self, seconds: float) -> None:
+        if seconds:
+            # Sleeping would round a few microseconds up to the scheduler's resolution.
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                pass
+
+    def set_endpoint(self, pid: int, device_id: str) -> RouteResult:
+        self.calls["set_endpoint"] += 1
+        self._wait(self.latency)
+        return self._route(pid, device_id)
+
+    def set_endpoints(self, pids: Iterable[int], device_id: str) -> List[RouteResult]:
+        self.calls["set_endpoints"] += 1
+        results = []
+        for pid in pids:
+            self._wait(self.latency)
+            results.append(self._route(pid, device_id))
+        return results
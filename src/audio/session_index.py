@@ -0,0 +1,211 @@
+# src/audio/session_index.py
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+import threading
+import time
+
+from audio.backend import AudioBackend, SessionInfo, SessionNotificationHandler
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+FALLBACK_TTL = 2.0  # seconds the session list stays valid when notifications are unavailable
+
+
+class SessionIndex(SessionNotificationHandler):
+    """Live audio sessions by session ID, pid, executable name and device, kept current by session notifications.
+
+    Executable names are looked up once per process, the first time a lookup by name needs them. The backend is
+    never called while _lock is held: notification threads take it, and a backend call may wait on one of them,
+    e.g. a mute waiting for the session thread.
+    """
+
+    def __init__(self, backend: AudioBackend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()  # one re-read of the session list at a time
+        self._replay: Optional[List[Tuple[str, tuple]]] = None  # notifications received during a re-read
+        self._sessions: Dict[str, SessionInfo] = {}
+        self._by_pid: Dict[int, Set[str]] = {}
+        self._by_device: Dict[str, Set[str]] = {}
+        self._names: Dict[int, Optional[str]] = {}  # pid -> lower-cased executable name
+        self._by_name: Dict[str, Set[int]] = {}
+        self._unnamed: Set[int] = set()
+        self._loaded_at = None
+        self._listeners: List[Callable[[int], None]] = []
+        self.notifications_active = False
+
+    def start(self) -> None:
+        self.notifications_active = self.backend.register_session_notifications(self)
+        if not self.notifications_active:
+            logger.warning("Session notifications unavailable, session list will be re-read periodically.")
+
+    def stop(self) -> None:
+        if self.notifications_active:
+            self.backend.unregister_session_notifications()
+            self.notifications_active = False
+
+    def add_listener(self, listener: Callable[[int], None]) -> None:
+        """Call listener(pid) from the notifying thread whenever a process opens a session."""
+        self._listeners.append(listener)
+
+    def on_devices_changed(self, device_id: Optional[str] = None) -> None:
+        """Follow endpoint changes so sessions on new devices are seen too."""
+        self.backend.refresh_session_notifications()
+        with self._lock:
+            self._loaded_at = None
+
+    def _add(self, session: SessionInfo) -> None:
+        self._sessions[session.session_id] = session
+        if session.pid not in self._by_pid and session.pid not in self._names:
+            self._unnamed.add(session.pid)
+        self._by_pid.setdefault(session.pid, set()).add(session.session_id)
+        self._by_device.setdefault(session.device_id, set()).add(session.session_id)
+
+    def _remove(self, session_id: str) -> None:
+        session = self._sessions.pop(session_id, None)
+        if session is None:
+            return
+        for index, key in ((self._by_pid, session.pid), (self._by_device, session.device_id)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(session_id)
+                if not ids:
+                    del index[key]
+        if session.pid not in self._by_pid:
+            # The process has no session left; its PID may be reused by another executable.
+            self._unnamed.discard(session.pid)
+            name = self._names.pop(session.pid, None)
+            if name is not None:
+                pids = self._by_name.get(name)
+                pids.discard(session.pid)
+                if not pids:
+                    del self._by_name[name]
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and (
+            self.notifications_active or time.monotonic() - self._loaded_at < FALLBACK_TTL
+        )
+
+    def _ensure_loaded(self) -> None:
+        """Re-read the session list if it is stale; notifications that arrive meanwhile are applied on top of it."""
+        with self._lock:
+            if self._fresh():
+                return
+        with self._load_lock:
+            with self._lock:
+                if self._fresh():
+                    return
+                self._replay = []
+            try:
+                METRICS.incr("com.session_enumerations")
+                sessions = self.backend.list_sessions()
+            except Exception:
+                with self._lock:
+                    self._replay = None
+                raise
+            with self._lock:
+                replay, self._replay = self._replay, None
+                names = self._names
+                self._sessions, self._by_pid, self._by_device, self._names, self._by_name = {}, {}, {}, {}, {}
+                self._unnamed = set()
+                for session in sessions:
+                    self._add(session)
+                for pid in list(self._unnamed):
+                    if names.get(pid) is not None:
+                        self._set_name(pid, names[pid])
+                for change, args in replay:
+                    self._apply(change, args)
+                self._loaded_at = time.monotonic()
+
+    def _apply(self, change: str, args: tuple) -> None:
+        if self._replay is not None:
+            self._replay.append((change, args))
+        if change == "created":
+            self._add(*args)
+        elif change == "expired":
+            self._remove(*args)
+        else:
+            self._mark_muted(*args)
+
+    def _set_name(self, pid: int, name: Optional[str]) -> None:
+        self._unnamed.discard(pid)
+        self._names[pid] = name
+        if name is not None:
+            self._by_name.setdefault(name, set()).add(pid)
+
+    def _name_processes(self) -> None:
+        with self._lock:
+            unnamed = list(self._unnamed)
+        names = {}
+        for pid in unnamed:
+            try:
+                name = self.backend.get_process_name(pid)
+            except Exception as e:
+                logger.debug(f"Could not read the executable name of PID {pid}: {e}")
+                name = None
+            names[pid] = name.lower() if name else None
+        with self._lock:
+            for pid, name in names.items():
+                if pid in self._unnamed:
+                    self._set_name(pid, name)
+
+    def has_session(self, pid: int) -> bool:
+        self._ensure_loaded()
+        with self._lock:
+            return pid in self._by_pid
+
+    def sessions(self, device_id: Optional[str] = None) -> List[SessionInfo]:
+        """Return the live sessions, only those on device_id if given."""
+        self._ensure_loaded()
+        with self._lock:
+            if device_id is None:
+                return list(self._sessions.values())
+            return [self._sessions[session_id] for session_id in self._by_device.get(device_id, ())]
+
+    def sessions_for_pid(self, pid: int) -> List[SessionInfo]:
+        self._ensure_loaded()
+        with self._lock:
+            return [self._sessions[session_id] for session_id in self._by_pid.get(pid, ())]
+
+    def sessions_for_name(self, name: str) -> List[SessionInfo]:
+        """Return the sessions of every process with the executable name, compared case-insensitively."""
+        self._ensure_loaded()
+        self._name_processes()
+        with self._lock:
+            return [self._sessions[session_id]
+                    for pid in self._by_name.get(name.lower(), ()) for session_id in self._by_pid[pid]]
+
+    def process_name(self, pid: int) -> Optional[str]:
+        """Return the lower-cased executable name of a process with a session."""
+        self._ensure_loaded()
+        self._name_processes()
+        with self._lock:
+            return self._names.get(pid)
+
+    def _mark_muted(self, session_ids: Iterable[str], muted: bool) -> None:
+        for session_id in session_ids:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions[session_id] = session._replace(muted=muted)
+
+    def mark_muted(self, session_ids: Iterable[str], muted: bool) -> None:
+        """Record a mute change made by this process before its notification arrives."""
+        with self._lock:
+            self._apply("muted", (list(session_ids), muted))
+
+    def on_session_created(self, session: SessionInfo) -> None:
+        with self._lock:
+            self._apply("created", (session,))
+        for listener in list(self._listeners):
+            try:
+                listener(session.pid)
+            except Exception as e:
+                logger.error(f"Error in session listener: {e}")
+
+    def on_session_expired(self, session_id: str) -> None:
+        with self._lock:
+            self._apply("expired", (session_id,))
+
+    def on_session_mute_changed(self, session_id: str, muted: bool) -> None:
+        self.mark_muted((session_id,), muted)
@@ -0,0 +1,93 @@
+# src/audio/volume_cache.py
+from typing import Dict, Optional
+import logging
+import threading
+
+from audio.backend import AudioBackend
+
+logger = logging.getLogger(__name__)
+
+
+class EndpointVolumeCache:
+    """Activated endpoint volume interfaces keyed by endpoint ID.
+
+    When the backend runs its calls on an executor, AudioService makes the calls that hold the lock across a backend
+    call on that executor too, so none of them waits for it while it runs another. evict() releases outside the lock.
+    """
+
+    def __init__(self, backend: AudioBackend):
+        self.backend = backend
+        self._lock = threading.RLock()
+        self._interfaces: Dict[str, object] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, device_id: str):
+        """Return the cached interface for device_id, activating it on first use; None if the device is gone."""
+        with self._lock:
+            interface = self._interfaces.get(device_id)
+            if interface is not None:
+                self.hits += 1
+                return interface
+            self.misses += 1
+            interface = self.backend.activate_endpoint_volume(device_id)
+            if interface is not None:
+                self._interfaces[device_id] = interface
+            return interface
+
+    def evict(self, device_id: Optional[str]) -> None:
+        """Release the interface of one device, or of every device if device_id is None."""
+        with self._lock:
+            if device_id is None:
+                interfaces = list(self._interfaces.values())
+                self._interfaces.clear()
+            else:
+                interface = self._interfaces.pop(device_id, None)
+                interfaces = [interface] if interface is not None else []
+        for interface in interfaces:
+            try:
+                self.backend.release_endpoint_volume(interface)
+            except Exception as e:
+                logger.error(f"Error releasing endpoint volume: {e}")
+
+    def clear(self) -> None:
+        self.evict(None)
+
+    def get_volume(self, device_id: str) -> Optional[float]:
+        """Return the master volume scalar of a device, or None if it is not available."""
+        with self._lock:
+            interface = self.get(device_id)
+            if interface is None:
+                return None
+            try:
+                return self.backend.get_volume(interface)
+            except Exception:
+                self.evict(device_id)
+                raise
+
+    def set_volume(self, device_id: str, scalar: float) -> bool:
+        """Set the master volume scalar of a device; return False if it is not available."""
+        with self._lock:
+            interface = self.get(device_id)
+            if interface is None:
+                return False
+            try:
+                self.backend.set_volume(interface, max(0.0, min(scalar, 1.0)))
+                return True
+            except Exception:
+                self.evict(device_id)
+                raise
+
+    def adjust_volume(self, device_id: str, delta: float) -> Optional[float]:
+        """Add delta to the master volume scalar with a single interface lookup and return the new value."""
+        with self._lock:
+            interface = self.get(device_id)
+            if interface is None:
+                return None
+            try:
+                scalar = max(0.0, min(self.backend.get_volume(interface) + delta, 1.0))
+                self.backend.set_volume(interface, scalar)
+                return scalar
+            except Exception:
+                self.evict(device_id)
+                raise
@@ -0,0 +1,46 @@
+# src/audio/volume_watcher.py
+from typing import Callable, List, Optional
+import logging
+
+from audio.backend import AudioBackend, VolumeNotificationHandler
+
+logger = logging.getLogger(__name__)
+
+
+class VolumeWatcher(VolumeNotificationHandler):
+    """Fans endpoint master-volume notifications out to listeners as 0-100 levels."""
+
+    def __init__(self, backend: AudioBackend):
+        self.backend = backend
+        self._listeners: List[Callable[[str, float], None]] = []
+        self.notifications_active = False
+
+    def start(self) -> None:
+        self.notifications_active = self.backend.register_volume_notifications(self)
+        if not self.notifications_active:
+            logger.warning("Volume notifications unavailable, volume labels only follow changes made in the app.")
+
+    def stop(self) -> None:
+        if self.notifications_active:
+            self.backend.unregister_volume_notifications()
+            self.notifications_active = False
+
+    def add_listener(self, listener: Callable[[str, float], None]) -> None:
+        """Call listener(device_id, volume) from the notifying thread whenever a master volume changes."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str, float], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def on_devices_changed(self, device_id: Optional[str] = None) -> None:
+        """Follow endpoint changes so new devices are watched too."""
+        self.backend.refresh_volume_notifications()
+
+    def on_volume_changed(self, device_id: str, scalar: float, muted: bool) -> None:
+        volume = round(scalar * 100)
+        for listener in list(self._listeners):
+            try:
+                listener(device_id, volume)
+            except Exception as e:
+                logger.error(f"Error in volume listener: {e}")
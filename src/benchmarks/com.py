@@ -0,0 +1,133 @@
+# src/benchmarks/com.py
+"""Per-call overhead of joining the COM apartment around every call against one ComExecutor thread.
+
+The stand-in backend spins for --init-us whenever a thread joins or leaves the apartment, in place of
+CoInitialize and CoUninitialize.
+
+Run from src/: python -m benchmarks.com --calls 2000 --init-us 20
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Dict
+
+from audio.backend import SimulatedAudioBackend
+from audio.com_executor import ComExecutor, ExecutorAudioBackend
+from audio.volume_cache import EndpointVolumeCache
+
+DEVICE_ID = "{0.0.0.00000000}.{device-0}"
+INIT_US = 20.0
+
+
+def _spin(seconds: float) -> None:
+    # Sleeping would round a few microseconds up to the scheduler's resolution.
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class ApartmentBackend(SimulatedAudioBackend):
+    """Simulated backend whose apartment joins and leaves cost init_us each."""
+
+    def __init__(self, init_us: float = INIT_US):
+        super().__init__(notifications=False)
+        self.init = init_us / 1e6
+        self.add_endpoint(DEVICE_ID, "Speakers")
+        self.pid = 1234
+        self.start_session(self.pid, DEVICE_ID)
+
+    def initialize_thread(self) -> None:
+        super().initialize_thread()
+        _spin(self.init)
+
+    def uninitialize_thread(self) -> None:
+        super().uninitialize_thread()
+        _spin(self.init)
+
+
+class PerCallApartment:
+    """The previous scheme: every call joins and leaves the apartment on the calling thread."""
+
+    def __init__(self, backend: SimulatedAudioBackend):
+        self.backend = backend
+
+    def __getattr__(self, name: str):
+        method = getattr(self.backend, name)
+
+        def call(*args):
+            self.backend.initialize_thread()
+            try:
+                return method(*args)
+            finally:
+                self.backend.uninitialize_thread()
+        return call
+
+
+def _per_call_us(func, calls: int) -> float:
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return round((time.perf_counter() - started) / calls * 1e6, 3)
+
+
+def measure(backend: SimulatedAudioBackend, wrapped, calls: int) -> Dict[str, float]:
+    """Per-call microseconds of a warm volume read and of a route made through wrapped, and the apartment joins."""
+    cache = EndpointVolumeCache(wrapped)
+    cache.get_volume(DEVICE_ID)
+    results = {
+        "get_volume_us": _per_call_us(lambda: cache.get_volume(DEVICE_ID), calls),
+        "set_application_endpoint_us": _per_call_us(
+            lambda: wrapped.set_application_endpoint(backend.pid, DEVICE_ID), calls),
+    }
+    results["apartment_joins"] = backend.calls["initialize_thread"]
+    return results
+
+
+def coalescing(pids: int = 10, requests: int = 100) -> Dict[str, int]:
+    """Backend calls left of routes spread over pids and volume changes of one device queued on a busy executor."""
+    backend = ApartmentBackend(0)
+    for pid in range(1, pids + 1):
+        backend.start_session(pid, DEVICE_ID)
+    interface = backend.activate_endpoint_volume(DEVICE_ID)
+    executor = ComExecutor(backend.initialize_thread, backend.uninitialize_thread)
+    busy = threading.Event()
+    executor.submit(busy.wait)
+    futures = []
+    for i in range(requests):
+        pid = i % pids + 1
+        futures.append(executor.submit(backend.set_application_endpoint, pid, DEVICE_ID, key=("route", pid)))
+        futures.append(executor.submit(backend.set_volume, interface, i / requests, key=("volume", DEVICE_ID)))
+    busy.set()
+    for future in futures:
+        future.result()
+    executor.stop()
+    return {
+        "requests": 2 * requests,
+        "set_application_endpoint_calls": backend.calls["set_application_endpoint"],
+        "set_volume_calls": backend.calls["set_volume"],
+        "final_volume_latest": backend.endpoints[DEVICE_ID]["volume"] == (requests - 1) / requests,
+    }
+
+
+def run(calls: int = 2000, init_us: float = INIT_US) -> Dict[str, Dict[str, float]]:
+    backend = ApartmentBackend(init_us)
+    per_call = measure(backend, PerCallApartment(backend), calls)
+    backend = ApartmentBackend(init_us)
+    wrapped = ExecutorAudioBackend(backend)
+    executor = measure(backend, wrapped, calls)
+    wrapped.executor.stop()
+    return {"per_call": per_call, "executor": executor, "coalescing": coalescing()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--init-us", type=float, default=INIT_US,
+                        help="microseconds the stand-in spends joining or leaving the apartment")
+    args = parser.parse_args()
+    print(json.dumps(run(args.calls, args.init_us), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+# src/benchmarks/dwell.py
+"""Scripted focus and drag timelines replayed through the dwell policy, counting the routes each one issues.
+
+Run from src/: python -m benchmarks.dwell --dwell-ms 200
+"""
+import argparse
+import json
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.scenario import Scenario
+from services.dwell import DWELL_MS, DwellPolicy
+from services.events import FOREGROUND, LOCATION, MOVE_END, MOVE_START
+from services.monitor_service import _foreground_route
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+
+Step = Tuple[int, str, int, Optional[int]]  # (milliseconds, event kind, window, monitor it is on after the event)
+
+
+def _drag(window: int, monitors: List[int], step_ms: int = 16) -> List[Step]:
+    """Drag a window through the given monitors, one location event per frame."""
+    steps = [(0, MOVE_START, window, None)]
+    for i, monitor in enumerate(monitors):
+        steps.append(((i + 1) * step_ms, LOCATION, window, monitor))
+    steps.append(((len(monitors) + 1) * step_ms, MOVE_END, window, None))
+    return steps
+
+
+TIMELINES: Dict[str, List[Step]] = {
+    # Alt-tabbing between windows already routed for their screens never needs a call.
+    "alt_tab": [(i * 50, FOREGROUND, i % 2, None) for i in range(20)],
+    # A window dragged across the boundary, hesitating on both sides, and released on the second screen.
+    "drag_across": _drag(0, [0] * 5 + [1] * 20 + [0] * 20 + [1] * 20),
+    # A window snapped to the other screen and back within 80 ms.
+    "snap_and_back": [(0, LOCATION, 0, 1), (80, LOCATION, 0, 0)],
+    # A window moved to the other screen for good.
+    "move_and_stay": [(0, LOCATION, 0, 1)],
+    # Two windows moved to the other screen at nearly the same time; each gets its own dwell time.
+    "move_two": [(0, LOCATION, 0, 1), (30, LOCATION, 1, 0)],
+}
+
+
+def replay(timeline: List[Step], dwell_ms: float = DWELL_MS, track_moves: bool = True,
+           settle_ms: int = 1000) -> Dict[str, object]:
+    """Replay a timeline on a fresh scenario with virtual time; return the routes issued and the final state.
+
+    With dwell_ms=0 and track_moves=False every event is routed at once, as before the dwell policy.
+    """
+    scenario = Scenario(screens=2, windows=2).install()
+    config = scenario.config()
+    route_queue = RouteQueue(AppliedRoutes(scenario.processes))
+    for pid, device_id in scenario.expected_routes(config).items():
+        route_queue.submit(pid, device_id)
+    scenario.reset_calls()
+    policy = DwellPolicy(dwell_ms)
+    clock = 0.0
+
+    def advance(to: float) -> None:
+        nonlocal clock
+        while True:
+            until = policy.time_until_due(clock)
+            if until is None or clock + until > to:
+                break
+            clock += until
+            for pid, device_id, _ in policy.take_due(clock):
+                route_queue.submit(pid, device_id)
+        clock = to
+
+    for at_ms, kind, window, monitor in timeline:
+        advance(at_ms / 1000)
+        hwnd = scenario.hwnds[window]
+        if monitor is not None and scenario.window_backend.windows[hwnd]["monitor"] != scenario.monitors[monitor]:
+            scenario.window_backend.move_window(hwnd, scenario.monitors[monitor])
+        scenario.window_backend.set_foreground(hwnd)
+        if kind == MOVE_START and track_moves:
+            policy.move_started(hwnd, clock)
+        elif kind == MOVE_END and track_moves:
+            policy.move_ended(hwnd, clock)
+        route = _foreground_route(hwnd, config)
+        if route is not None:
+            policy.propose(hwnd, route[0], route[1], route_queue.applied.get(route[0]), clock)
+        for pid, device_id, _ in policy.take_due(clock):
+            route_queue.submit(pid, device_id)
+    advance(timeline[-1][0] / 1000 + settle_ms / 1000)
+
+    expected = scenario.expected_routes(config)
+    return {
+        "calls": scenario.audio_backend.calls["set_application_endpoint"],
+        "suppressed": policy.suppressed,
+        "committed": policy.committed,
+        "settled": all(route_queue.applied.get(pid) == device_id for pid, device_id in expected.items()),
+    }
+
+
+def run(dwell_ms: float = DWELL_MS) -> Dict[str, Dict[str, object]]:
+    """Replay every timeline with routes issued at once and with dwell_ms."""
+    return {name: {"immediate": replay(timeline, 0, track_moves=False), "dwell": replay(timeline, dwell_ms)}
+            for name, timeline in TIMELINES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dwell-ms", type=float, default=DWELL_MS)
+    args = parser.parse_args()
+    print(json.dumps(run(args.dwell_ms), indent=4))
+
+
+if __name__ == "__main__":
+    main()
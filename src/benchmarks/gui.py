@@ -0,0 +1,156 @@
+# src/benchmarks/gui.py
+"""Time the Tk thread spends on a device refresh: the old destroy-and-rebuild against the incremental view model.
+
+Widgets are counted by a stand-in for the Tk view rather than created, so this runs without a display; the
+simulated backends take --enum-ms to enumerate devices, as the real ones take milliseconds.
+
+Run from src/: python -m benchmarks.gui --screens 12 --devices 48
+"""
+import argparse
+import json
+import queue
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+
+from audio.audio_service import AudioService
+from benchmarks.scenario import SCREEN_HEIGHT, SCREEN_WIDTH, Scenario
+from config.settings import ConfigStore
+from gui.view_model import ScreenListModel, ScreenListView, ViewRefresher, read_view_state
+from window.window_utils import WindowUtils
+
+ENUM_MS = 5.0
+ROW_WIDGETS = 6  # label, dropdown, volume frame with its two buttons and label
+TIMEOUT = 10.0
+OPS = ("widgets_created", "widgets_destroyed", "rows_placed", "dropdowns_updated", "selections_set")
+
+
+class CountingView(ScreenListView):
+    """Counts the widget operations App would perform."""
+
+    def __init__(self):
+        self.ops = Counter()
+        self.rows: Dict[str, str] = {}  # screen -> selected device
+
+    def add_row(self, screen: str, devices: List[str]) -> None:
+        self.ops["widgets_created"] += ROW_WIDGETS
+        self.rows[screen] = ""
+
+    def remove_row(self, screen: str) -> None:
+        self.ops["widgets_destroyed"] += ROW_WIDGETS
+        del self.rows[screen]
+
+    def place_rows(self, screens: Tuple[str, ...]) -> None:
+        self.ops["rows_placed"] += len(screens)
+
+    def set_devices(self, devices: List[str], mappings: Dict[str, str]) -> None:
+        self.ops["dropdowns_updated"] += len(self.rows)
+
+    def set_mapping(self, screen: str, device: str) -> None:
+        self.ops["selections_set"] += 1
+        self.rows[screen] = device
+
+
+class BenchEngine:
+    """The parts of RoutingEngine the window reads, over the installed simulated backends."""
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.config_store = ConfigStore(mapping)
+        self.screens = WindowUtils.detect_screens()
+
+    @property
+    def config(self):
+        return self.config_store.current
+
+    @property
+    def endpoints(self) -> Dict[str, str]:
+        return AudioService.get_active_endpoints()
+
+    def refresh_devices(self):
+        AudioService.refresh_devices()
+        self.screens = WindowUtils.detect_screens()
+        return self.config
+
+
+def _scenario(screens: int, devices: int, enum_ms: float) -> Tuple[Scenario, BenchEngine]:
+    scenario = Scenario(screens=screens, windows=0, devices=devices,
+                        audio_latencies={"enumerate_output_devices": enum_ms / 1000},
+                        window_latencies={"enum_monitors": enum_ms / 5000}).install()
+    return scenario, BenchEngine(scenario.config())
+
+
+def rebuild(screens: int, devices: int, enum_ms: float = ENUM_MS) -> Dict[str, float]:
+    """The previous Refresh: destroy every row, enumerate on the Tk thread and create every row again."""
+    _, engine = _scenario(screens, devices, enum_ms)
+    view = CountingView()
+    ScreenListModel(view).update(read_view_state(engine))
+    view.ops.clear()
+    started = time.perf_counter()
+    for screen in list(view.rows):
+        view.remove_row(screen)
+    model = ScreenListModel(view)
+    model.update(read_view_state(engine, rescan=True))
+    results = {"tk_blocked_ms": round((time.perf_counter() - started) * 1000, 3)}
+    results.update({op: view.ops[op] for op in OPS})
+    return results
+
+
+def incremental(screens: int, devices: int, enum_ms: float = ENUM_MS) -> Dict[str, Dict[str, float]]:
+    """Refresh with nothing changed, a device plugged in and a monitor attached, reading in the background."""
+    scenario, engine = _scenario(screens, devices, enum_ms)
+    view = CountingView()
+    model = ScreenListModel(view)
+    model.update(read_view_state(engine))
+    posted = queue.Queue()  # stands in for root.after: the main thread plays the Tk thread
+    refresher = ViewRefresher(lambda rescan: read_view_state(engine, rescan), lambda *args: posted.put(args))
+    refresher.start()
+    AudioService.get_registry().add_listener(lambda device_id: refresher.request())
+    WindowUtils.get_topology().add_listener(lambda changed: refresher.request())
+
+    def plug_device():
+        scenario.audio_backend.add_endpoint("{0.0.0.00000000}.{plugged}", "Plugged")
+
+    def attach_monitor():
+        scenario.window_backend.add_monitor((screens * SCREEN_WIDTH, 0, (screens + 1) * SCREEN_WIDTH, SCREEN_HEIGHT))
+        engine.screens = WindowUtils.detect_screens()  # a sweep would find it; the topology listener fires
+
+    changes = {"unchanged": lambda: refresher.request(rescan=True), "device_added": plug_device,
+               "monitor_added": attach_monitor}
+    results = {}
+    for name, change in changes.items():
+        view.ops.clear()
+        started = time.perf_counter()
+        change()
+        blocked, done = 0.0, started
+        # Notifications may queue more than one read; the refresh is done once the view shows the latest state.
+        while True:
+            try:
+                state, _ = posted.get(timeout=TIMEOUT if not blocked else 0.05)
+            except queue.Empty:
+                break
+            applied = time.perf_counter()
+            model.update(state)
+            blocked += time.perf_counter() - applied
+            done = applied
+        results[name] = {"refresh_ms": round((done - started) * 1000, 3), "tk_blocked_us": round(blocked * 1e6, 3)}
+        results[name].update({op: view.ops[op] for op in OPS})
+    refresher.stop()
+    return results
+
+
+def run(screens: int = 12, devices: int = 48, enum_ms: float = ENUM_MS) -> Dict[str, object]:
+    return {"rebuild": rebuild(screens, devices, enum_ms), "incremental": incremental(screens, devices, enum_ms)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--screens", type=int, default=12)
+    parser.add_argument("--devices", type=int, default=48)
+    parser.add_argument("--enum-ms", type=float, default=ENUM_MS,
+                        help="milliseconds the simulated backends take to enumerate devices")
+    args = parser.parse_args()
+    print(json.dumps(run(args.screens, args.devices, args.enum_ms), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+# src/benchmarks/replay.py
+"""Replay a routing trace recorded with main.py --trace through the routing logic on simulated backends.
+
+The replay runs on a virtual clock that follows the trace's timestamps, so its decisions are the same at any
+speed; --speed only paces it against the wall clock (0, the default, replays as fast as possible). The routes
+it issues are diffed against the recorded ones.
+
+Run from src/: python -m benchmarks.replay trace.jsonl --speed 10
+"""
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from audio.audio_service import AudioService
+from audio.backend import SimulatedAudioBackend
+from config.rules import NO_RULES, parse_rules
+from config.settings import ConfigSnapshot
+from services.dwell import DWELL_MS, DwellPolicy
+from services.events import WindowEvent
+from services.monitor_service import _handle_events
+from services.processes import SimulatedProcessTable
+from services.reconciler import Reconciler
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from services.trace import load_trace
+from window.backend import SimulatedWindowBackend
+from window.window_utils import WindowUtils
+
+MAX_CYCLES_PER_STEP = 10000  # guards against a replay that stops advancing
+DETAILS = 20  # differences listed in the report
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class TraceReplayer:
+    """Rebuilds the recorded desktop on simulated backends and drives the monitor cycle through it."""
+
+    def __init__(self, records: List[list], dwell_ms: float = DWELL_MS):
+        self.records = records
+        self.now = 0.0
+        self.window_backend = SimulatedWindowBackend()
+        self.audio_backend = SimulatedAudioBackend()
+        self.processes = SimulatedProcessTable()
+        WindowUtils.set_backend(self.window_backend)
+        AudioService.set_backend(self.audio_backend)
+        self.config = ConfigSnapshot({}, 0)
+        self.dwell = DwellPolicy(dwell_ms)
+        self.route_queue = RouteQueue(AppliedRoutes(self.processes), clock=self.clock)
+        # Sweeps run where the recording swept, so windows are read in the state the recording saw them in.
+        self.reconciler = Reconciler(WindowUtils.get_window_index(), self.route_queue, sweep_interval=float("inf"),
+                                     dwell=self.dwell, clock=self.clock)
+        self.route_queue.add_listener(self._on_route)
+        self._monitors: Dict[int, int] = {}  # recorded hmonitor -> simulated one
+        self._windows: Dict[int, int] = {}  # recorded hwnd -> simulated one
+        self.routes: List[Tuple[float, int, str]] = []
+        self.latencies: List[float] = []
+        self.cycle_times: List[float] = []
+        self.events = 0
+        self.errors = 0
+
+    def clock(self) -> float:
+        return self.now
+
+    def _on_route(self, pid: int, device_id: str) -> None:
+        self.routes.append((self.now, pid, device_id))
+
+    def _cycle(self, events: List[WindowEvent] = ()) -> None:
+        started = time.perf_counter()
+        try:
+            for pid, device_id, timestamp in _handle_events(list(events), self.config, self.dwell, self.reconciler,
+                                                            self.now):
+                self.latencies.append((self.now - timestamp) * 1000)
+        except Exception:
+            self.errors += 1  # the monitor loop logs and carries on, e.g. when a window closed under it
+        self.cycle_times.append(time.perf_counter() - started)
+
+    def _advance(self, to: float) -> None:
+        """Run the cycles the monitor loop would have woken up for until the virtual time to."""
+        for _ in range(MAX_CYCLES_PER_STEP):
+            until = self.reconciler.time_until_due()
+            dwell_due = self.dwell.time_until_due(self.now)
+            if dwell_due is not None:
+                until = min(until, dwell_due)
+            if self.now + until > to:
+                break
+            self.now += until
+            self._cycle()
+        self.now = max(self.now, to)
+
+    def _monitors_changed(self, monitors: List[list]) -> None:
+        recorded = {hmonitor: (device_name, tuple(rect)) for hmonitor, device_name, rect in monitors}
+        for hmonitor in [hmonitor for hmonitor in self._monitors if hmonitor not in recorded]:
+            self.window_backend.remove_monitor(self._monitors.pop(hmonitor))
+        for hmonitor, (device_name, rect) in recorded.items():
+            simulated = self._monitors.get(hmonitor)
+            if simulated is None:
+                self._monitors[hmonitor] = self.window_backend.add_monitor(rect, device_name)
+            else:
+                self.window_backend.monitors[simulated] = (device_name, rect)
+
+    def _endpoints_changed(self, endpoints: List[list]) -> None:
+        backend = self.audio_backend
+        recorded = dict(endpoints)
+        for device_id, endpoint in list(backend.endpoints.items()):
+            if endpoint["active"] and device_id not in recorded:
+                backend.set_state(device_id, False)
+        for device_id, name in recorded.items():
+            endpoint = backend.endpoints.get(device_id)
+            if endpoint is None:
+                backend.add_endpoint(device_id, name)
+                continue
+            if not endpoint["active"]:
+                backend.set_state(device_id, True)
+            if endpoint["name"] != name:
+                backend.rename(device_id, name)
+
+    def _window(self, hwnd: int, pid: int, hmonitor: Optional[int], title: str) -> None:
+        monitor = self._monitors.get(hmonitor) or next(iter(self.window_backend.monitors))
+        simulated = self._windows.get(hwnd)
+        if simulated is not None and self.window_backend.windows.get(simulated, {}).get("pid") != pid:
+            self.window_backend.close_window(simulated)  # the handle was reused by another process
+            simulated = None
+        if simulated is None:
+            self._windows[hwnd] = self.window_backend.add_window(pid, monitor, title=title)
+        else:
+            self.window_backend.move_window(simulated, monitor)
+            self.window_backend.windows[simulated]["title"] = title
+
+    def _apply(self, kind: str, fields: list) -> None:
+        """Apply one record to the simulated desktop, running a cycle where the monitor loop ran one."""
+        if kind == "monitors":
+            self._monitors_changed(fields[0])
+        elif kind == "endpoints":
+            self._endpoints_changed(fields[0])
+            self.reconciler.devices_changed()
+        elif kind == "config":
+            mapping, endpoints, rules, layout = fields
+            layout_changed = self.config.version and layout != self.config.layout
+            self.config = ConfigSnapshot(mapping, self.config.version + 1,
+                                         parse_rules(rules) if rules else NO_RULES, endpoints, layout)
+            if layout_changed:
+                self.reconciler.layout_changed(self.config)
+            else:
+                self.reconciler.apply_config(self.config)
+        elif kind == "applied":
+            for pid, device_id in fields[0]:
+                if pid in self.processes.processes:
+                    self.route_queue.applied[pid] = device_id
+                    self.audio_backend.routes[pid] = device_id
+        elif kind == "process":
+            pid, parent, name = fields
+            if pid not in self.processes.processes:
+                self.processes.spawn(pid, name, parent)
+        elif kind == "window":
+            self._window(*fields)
+        elif kind == "closed":
+            simulated = self._windows.pop(fields[0], None)
+            if simulated is not None:
+                self.window_backend.close_window(simulated)
+        elif kind == "sweep":
+            self.reconciler.request_sweep()
+        elif kind == "session":
+            pid, device_id = fields
+            if pid not in self.audio_backend.sessions:
+                if device_id not in self.audio_backend.endpoints:
+                    device_id = self.audio_backend.routes.get(pid)
+                self.audio_backend.start_session(pid, device_id, name=self.processes.name(pid))
+            return
+        elif kind == "events":
+            events = [WindowEvent(event_kind, self._windows.get(hwnd, hwnd), self.now)
+                      for event_kind, hwnd in fields[0]]
+            hwnd = events[-1].hwnd
+            if hwnd in self.window_backend.windows:
+                self.window_backend.set_foreground(hwnd)
+            self.events += len(events)
+            self._cycle(events)
+            return
+        else:
+            return  # routes are what the replay is compared against; unknown kinds come from newer recorders
+        if kind in ("endpoints", "config", "sweep"):
+            self._cycle()
+
+    def run(self, speed: float = 0.0) -> Dict[str, object]:
+        """Replay every record and return the decisions, latencies and differences from the recorded routes."""
+        started = time.perf_counter()
+        recorded: List[Tuple[float, int, str]] = []
+        for at_ms, kind, *fields in self.records:
+            at = at_ms / 1000
+            if speed:
+                delay = started + at / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            self._advance(at)
+            if kind == "route":
+                recorded.append((at, fields[0], fields[1]))
+            else:
+                self._apply(kind, fields)
+        if self.records:
+            self._advance(self.records[-1][0] / 1000 + 1.0)  # let held and batched routes complete
+        report = diff_routes(recorded, self.routes)
+        report.update({
+            "records": len(self.records),
+            "events": self.events,
+            "cycles": len(self.cycle_times),
+            "errors": self.errors,
+            "latency_p50_ms": round(_percentile(self.latencies, 0.5), 3) if self.latencies else None,
+            "latency_p95_ms": round(_percentile(self.latencies, 0.95), 3) if self.latencies else None,
+            "latency_max_ms": round(max(self.latencies), 3) if self.latencies else None,
+            "cycle_mean_us": round(statistics.mean(self.cycle_times) * 1e6, 3) if self.cycle_times else None,
+            "cycle_max_us": round(max(self.cycle_times) * 1e6, 3) if self.cycle_times else None,
+            "wall_ms": round((time.perf_counter() - started) * 1000, 3),
+        })
+        return report
+
+
+def diff_routes(recorded: List[Tuple[float, int, str]], replayed: List[Tuple[float, int, str]]) -> Dict[str, object]:
+    """Compare the routes of each pid in order; return counts, time drift of matching routes and the differences."""
+    by_pid = defaultdict(lambda: ([], []))
+    for at, pid, device_id in recorded:
+        by_pid[pid][0].append((at, device_id))
+    for at, pid, device_id in replayed:
+        by_pid[pid][1].append((at, device_id))
+    drift, differences = [], []
+    matched = mismatched = missing = extra = final = 0
+    for pid, (before, after) in by_pid.items():
+        for (at_before, before_device), (at_after, after_device) in zip(before, after):
+            if before_device == after_device:
+                matched += 1
+                drift.append(abs(at_after - at_before) * 1000)
+            else:
+                mismatched += 1
+                differences.append({"pid": pid, "at_ms": round(at_before * 1000, 1),
+                                    "recorded": before_device, "replayed": after_device})
+        for at, device_id in before[len(after):]:
+            missing += 1
+            differences.append({"pid": pid, "at_ms": round(at * 1000, 1), "recorded": device_id, "replayed": None})
+        for at, device_id in after[len(before):]:
+            extra += 1
+            differences.append({"pid": pid, "at_ms": round(at * 1000, 1), "recorded": None, "replayed": device_id})
+        if (before[-1][1] if before else None) != (after[-1][1] if after else None):
+            final += 1
+    differences.sort(key=lambda difference: difference["at_ms"])
+    return {
+        "routes_recorded": len(recorded),
+        "routes_replayed": len(replayed),
+        "matched": matched,
+        "mismatched": mismatched,
+        "missing": missing,
+        "extra": extra,
+        "final_mismatches": final,
+        "drift_mean_ms": round(statistics.mean(drift), 3) if drift else None,
+        "drift_max_ms": round(max(drift), 3) if drift else None,
+        "differences": differences[:DETAILS],
+    }
+
+
+def replay(path, speed: float = 0.0, dwell_ms: Optional[float] = None) -> Dict[str, object]:
+    """Replay the trace at path, with the dwell time it was recorded with unless dwell_ms is given."""
+    header, records = load_trace(path)
+    if dwell_ms is None:
+        dwell_ms = header.get("dwell_ms", DWELL_MS)
+    return TraceReplayer(records, dwell_ms).run(speed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("trace", help="a trace written by main.py --trace")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="replay this many times faster than recorded (default: 0, as fast as possible)")
+    parser.add_argument("--dwell-ms", type=float, help="dwell time to replay with (default: the recorded one)")
+    args = parser.parse_args()
+    print(json.dumps(replay(args.trace, args.speed, args.dwell_ms), indent=4))
+
+
+if __name__ == "__main__":
+    main()
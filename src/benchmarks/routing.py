@@ -0,0 +1,80 @@
+# src/benchmarks/routing.py
+"""Routing throughput through the COM executor: one route per call against a background batch per call.
+
+Routes go to a MemoryRoutingBackend standing in for AudioDLL.dll, which spins for --route-us on every route, as
+the native call would; the batch only saves the round trips to the executor thread.
+
+Run from src/: python -m benchmarks.routing --pids 64 --batch 8 --route-us 20
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+from audio.backend import SimulatedAudioBackend
+from audio.com_executor import ExecutorAudioBackend
+from audio.routing import E_NOTFOUND, MemoryRoutingBackend, RoutingBackend
+
+DEVICE_ID = "{0.0.0.00000000}.{device-0}"
+ROUTE_US = 20.0
+ROUNDS = 20
+
+
+class RoutedBackend(SimulatedAudioBackend):
+    """Simulated backend that routes through a RoutingBackend, as PycawAudioBackend does."""
+
+    def __init__(self, routing: RoutingBackend):
+        super().__init__(notifications=False)
+        self.routing = routing
+        self.add_endpoint(DEVICE_ID, "Speakers")
+
+    def set_application_endpoint(self, pid: int, device_id: str) -> bool:
+        return self.routing.set_endpoint(pid, device_id).ok
+
+    def set_application_endpoints(self, pids: List[int], device_id: str) -> Dict[int, bool]:
+        return {result.pid: result.ok for result in self.routing.set_endpoints(pids, device_id)}
+
+
+def measure(pids: int, batch: int, route_us: float, batched: bool, rounds: int = ROUNDS) -> Dict[str, float]:
+    """Microseconds per route of routing pids processes, one in eight of which has no session, rounds times."""
+    routing = MemoryRoutingBackend({pid: E_NOTFOUND for pid in range(1, pids + 1, 8)}, route_us / 1e6)
+    wrapped = ExecutorAudioBackend(RoutedBackend(routing))
+    all_pids = list(range(1, pids + 1))
+    failed = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        if batched:
+            for i in range(0, pids, batch):
+                results = wrapped.set_application_endpoints(all_pids[i:i + batch], DEVICE_ID)
+                failed += sum(not ok for ok in results.values())
+        else:
+            for pid in all_pids:
+                failed += not wrapped.set_application_endpoint(pid, DEVICE_ID)
+    elapsed = time.perf_counter() - started
+    executor_calls = wrapped.executor.stats()["executed"]
+    wrapped.executor.stop()
+    return {
+        "route_us": round(elapsed / (rounds * pids) * 1e6, 3),
+        "executor_calls": executor_calls,
+        "pids_routed": len(routing.routes),
+        "failed": failed,
+    }
+
+
+def run(pids: int = 64, batch: int = 8, route_us: float = ROUTE_US) -> Dict[str, Dict[str, float]]:
+    return {"per_call": measure(pids, batch, route_us, batched=False),
+            "batched": measure(pids, batch, route_us, batched=True)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pids", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=8, help="routes per batch, as the reconciler's BATCH_SIZE")
+    parser.add_argument("--route-us", type=float, default=ROUTE_US,
+                        help="microseconds the stand-in spends on each route")
+    args = parser.parse_args()
+    print(json.dumps(run(args.pids, args.batch, args.route_us), indent=4))
+
+
+if __name__ == "__main__":
+    main()
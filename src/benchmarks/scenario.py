@@ -0,0 +1,96 @@
+# src/benchmarks/scenario.py
+"""Simulated desktops for the benchmarks: monitors, windows, processes, endpoints and audio sessions."""
+from typing import Dict, List, Optional
+
+from audio.audio_service import AudioService
+from audio.backend import SimulatedAudioBackend
+from services.processes import SimulatedProcessTable
+from window.backend import SimulatedWindowBackend
+from window.window_utils import WindowUtils
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+
+
+class Scenario:
+    """One process per window, spread round-robin over the screens; sessions=False leaves processes silent."""
+
+    def __init__(self, screens: int = 2, windows: int = 100, devices: int = 4, sessions: bool = True,
+                 window_latencies: Optional[Dict[str, float]] = None,
+                 audio_latencies: Optional[Dict[str, float]] = None):
+        self.window_backend = SimulatedWindowBackend(window_latencies)
+        self.audio_backend = SimulatedAudioBackend(latencies=audio_latencies)
+        self.processes = SimulatedProcessTable()
+
+        self.monitors: List[int] = [
+            self.window_backend.add_monitor((i * SCREEN_WIDTH, 0, (i + 1) * SCREEN_WIDTH, SCREEN_HEIGHT))
+            for i in range(screens)
+        ]
+        self.device_ids: List[str] = []
+        self.devices: Dict[str, str] = {}  # friendly name -> endpoint ID
+        for i in range(devices):
+            device_id = f"{{0.0.0.00000000}}.{{device-{i}}}"
+            self.audio_backend.add_endpoint(device_id, f"Device {i}")
+            self.device_ids.append(device_id)
+            self.devices[f"Device {i}"] = device_id
+
+        self.hwnds: List[int] = []
+        self.pids: Dict[int, int] = {}  # hwnd -> pid
+        self.audio_pids: Dict[int, int] = {}  # hwnd -> pid playing its audio, where it differs from the window's
+        for i in range(windows):
+            self.add_window(self.monitors[i % screens], session=sessions)
+
+    def add_window(self, monitor: int, session: bool = True) -> int:
+        pid = self.processes.spawn(name=f"app{len(self.hwnds)}.exe")
+        hwnd = self.window_backend.add_window(pid, monitor, title=f"Window {len(self.hwnds)}")
+        if session:
+            self.audio_backend.start_session(pid, name=self.processes.name(pid))
+        self.hwnds.append(hwnd)
+        self.pids[hwnd] = pid
+        return hwnd
+
+    def add_browser(self, monitor: int, name: str = "chrome.exe", renderers: int = 4) -> int:
+        """Add a multi-process app whose window belongs to the root process and whose audio plays in a child.
+
+        The first renderer opens the audio session; the others and a utility process of another executable
+        stay silent.
+        """
+        root = self.processes.spawn(name=name)
+        hwnd = self.window_backend.add_window(root, monitor, title=f"Window {len(self.hwnds)}")
+        self.processes.spawn(name="crashpad_handler.exe", parent=root)
+        for i in range(renderers):
+            child = self.processes.spawn(name=name, parent=root)
+            if i == 0:
+                self.audio_backend.start_session(child, name=name)
+                self.audio_pids[hwnd] = child
+        self.hwnds.append(hwnd)
+        self.pids[hwnd] = root
+        return hwnd
+
+    def install(self) -> "Scenario":
+        """Make WindowUtils and AudioService use this scenario's backends."""
+        WindowUtils.set_backend(self.window_backend)
+        AudioService.set_backend(self.audio_backend)
+        return self
+
+    def config(self, offset: int = 0) -> Dict[str, str]:
+        """Map every screen to a device, shifted by offset so a second config differs on every screen."""
+        return {
+            f"Screen{i + 1}": f"Device {(i + offset) % len(self.device_ids)}"
+            for i in range(len(self.monitors))
+        }
+
+    def expected_routes(self, config: Dict[str, str]) -> Dict[int, str]:
+        """Return the pid -> endpoint ID routes config should produce for the windows as they are placed now."""
+        screens = {hmonitor: f"Screen{i + 1}" for i, hmonitor in enumerate(self.monitors)}
+        routes = {}
+        for hwnd, pid in self.pids.items():
+            window = self.window_backend.windows.get(hwnd)
+            device_id = window and self.devices.get(config.get(screens[window["monitor"]], ""))
+            if device_id:
+                routes[self.audio_pids.get(hwnd, pid)] = device_id
+        return routes
+
+    def reset_calls(self) -> None:
+        self.window_backend.calls.clear()
+        self.audio_backend.calls.clear()
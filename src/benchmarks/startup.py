@@ -0,0 +1,60 @@
+# src/benchmarks/startup.py
+"""Time to first paint and time to first route of the startup pipeline, on simulated backends.
+
+Run from src/: python -m benchmarks.startup --windows 500
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Dict
+
+from benchmarks.scenario import Scenario
+from config.settings import ConfigStore
+from services.events import SyntheticEventSource
+from services.monitor_service import start_monitor
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from services.startup import StartupPipeline
+
+
+def run(windows: int = 200, screens: int = 2, devices: int = 4, timeout: float = 10.0) -> Dict[str, float]:
+    """Run one simulated startup and return the pipeline timings in milliseconds."""
+    scenario = Scenario(screens, windows, devices).install()
+
+    pipeline = StartupPipeline()
+    snapshot = pipeline.take_snapshot()
+    device_names = list(snapshot.devices)
+    config = {screen["name"]: device_names[i % len(device_names)] for i, screen in enumerate(snapshot.screens)}
+
+    config_store = ConfigStore(config)
+    route_queue = RouteQueue(AppliedRoutes(scenario.processes))
+    pipeline.watch_routes(route_queue)
+    pipeline.mark("first_paint")  # headless: this is where the window would be shown
+
+    stop_event = threading.Event()
+    monitor_thread = start_monitor(config_store, route_queue, stop_event, SyntheticEventSource())
+    volumes_thread = pipeline.read_volumes(list(snapshot.devices.values()), lambda volumes: None)
+
+    deadline = time.monotonic() + timeout
+    while len(route_queue.applied) < windows and time.monotonic() < deadline:
+        time.sleep(0.001)
+    pipeline.mark("all_routed")
+
+    stop_event.set()
+    monitor_thread.join()
+    volumes_thread.join()
+    return {name: round(seconds * 1000, 3) for name, seconds in pipeline.timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, default=200)
+    parser.add_argument("--screens", type=int, default=2)
+    parser.add_argument("--devices", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.windows, args.screens, args.devices), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,614 @@
+# src/benchmarks/suite.py
+"""Benchmark suite for the routing hot path on simulated backends, with a JSON baseline to compare against.
+
+Run from src/:
+    python -m benchmarks.suite                      # print results
+    python -m benchmarks.suite --save baseline.json # store a new baseline
+    python -m benchmarks.suite --compare benchmarks/baseline.json
+"""
+import argparse
+import gc
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from audio.audio_service import TOGGLE, AudioService
+from benchmarks import com, dwell, gui, replay, routing, startup
+from benchmarks.scenario import Scenario
+from config.rules import RULES_VERSION, RuleSet, parse_rules
+from config.settings import ConfigSnapshot, ConfigStore, LayoutProfile
+from services.events import SyntheticEventSource
+from services.helpers import get_pid_mapping
+from services.metrics import Metrics
+from services.monitor_service import start_monitor
+from services.process_tree import ProcessTree
+from services.route_journal import RouteJournal
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from services.rule_matcher import RuleMatcher
+from services.trace import TraceRecorder
+from window.monitor_topology import layout_fingerprint
+from window.window_utils import WindowUtils
+
+TOLERANCE = 0.5  # relative slowdown of a timing reported as a regression; simulated timings are noisy
+NOISE = {"_ms": 0.5, "_us": 5.0}  # absolute slowdowns below these are never reported
+TIMEOUT = 10.0
+ROUNDS = 3  # timings are the best of this many rounds, to keep scheduler noise out of the baseline
+
+
+def _mean_us(func: Callable[[], object], repeat: int) -> float:
+    """Return the mean microseconds per call of the fastest of ROUNDS rounds of repeat calls."""
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / repeat * 1e6, 3)
+
+
+class MonitorHarness:
+    """Runs the monitor loop over a scenario with a synthetic event source and waits for the initial routes."""
+
+    def __init__(self, scenario: Scenario, config: Dict[str, str], applied: Optional[AppliedRoutes] = None,
+                 endpoints: Optional[Dict[str, str]] = None, recorder: Optional[TraceRecorder] = None,
+                 profiles: Optional[Dict[str, LayoutProfile]] = None):
+        self.scenario = scenario
+        if profiles is None:
+            self.config_store = ConfigStore(config, endpoints=endpoints)
+        else:
+            # Wired like RoutingEngine: a topology change swaps in the profile of the new layout.
+            topology = WindowUtils.get_topology()
+            topology.rebuild()
+            self.config_store = ConfigStore(config, endpoints=endpoints, layout=topology.fingerprint,
+                                            profiles=profiles)
+            topology.add_listener(lambda screens: self.config_store.switch_layout(layout_fingerprint(screens)))
+        self.route_queue = RouteQueue(AppliedRoutes(scenario.processes) if applied is None else applied)
+        if recorder is not None:
+            self.route_queue.add_listener(recorder.route)
+            self.route_queue.session_index.add_listener(recorder.session)
+            recorder.start(self.config_store.current, self.route_queue.applied.items(), dwell_ms=0)
+        self.source = SyntheticEventSource()
+        self.stop_event = threading.Event()
+        self._routed = threading.Condition()
+        self._waiting: Dict[int, str] = {}
+        self.route_queue.add_listener(self._on_route)
+        # Routes are committed at once, so the latencies measure routing rather than the dwell time.
+        self.thread = start_monitor(self.config_store, self.route_queue, self.stop_event, self.source, dwell_ms=0,
+                                    recorder=recorder)
+
+    def _on_route(self, pid: int, device_id: str) -> None:
+        with self._routed:
+            if self._waiting.get(pid) == device_id:
+                del self._waiting[pid]
+                if not self._waiting:
+                    self._routed.notify_all()
+
+    def wait_routed(self, expected: Dict[int, str], timeout: float = TIMEOUT) -> bool:
+        """Wait until every pid in expected is routed to its device."""
+        applied = self.route_queue.applied
+        with self._routed:
+            self._waiting = {pid: device_id for pid, device_id in expected.items() if applied.get(pid) != device_id}
+            if self._waiting:
+                self._routed.wait_for(lambda: not self._waiting, timeout)
+            complete = not self._waiting
+            self._waiting = {}
+        return complete
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        self.thread.join()
+
+
+def bench_focus_route(windows: int = 200, switches: int = 50) -> Dict[str, float]:
+    """Latency from a window moving to another screen and gaining focus until its process is re-routed."""
+    scenario = Scenario(screens=2, windows=windows).install()
+    config = scenario.config()
+    harness = MonitorHarness(scenario, config)
+    harness.wait_routed(scenario.expected_routes(config))
+    scenario.reset_calls()
+
+    latencies: List[float] = []
+    for i in range(switches):
+        hwnd = scenario.hwnds[i % windows]
+        pid = scenario.pids[hwnd]
+        monitor = scenario.window_backend.windows[hwnd]["monitor"]
+        target = scenario.monitors[1] if monitor == scenario.monitors[0] else scenario.monitors[0]
+        scenario.window_backend.move_window(hwnd, target)
+        scenario.window_backend.set_foreground(hwnd)
+        started = time.perf_counter()
+        harness.source.emit(hwnd)
+        harness.wait_routed({pid: scenario.expected_routes(config)[pid]})
+        latencies.append((time.perf_counter() - started) * 1000)
+    harness.stop()
+
+    latencies.sort()
+    return {
+        "median_ms": round(statistics.median(latencies), 3),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1], 3),
+        "max_ms": round(latencies[-1], 3),
+        "window_calls_per_switch": round(sum(scenario.window_backend.calls.values()) / switches, 1),
+        "audio_calls_per_switch": round(sum(scenario.audio_backend.calls.values()) / switches, 1),
+    }
+
+
+def bench_screen_pids(sizes=(100, 1000, 5000), repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Cost of a full get_screen_pids and get_pid_mapping pass as the number of windows grows."""
+    results = {}
+    for size in sizes:
+        scenario = Scenario(screens=3, windows=size).install()
+        config = scenario.config()
+        scenario.reset_calls()
+        screen_pids_us = _mean_us(WindowUtils.get_screen_pids, repeat)
+        window_calls = sum(scenario.window_backend.calls.values()) / (repeat * ROUNDS)
+        pid_mapping_us = _mean_us(lambda: get_pid_mapping(config), repeat)
+        results[f"windows_{size}"] = {
+            "get_screen_pids_ms": round(screen_pids_us / 1000, 3),
+            "get_pid_mapping_ms": round(pid_mapping_us / 1000, 3),
+            "window_calls": round(window_calls, 1),
+        }
+    return results
+
+
+def bench_audio_service(repeat: int = 2000) -> Dict[str, float]:
+    """Per-call cost of the AudioService entry points once their caches are warm."""
+    scenario = Scenario(screens=1, windows=1).install()
+    device_id = scenario.device_ids[0]
+    pid = scenario.pids[scenario.hwnds[0]]
+    AudioService.get_all_output_devices()
+    AudioService.get_device_volume(device_id)
+    scenario.reset_calls()
+
+    results = {
+        "get_all_output_devices_us": _mean_us(AudioService.get_all_output_devices, repeat),
+        "validate_device_id_us": _mean_us(lambda: AudioService.validate_device_id(device_id), repeat),
+        "get_device_volume_us": _mean_us(lambda: AudioService.get_device_volume(device_id), repeat),
+        "set_device_volume_us": _mean_us(lambda: AudioService.set_device_volume(device_id, 50), repeat),
+        "adjust_device_volume_us": _mean_us(lambda: AudioService.adjust_device_volume(device_id, 0), repeat),
+        "set_application_output_device_us": _mean_us(
+            lambda: AudioService.set_application_output_device(pid, device_id), repeat),
+    }
+    calls = scenario.audio_backend.calls
+    results["enumerations"] = calls["enumerate_output_devices"]
+    results["volume_activations"] = calls["activate_endpoint_volume"]
+    return results
+
+
+def _apply_once(windows: int) -> Dict[str, float]:
+    scenario = Scenario(screens=2, windows=windows).install()
+    harness = MonitorHarness(scenario, scenario.config())
+    harness.wait_routed(scenario.expected_routes(scenario.config()))
+    scenario.reset_calls()
+
+    new_config = scenario.config(offset=1)
+    expected = scenario.expected_routes(new_config)
+    started = time.perf_counter()
+    harness.config_store.publish(new_config)
+    complete = harness.wait_routed(expected)
+    elapsed = time.perf_counter() - started
+    harness.stop()
+    return {
+        "apply_ms": round(elapsed * 1000, 3),
+        "complete": complete,
+        "routes_issued": scenario.audio_backend.calls["set_application_endpoint"],
+        "window_calls": sum(scenario.window_backend.calls.values()),
+    }
+
+
+def bench_apply(windows: int = 500) -> Dict[str, float]:
+    """Time from publishing a config that changes every screen until every window's process is re-routed."""
+    runs = [_apply_once(windows) for _ in range(ROUNDS)]
+    return min(runs, key=lambda result: result["apply_ms"])
+
+
+def bench_startup(windows: int = 500, repeat: int = ROUNDS) -> Dict[str, float]:
+    """Best startup pipeline timings over repeat runs, see benchmarks.startup."""
+    runs = [startup.run(windows=windows) for _ in range(repeat)]
+    # The background volume read races the initial routing burst, so its timing is too noisy to compare.
+    names = [name for name in runs[0] if name != "volumes"]
+    return {f"{name}_ms": min(timings[name] for timings in runs) for name in names}
+
+
+def bench_sessions(windows: int = 1000, batch: int = 50, repeat: int = 200) -> Dict[str, float]:
+    """Cost of mute toggles and per-device session listing served from the session index."""
+    scenario = Scenario(screens=2, windows=windows).install()
+    names = [scenario.processes.name(scenario.pids[hwnd]) for hwnd in scenario.hwnds[:batch]]
+    AudioService.set_processes_mute(names, TOGGLE)  # names are resolved once, on the first lookup by name
+    scenario.reset_calls()
+    results = {
+        "toggle_us": _mean_us(lambda: AudioService.set_processes_mute(names[:1], TOGGLE), repeat),
+        f"toggle_{batch}_us": _mean_us(lambda: AudioService.set_processes_mute(names, TOGGLE), repeat),
+        "list_device_us": _mean_us(lambda: AudioService.list_sessions(scenario.device_ids[0]), repeat),
+    }
+    calls = scenario.audio_backend.calls
+    results["audio_calls_per_toggle"] = round(calls["set_session_mute"] / (repeat * ROUNDS * 2), 1)
+    results["enumerations"] = calls["list_sessions"] + calls["get_process_name"]
+    return results
+
+
+def _rules_section(count: int) -> dict:
+    """count rules, alternating exact executable names and title patterns, none matching a Scenario window."""
+    rules = []
+    for i in range(count):
+        if i % 2:
+            rules.append({"title": f"*Meeting {i}*", "device": "Device 1"})
+        else:
+            rules.append({"exe": f"tool{i}.exe", "device": "Device 1"})
+    return {"version": RULES_VERSION, "rules": rules}
+
+
+def bench_rules(count: int = 500, windows: int = 1000, repeat: int = 5) -> Dict[str, float]:
+    """Cost of compiling and evaluating hundreds of rules, per lookup and over a full sweep."""
+    section = _rules_section(count)
+    rules: RuleSet = parse_rules(section)
+    scenario = Scenario(screens=3, windows=windows).install()
+    config = ConfigSnapshot(scenario.config(), 1, rules)
+    index = WindowUtils.get_window_index()
+    index.rebuild()
+    pid = scenario.pids[scenario.hwnds[0]]
+    matcher = RuleMatcher(scenario.processes)
+    matcher.match(rules, pid, "Window 0")
+
+    results = {
+        "compile_ms": round(_mean_us(lambda: parse_rules(section), repeat) / 1000, 3),
+        "match_exact_us": _mean_us(lambda: rules.match("tool0.exe", "Window 0"), 2000),
+        "match_miss_us": _mean_us(lambda: rules.match("app0.exe", "Window 0"), 2000),
+        "memo_hit_us": _mean_us(lambda: matcher.match(rules, pid, "Window 0"), 20000),
+        "pid_mapping_cold_ms": round(_mean_us(
+            lambda: get_pid_mapping(config, index, RuleMatcher(scenario.processes)), repeat) / 1000, 3),
+    }
+    scenario.reset_calls()
+    results["pid_mapping_warm_ms"] = round(_mean_us(lambda: get_pid_mapping(config, index, matcher), repeat) / 1000, 3)
+    results["window_calls"] = round(sum(scenario.window_backend.calls.values()) / (repeat * ROUNDS), 1)
+    return results
+
+
+def bench_process_tree(processes: int = 2000, browsers: int = 10, churn: int = 20,
+                       repeat: int = 2000) -> Dict[str, float]:
+    """Cost of resolving the audio processes of multi-process apps, and routing them on focus and on a sweep."""
+    scenario = Scenario(screens=2, windows=processes).install()
+    hwnds = [scenario.add_browser(scenario.monitors[i % 2]) for i in range(browsers)]
+    table = scenario.processes
+    root = scenario.pids[hwnds[0]]
+
+    tree = ProcessTree(table)
+    started = time.perf_counter()
+    tree.refresh()
+    results = {"load_ms": round((time.perf_counter() - started) * 1000, 3)}
+    results["family_us"] = _mean_us(lambda: tree.family(root), repeat)
+    for pid in sorted(table.processes)[:churn]:
+        table.exit(pid)
+    for _ in range(churn):
+        table.spawn()
+    table.calls.clear()
+    results["refresh_us"] = _mean_us(tree.refresh, repeat)
+    results["table_calls_per_spawn"] = round((sum(table.calls.values()) - repeat * ROUNDS) / churn, 1)
+
+    config = scenario.config()
+    harness = MonitorHarness(scenario, config)
+    results["swept"] = harness.wait_routed(scenario.expected_routes(config))
+    latencies = []
+    for hwnd in hwnds:
+        monitor = scenario.window_backend.windows[hwnd]["monitor"]
+        target = scenario.monitors[1] if monitor == scenario.monitors[0] else scenario.monitors[0]
+        scenario.window_backend.move_window(hwnd, target)
+        scenario.window_backend.set_foreground(hwnd)
+        started = time.perf_counter()
+        harness.source.emit(hwnd)
+        audio_pid = scenario.audio_pids[hwnd]
+        if not harness.wait_routed({audio_pid: scenario.expected_routes(config)[audio_pid]}):
+            results["focused"] = False
+        latencies.append((time.perf_counter() - started) * 1000)
+    harness.stop()
+    results.setdefault("focused", True)
+    results["focus_median_ms"] = round(statistics.median(latencies), 3)
+    return results
+
+
+def _restart_once(harness: MonitorHarness, path: str) -> Dict[str, float]:
+    scenario = harness.scenario
+    config = harness.config_store.current
+    harness.stop()
+    harness.route_queue.applied.journal.stop()
+
+    started = time.perf_counter()
+    journal = RouteJournal(path)
+    applied = AppliedRoutes(scenario.processes, journal=journal)
+    restored = applied.restore(journal.load())
+    restore_ms = (time.perf_counter() - started) * 1000
+    journal.start()
+    scenario.reset_calls()
+    started = time.perf_counter()
+    harness = MonitorHarness(scenario, config, applied)
+    complete = harness.wait_routed(scenario.expected_routes(config))
+    return {"harness": harness, "restore_ms": restore_ms, "restored": restored, "complete": complete,
+            "routed_ms": (time.perf_counter() - started) * 1000,
+            "routes_issued": scenario.audio_backend.calls["set_application_endpoint"]}
+
+
+def bench_journal(windows: int = 500, changed: int = 20, repeat: int = 20000) -> Dict[str, float]:
+    """Routes re-issued by a warm restart from the route journal, and the cost of journaling a route."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "routes.jsonl")
+        scenario = Scenario(screens=2, windows=windows).install()
+        config = scenario.config()
+        journal = RouteJournal(path)
+        journal.start()
+        harness = MonitorHarness(scenario, config, AppliedRoutes(scenario.processes, journal=journal))
+        harness.wait_routed(scenario.expected_routes(config))
+
+        # Restart with nothing changed, then with some windows moved and some processes gone.
+        unchanged = _restart_once(harness, path)
+        for hwnd in scenario.hwnds[:changed]:
+            scenario.window_backend.move_window(hwnd, scenario.monitors[1] if scenario.window_backend.windows[hwnd][
+                "monitor"] == scenario.monitors[0] else scenario.monitors[0])
+        for hwnd in scenario.hwnds[changed:2 * changed]:
+            scenario.window_backend.close_window(hwnd)
+            scenario.processes.exit(scenario.pids.pop(hwnd))
+        moved = _restart_once(unchanged["harness"], path)
+        moved["harness"].stop()
+        journal = moved["harness"].route_queue.applied.journal
+        journal.stop()
+        records = journal.stats()["records"]
+
+        idle = RouteJournal(os.path.join(directory, "idle.jsonl"))  # never flushed, only the queueing is timed
+        record_us = _mean_us(lambda: idle.record((1234, 1.5), "{device}"), repeat)
+    return {
+        "restore_ms": round(min(unchanged["restore_ms"], moved["restore_ms"]), 3),
+        "restored": unchanged["restored"],
+        "complete": unchanged["complete"] and moved["complete"],
+        "unchanged_routes_issued": unchanged["routes_issued"],
+        "changed_routes_issued": moved["routes_issued"],
+        "journal_records": records,
+        "record_us": record_us,
+    }
+
+
+def bench_dwell(repeat: int = 20000) -> Dict[str, float]:
+    """Routes issued by the scripted timelines of benchmarks.dwell, and the per-event cost of the dwell policy."""
+    results = {}
+    for name, runs in dwell.run().items():
+        results[f"{name}_calls_immediate"] = runs["immediate"]["calls"]
+        results[f"{name}_calls"] = runs["dwell"]["calls"]
+        results[f"{name}_settled"] = runs["immediate"]["settled"] and runs["dwell"]["settled"]
+    policy = dwell.DwellPolicy()
+    results["propose_us"] = _mean_us(lambda: policy.propose(1, 1234, "{device}", None, 0.0), repeat)
+    return results
+
+
+def bench_hotplug(windows: int = 400) -> Dict[str, float]:
+    """Time from a mapped device being plugged in, with its mapping dormant, until its screen's windows are routed."""
+    scenario = Scenario(screens=2, windows=windows).install()
+    backend = scenario.audio_backend
+    headset = scenario.device_ids[-1]
+    backend.set_state(headset, False)
+    config = {"Screen1": "Device 1", "Screen2": f"Device {len(scenario.device_ids) - 1}"}
+    endpoints = {"Screen1": scenario.device_ids[1], "Screen2": headset}
+    harness = MonitorHarness(scenario, config, endpoints=endpoints)
+    routes = scenario.expected_routes(config)
+    harness.wait_routed({pid: device_id for pid, device_id in routes.items() if device_id != headset})
+    results = {"dormant_routed": sum(device_id == headset for _, device_id in harness.route_queue.applied.items())}
+
+    plugged = {pid: device_id for pid, device_id in routes.items() if device_id == headset}
+    for name in ("reactivate", "replug"):
+        if name == "replug":
+            backend.set_state(headset, False)
+            deadline = time.monotonic() + TIMEOUT
+            while any(device_id == headset for _, device_id in harness.route_queue.applied.items()):
+                if time.monotonic() > deadline:
+                    break
+                time.sleep(0.001)
+        scenario.reset_calls()
+        started = time.perf_counter()
+        backend.set_state(headset, True)
+        results[f"{name}_complete"] = harness.wait_routed(plugged)
+        results[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        results[f"{name}_enumerations"] = backend.calls["enumerate_output_devices"]
+    harness.stop()
+    return results
+
+
+def bench_layouts(windows: int = 300, repeat: int = 20000) -> Dict[str, float]:
+    """Undocking and docking a laptop with a mapping profile per display layout, and the cost of a profile swap."""
+    scenario = Scenario(screens=3, windows=windows, devices=4).install()
+    backend = scenario.window_backend
+    docked = WindowUtils.get_topology().rebuild()
+    docked_config = scenario.config(offset=1)
+    undocked_config = {"Screen1": "Device 0"}
+    profiles = {layout_fingerprint(docked): LayoutProfile(docked_config),
+                layout_fingerprint(docked[:1]): LayoutProfile(undocked_config)}
+    harness = MonitorHarness(scenario, docked_config, profiles=profiles)
+    harness.wait_routed(scenario.expected_routes(docked_config))
+    home = {hwnd: window["monitor"] for hwnd, window in backend.windows.items()}
+
+    results = {}
+    for name, config in (("undock", undocked_config), ("dock", docked_config)):
+        if name == "undock":
+            for hmonitor in scenario.monitors[1:]:
+                backend.remove_monitor(hmonitor)
+            del scenario.monitors[1:]
+        else:
+            # Re-attached monitors get new handles; Windows puts the windows back where they were.
+            for screen in docked[1:]:
+                scenario.monitors.append(backend.add_monitor(screen.rect))
+            monitors = dict(zip([screen.hmonitor for screen in docked], scenario.monitors))
+            for hwnd, hmonitor in home.items():
+                backend.move_window(hwnd, monitors[hmonitor])
+        before = dict(harness.route_queue.applied.items())
+        expected = scenario.expected_routes(config)
+        changed = sum(before.get(pid) != device_id for pid, device_id in expected.items())
+        scenario.reset_calls()
+        started = time.perf_counter()
+        WindowUtils.get_topology().refresh()  # as on a display change notification
+        results[f"{name}_complete"] = harness.wait_routed(expected)
+        results[f"{name}_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        routes = scenario.audio_backend.calls["set_application_endpoint"]
+        results[f"{name}_extra_routes"] = routes - changed
+        results[f"{name}_enumerations"] = scenario.window_backend.calls["enum_windows"]
+    harness.stop()
+
+    store = ConfigStore({}, layout=layout_fingerprint(docked), profiles=profiles)
+    layouts = itertools.cycle(profiles)
+    results["switch_us"] = _mean_us(lambda: store.switch_layout(next(layouts)), repeat)
+    return results
+
+
+def bench_com_executor(calls: int = 2000) -> Dict[str, Dict[str, float]]:
+    """Per-call cost of joining the COM apartment around each call against one executor thread, see benchmarks.com."""
+    return com.run(calls)
+
+
+def bench_routing(pids: int = 64, batch: int = 8) -> Dict[str, Dict[str, float]]:
+    """Per-route cost through the COM executor, one route per call against batches, see benchmarks.routing."""
+    return routing.run(pids, batch)
+
+
+def bench_gui(screens: int = 12, devices: int = 48) -> Dict[str, object]:
+    """Tk-thread time and widget churn of a device refresh, rebuilt against incremental, see benchmarks.gui."""
+    return gui.run(screens, devices)
+
+
+def bench_replay(windows: int = 300, switches: int = 40) -> Dict[str, object]:
+    """Record a config change, focus changes and a replugged device, then replay the trace, see benchmarks.replay."""
+    scenario = Scenario(screens=2, windows=windows).install()
+    config = scenario.config()
+    backend = scenario.audio_backend
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.jsonl")
+        recorder = TraceRecorder(path, scenario.processes)
+        harness = MonitorHarness(scenario, config, recorder=recorder)
+        harness.wait_routed(scenario.expected_routes(config))
+        config = scenario.config(offset=1)
+        harness.config_store.publish(config)
+        harness.wait_routed(scenario.expected_routes(config))
+        for i in range(switches):
+            hwnd = scenario.hwnds[i * 7 % windows]
+            monitor = scenario.window_backend.windows[hwnd]["monitor"]
+            target = scenario.monitors[1] if monitor == scenario.monitors[0] else scenario.monitors[0]
+            scenario.window_backend.move_window(hwnd, target)
+            scenario.window_backend.set_foreground(hwnd)
+            harness.source.emit(hwnd)
+            pid = scenario.pids[hwnd]
+            harness.wait_routed({pid: scenario.expected_routes(config)[pid]})
+        unplugged = scenario.devices[config["Screen2"]]
+        backend.set_state(unplugged, False)
+        deadline = time.monotonic() + TIMEOUT
+        while any(device_id == unplugged for _, device_id in harness.route_queue.applied.items()):
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.001)
+        backend.set_state(unplugged, True)
+        harness.wait_routed(scenario.expected_routes(config))
+        harness.stop()
+        recorder.stop()
+        report = replay.replay(path)
+    del report["differences"]
+    return report
+
+
+def bench_metrics(repeat: int = 20000) -> Dict[str, float]:
+    """Per-call cost of the instrumentation left on in the hot path."""
+    metrics = Metrics()
+    return {
+        "incr_us": _mean_us(lambda: metrics.incr("routes.skipped"), repeat),
+        "observe_us": _mean_us(lambda: metrics.observe("set_application_endpoint_ms", 1.7), repeat),
+        "decision_us": _mean_us(lambda: metrics.decision(1234, "{device}", "routed", 1.7), repeat),
+        "snapshot_us": _mean_us(metrics.snapshot, 100),
+    }
+
+
+BENCHMARKS = {
+    "focus_route": bench_focus_route,
+    "screen_pids": bench_screen_pids,
+    "audio_service": bench_audio_service,
+    "apply": bench_apply,
+    "startup": bench_startup,
+    "rules": bench_rules,
+    "sessions": bench_sessions,
+    "process_tree": bench_process_tree,
+    "journal": bench_journal,
+    "dwell": bench_dwell,
+    "hotplug": bench_hotplug,
+    "layouts": bench_layouts,
+    "com_executor": bench_com_executor,
+    "routing": bench_routing,
+    "replay": bench_replay,
+    "gui": bench_gui,
+    "metrics": bench_metrics,
+}
+
+
+def run(names: Optional[List[str]] = None) -> Dict[str, dict]:
+    results = {}
+    for name in names or BENCHMARKS:
+        gc.collect()  # garbage left by the previous benchmark's scenario must not be collected during this one
+        results[name] = BENCHMARKS[name]()
+    return results
+
+
+def _flatten(results: dict, prefix: str = "") -> Dict[str, object]:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(baseline: dict, results: dict, tolerance: float = TOLERANCE) -> List[str]:
+    """Return a line per metric that got worse: timings beyond tolerance, call counts at all."""
+    regressions = []
+    current = _flatten(results)
+    for key, before in _flatten(baseline).items():
+        after = current.get(key)
+        if isinstance(before, bool) or not isinstance(before, (int, float)) or not isinstance(after, (int, float)):
+            if after is not None and after != before:
+                regressions.append(f"{key}: {before} -> {after}")
+            continue
+        unit = key[-3:]
+        limit = before * (1 + tolerance) + NOISE[unit] if unit in NOISE else before
+        if after > limit:
+            change = f" (+{(after / before - 1) * 100:.0f}%)" if before else ""
+            regressions.append(f"{key}: {before} -> {after}{change}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, from {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with this JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = run(args.names)
+    print(json.dumps(results, indent=4))
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=4)
+            file.write("\n")
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        baseline = {name: baseline[name] for name in results if name in baseline}
+        regressions = compare(baseline, results, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# src/benchmarks/volume.py
+"""Time the volume buttons block the calling (Tk) thread, synchronous calls against VolumeWorker, on a slow fake backend.
+
+Run from src/: python -m benchmarks.volume --clicks 20 --latency 0.01
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Dict
+
+from audio.audio_service import AudioService
+from audio.backend import SimulatedAudioBackend
+from services.volume_worker import VolumeWorker
+
+DEVICE_ID = "{0.0.0.00000000}.{device-0}"
+
+
+def install_backend(latency: float) -> SimulatedAudioBackend:
+    backend = SimulatedAudioBackend(latencies={
+        "enumerate_output_devices": latency,
+        "get_default_output_device_id": latency,
+        "activate_endpoint_volume": latency,
+        "get_volume": latency,
+        "set_volume": latency,
+    })
+    backend.add_endpoint(DEVICE_ID, "Speakers", volume=0.2)
+    AudioService.set_backend(backend)
+    return backend
+
+
+def run_synchronous(clicks: int, latency: float) -> Dict[str, float]:
+    """The previous handler: look the device up and change its volume on the calling thread."""
+    backend = install_backend(latency)
+    started = time.perf_counter()
+    for _ in range(clicks):
+        AudioService.refresh_devices()
+        device_id = AudioService.get_all_output_devices()["Speakers"]
+        AudioService.adjust_device_volume(device_id, 1)
+    blocked = time.perf_counter() - started
+    return {"blocked_ms": round(blocked * 1000, 3), "set_volume_calls": backend.calls["set_volume"]}
+
+
+def run_worker(clicks: int, latency: float) -> Dict[str, float]:
+    """Queue the clicks on a VolumeWorker and wait for the final level to be reported."""
+    backend = install_backend(latency)
+    target = round(backend.endpoints[DEVICE_ID]["volume"] * 100) + clicks
+    done = threading.Event()
+    worker = VolumeWorker()
+    worker.add_listener(lambda device_id, volume: volume == target and done.set())
+    worker.start()
+
+    blocked = 0.0
+    started = time.perf_counter()
+    for _ in range(clicks):
+        click = time.perf_counter()
+        worker.adjust(DEVICE_ID, 1)
+        blocked += time.perf_counter() - click
+    done.wait(10)
+    settled = time.perf_counter() - started
+    worker.stop()
+    return {
+        "blocked_ms": round(blocked * 1000, 3),
+        "settled_ms": round(settled * 1000, 3),
+        "set_volume_calls": backend.calls["set_volume"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clicks", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds per simulated COM call")
+    args = parser.parse_args()
+    results = {
+        "synchronous": run_synchronous(args.clicks, args.latency),
+        "worker": run_worker(args.clicks, args.latency),
+    }
+    print(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
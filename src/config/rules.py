@@ -0,0 +1,129 @@
+# src/config/rules.py
+import fnmatch
+import re
+from typing import Dict, List, NamedTuple, Optional, Pattern, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+RULES_KEY = "rules"  # reserved key of the config file; every other key is a screen name
+RULES_VERSION = 1
+
+# The rules section of the config file, checked in order, the first matching rule wins:
+#   "rules": {"version": 1, "rules": [
+#       {"exe": "Discord.exe", "device": "Headset"},
+#       {"exe": "obs64.exe", "ignore": true},
+#       {"title": "*Zoom Meeting*", "device": "Speakerphone"}]}
+# exe and title are case-insensitive wildcard patterns (* and ?); an exe without wildcards is an exact name.
+
+
+class Rule(NamedTuple):
+    exe: Optional[str]
+    title: Optional[str]
+    device: Optional[str]  # friendly device name, None for an ignore rule
+    ignore: bool
+
+    def to_json(self) -> dict:
+        rule = {key: value for key, value in (("exe", self.exe), ("title", self.title)) if value}
+        if self.ignore:
+            rule["ignore"] = True
+        else:
+            rule["device"] = self.device
+        return rule
+
+
+def _is_pattern(text: str) -> bool:
+    return any(c in text for c in "*?[")
+
+
+def _compile(pattern: str) -> Pattern:
+    return re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+
+
+def _literal(pattern: str) -> str:
+    """Return the longest wildcard-free part of a pattern, lower-cased; any match must contain it."""
+    return max(re.split(r"[*?]|\[[^\]]*\]", pattern), key=len).lower()
+
+
+class RuleSet:
+    """Rules compiled for lookup: an index of exact executable names plus precompiled wildcard patterns.
+
+    Each title pattern keeps its longest literal part, so most non-matching patterns are ruled out by a
+    substring test before the regex runs.
+    """
+
+    def __init__(self, rules: List[Rule] = (), version: int = RULES_VERSION):
+        self.rules = list(rules)
+        self.version = version
+        self.uses_titles = any(rule.title for rule in self.rules)
+        self._by_exe: Dict[str, List[Tuple[int, Optional[Pattern], Rule]]] = {}
+        self._patterns: List[Tuple[int, Optional[Pattern], str, Optional[Pattern], Rule]] = []
+        for index, rule in enumerate(self.rules):
+            title = _compile(rule.title) if rule.title else None
+            if rule.exe and not _is_pattern(rule.exe):
+                self._by_exe.setdefault(rule.exe.lower(), []).append((index, title, rule))
+            else:
+                exe = _compile(rule.exe) if rule.exe else None
+                self._patterns.append((index, exe, _literal(rule.title) if rule.title else "", title, rule))
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def match(self, exe: Optional[str], title: Optional[str]) -> Optional[Rule]:
+        """Return the first rule matching the executable name and window title, or None."""
+        best, best_index = None, len(self.rules)
+        for index, title_pattern, rule in self._by_exe.get(exe.lower() if exe else "", ()):
+            if title_pattern is None or (title is not None and title_pattern.match(title)):
+                best, best_index = rule, index
+                break
+        # Only patterns listed before the exact match can take precedence over it.
+        folded = title.lower() if title is not None else None
+        for index, exe_pattern, literal, title_pattern, rule in self._patterns:
+            if index >= best_index:
+                break
+            if title_pattern is not None and (folded is None or literal not in folded
+                                              or not title_pattern.match(title)):
+                continue
+            if exe_pattern is not None and (exe is None or not exe_pattern.match(exe)):
+                continue
+            return rule
+        return best
+
+    def to_json(self) -> dict:
+        return {"version": self.version, "rules": [rule.to_json() for rule in self.rules]}
+
+
+NO_RULES = RuleSet()
+
+
+def parse_rules(section: dict) -> RuleSet:
+    """Validate and compile a rules section, raising ValueError if it is malformed."""
+    if not isinstance(section, dict):
+        raise ValueError("The rules section must be an object")
+    version = section.get("version")
+    if not isinstance(version, int) or isinstance(version, bool):
+        raise ValueError("The rules section needs an integer version")
+    if version > RULES_VERSION:
+        raise ValueError(f"Rules version {version} is newer than the supported version {RULES_VERSION}")
+    entries = section.get("rules", [])
+    if not isinstance(entries, list):
+        raise ValueError("rules must be a list")
+    rules = []
+    for i, entry in enumerate(entries):
+        if not isinstance(entry, dict):
+            raise ValueError(f"Rule {i + 1} must be an object")
+        unknown = set(entry) - {"exe", "title", "device", "ignore"}
+        if unknown:
+            raise ValueError(f"Rule {i + 1} has unknown keys: {', '.join(sorted(unknown))}")
+        exe, title, device = entry.get("exe"), entry.get("title"), entry.get("device")
+        ignore = entry.get("ignore", False)
+        if not all(value is None or (isinstance(value, str) and value) for value in (exe, title, device)):
+            raise ValueError(f"Rule {i + 1}: exe, title and device must be non-empty strings")
+        if not exe and not title:
+            raise ValueError(f"Rule {i + 1} needs an exe or a title")
+        if ignore is not True and ignore is not False:
+            raise ValueError(f"Rule {i + 1}: ignore must be true or false")
+        if bool(device) == ignore:
+            raise ValueError(f"Rule {i + 1} needs either a device or \"ignore\": true")
+        rules.append(Rule(exe, title, device, ignore))
+    return RuleSet(rules, version)
@@ -1,44 +1,275 @@
 # src/config/settings.py
 import json
 import os
-from typing import Dict
+import tempfile
+import threading
+from collections.abc import Container, Mapping
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 import logging
 from pathlib import Path
 
+from config.rules import NO_RULES, RULES_KEY, RuleSet, parse_rules
+
 logger = logging.getLogger(__name__)
 
 CONFIG_FILE = Path(__file__).resolve().parents[2] / 'screen_audio_mapping.json'
 
 
-def load_config() -> Dict[str, str]:
-    """Load configuration from the JSON file and validate against available devices."""
+# A screen maps to {"device": friendly name, "id": endpoint ID}. The endpoint ID is what routes; the name is shown
+# while the device is unplugged and lets older configs, which stored only the name, keep working until re-saved.
+DEVICE_KEY = "device"
+ID_KEY = "id"
+# The screen mappings of every display layout seen, by layout fingerprint (see window.monitor_topology); the
+# top-level mapping is the one of the layout the file was last saved under, which older versions read.
+PROFILES_KEY = "profiles"
+
+
+def _parse_mapping(entries: dict, where: str) -> Tuple[Dict[str, str], Dict[str, str]]:
+    mapping, endpoints = {}, {}
+    for screen, entry in entries.items():
+        if isinstance(entry, str):
+            mapping[screen] = entry  # saved by name only; resolved by name until the next save
+        elif isinstance(entry, dict) and isinstance(entry.get(DEVICE_KEY), str):
+            mapping[screen] = entry[DEVICE_KEY]
+            if isinstance(entry.get(ID_KEY), str):
+                endpoints[screen] = entry[ID_KEY]
+        else:
+            logger.warning(f"Ignoring the malformed mapping of {screen} in {where}")
+    return mapping, endpoints
+
+
+def _mapping_json(mapping: Mapping, endpoints: Mapping) -> dict:
+    return {screen: {DEVICE_KEY: name, ID_KEY: endpoints[screen]} if screen in endpoints else name
+            for screen, name in mapping.items()}
+
+
+def load_config() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Load the screen -> device name mapping and the screen -> endpoint ID table from the JSON file.
+
+    Devices are not enumerated here: mappings to devices that are unplugged stay in the config, dormant.
+    """
     try:
         with open(CONFIG_FILE, "r") as f:
             config = json.load(f)
-        
-        from audio.audio_service import AudioService
-        available_devices = AudioService.get_all_output_devices()
-        
-        valid_config = {
-            screen: device 
-            for screen, device in config.items() 
-            if device in available_devices.keys()
-        }
-        
-        if valid_config != config:
-            logger.warning("Some configured devices are no longer available. Cleaning up config.")
-            save_config(valid_config)
-            
-        return valid_config
-            
     except FileNotFoundError:
         logger.error(f"Config file not found: {CONFIG_FILE}")
-        return {}
+        return {}, {}
     except json.JSONDecodeError:
         logger.error(f"Config file is empty or corrupted: {CONFIG_FILE}. Returning default configuration.")
+        return {}, {}
+    config.pop(RULES_KEY, None)
+    config.pop(PROFILES_KEY, None)
+    return _parse_mapping(config, str(CONFIG_FILE))
+
+
+def _read_section(key: str) -> Optional[dict]:
+    try:
+        with open(CONFIG_FILE, "r") as f:
+            return json.load(f).get(key)
+    except (FileNotFoundError, json.JSONDecodeError, AttributeError):
+        return None
+
+
+def load_profiles() -> Dict[str, "LayoutProfile"]:
+    """Load and compile the screen mappings saved for each display layout, by layout fingerprint."""
+    section = _read_section(PROFILES_KEY)
+    if not isinstance(section, dict):
         return {}
+    profiles = {}
+    for layout, entries in section.items():
+        if isinstance(entries, dict):
+            profiles[layout] = LayoutProfile(*_parse_mapping(entries, f"the {layout} profile of {CONFIG_FILE}"))
+        else:
+            logger.warning(f"Ignoring the malformed {layout} profile in {CONFIG_FILE}")
+    return profiles
+
+
+def load_rules() -> RuleSet:
+    """Load and compile the rules section of the config file; a missing or invalid section means no rules."""
+    section = _read_section(RULES_KEY)
+    if section is None:
+        return NO_RULES
+    try:
+        rules = parse_rules(section)
+    except ValueError as e:
+        logger.error(f"Ignoring the rules in {CONFIG_FILE}: {e}")
+        return NO_RULES
+    logger.info(f"Loaded {len(rules)} routing rule(s)")
+    return rules
+
+
+def save_config(config: Mapping, rules: Optional[RuleSet] = None):
+    """Save configuration to the JSON file, replacing it atomically; without rules the file's rules section is kept.
+
+    The endpoint IDs and the layout profiles of a ConfigSnapshot are saved with the device names.
+    """
+    data = _mapping_json(config, getattr(config, "endpoints", {}))
+    section = _read_section(RULES_KEY) if rules is None else rules.to_json() if rules else None
+    if section is not None:
+        data[RULES_KEY] = section
+    profiles = getattr(config, "profiles", None)
+    if profiles:
+        data[PROFILES_KEY] = {layout: _mapping_json(profile.mapping, profile.endpoints)
+                              for layout, profile in profiles.items()}
+    fd, tmp_path = tempfile.mkstemp(dir=CONFIG_FILE.parent, prefix=CONFIG_FILE.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, CONFIG_FILE)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class LayoutProfile:
+    """The screen -> device name mapping and screen -> endpoint ID table of one display layout, compiled once.
+
+    Snapshots share a profile rather than copying it, so switching to another layout's profile costs nothing.
+    """
+
+    __slots__ = ("mapping", "endpoints")
+
+    def __init__(self, mapping: Dict[str, str], endpoints: Optional[Dict[str, str]] = None):
+        self.mapping = dict(mapping)
+        self.endpoints = {screen: device_id for screen, device_id in (endpoints or {}).items() if screen in mapping}
+
+    def __eq__(self, other) -> bool:
+        return (isinstance(other, LayoutProfile) and self.mapping == other.mapping
+                and self.endpoints == other.endpoints)
+
+    def __repr__(self) -> str:
+        return f"LayoutProfile({self.mapping!r}, endpoints={len(self.endpoints)})"
+
+
+class ConfigSnapshot(Mapping):
+    """Immutable, versioned screen -> device name mapping together with the compiled routing rules.
+
+    endpoints holds the endpoint ID of each mapping made by ID; a mapping without one is resolved by name.
+    The mapping is the profile of the display layout in use; profiles holds those of every layout seen.
+    """
+
+    def __init__(self, mapping: Union[Dict[str, str], LayoutProfile], version: int, rules: RuleSet = NO_RULES,
+                 endpoints: Optional[Dict[str, str]] = None, layout: Optional[str] = None,
+                 profiles: Optional[Dict[str, LayoutProfile]] = None):
+        self.profile = mapping if isinstance(mapping, LayoutProfile) else LayoutProfile(mapping, endpoints)
+        self._mapping = self.profile.mapping
+        self.endpoints = self.profile.endpoints
+        self.version = version
+        self.rules = rules
+        self.layout = layout
+        self.profiles = profiles or {}
+
+    def endpoint(self, screen: Optional[str], devices: Mapping, active: Container) -> Optional[str]:
+        """Return the endpoint ID screen routes to, or None if it is unmapped or its device is unavailable (dormant).
+
+        devices maps active friendly names to endpoint IDs, active holds the active endpoint IDs.
+        """
+        device_id = self.endpoints.get(screen)
+        if device_id is not None:
+            return device_id if device_id in active else None
+        name = self._mapping.get(screen)
+        return devices.get(name) if name is not None else None
+
+    def dormant(self, active: Container) -> List[str]:
+        """Return the screens whose device is mapped by endpoint ID but unavailable."""
+        return [screen for screen, device_id in self.endpoints.items() if device_id not in active]
+
+    def __getitem__(self, screen: str) -> str:
+        return self._mapping[screen]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._mapping)
+
+    def __len__(self) -> int:
+        return len(self._mapping)
+
+    def __repr__(self) -> str:
+        return (f"ConfigSnapshot(version={self.version}, {self._mapping!r}, endpoints={len(self.endpoints)}, "
+                f"rules={len(self.rules)}, profiles={len(self.profiles)})")
+
+
+class ConfigStore:
+    """Holds the current ConfigSnapshot; publishing swaps the reference, so readers never see a partial update.
+
+    With a layout, the mapping is that layout's profile: the saved profile of the layout if there is one,
+    otherwise the mapping given, which becomes it.
+    """
+
+    def __init__(self, mapping: Dict[str, str], rules: RuleSet = NO_RULES, endpoints: Optional[Dict[str, str]] = None,
+                 layout: Optional[str] = None, profiles: Optional[Dict[str, LayoutProfile]] = None):
+        self._lock = threading.Lock()
+        profiles = dict(profiles or {})
+        profile = profiles.get(layout) or LayoutProfile(mapping, endpoints)
+        if layout is not None:
+            profiles[layout] = profile
+        self._current = ConfigSnapshot(profile, 1, rules, layout=layout, profiles=profiles)
+        self._listeners: List[Callable[[ConfigSnapshot], None]] = []
+
+    @property
+    def current(self) -> ConfigSnapshot:
+        return self._current
+
+    def _notify(self, snapshot: ConfigSnapshot) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Error in config listener: {e}")
+
+    def publish(self, mapping: Dict[str, str], rules: Optional[RuleSet] = None,
+                endpoints: Optional[Dict[str, str]] = None) -> ConfigSnapshot:
+        """Make mapping (and rules and endpoint IDs, if given) the current config and notify listeners.
+
+        Screens still mapped to the same device name keep their endpoint ID unless endpoints gives a new one;
+        the mapping is saved as the profile of the layout in use. A no-op if nothing changed.
+        """
+        with self._lock:
+            current = self._current
+            if rules is None:
+                rules = current.rules
+            kept = {screen: device_id for screen, device_id in current.endpoints.items()
+                    if screen in mapping and mapping[screen] == current.get(screen)}
+            endpoints = {**kept, **{screen: device_id for screen, device_id in (endpoints or {}).items()
+                                    if screen in mapping}}
+            if dict(mapping) == dict(current) and rules is current.rules and endpoints == current.endpoints:
+                return current
+            profile = LayoutProfile(mapping, endpoints)
+            profiles = current.profiles
+            if current.layout is not None:
+                profiles = {**profiles, current.layout: profile}
+            snapshot = ConfigSnapshot(profile, current.version + 1, rules, layout=current.layout, profiles=profiles)
+            self._current = snapshot
+        self._notify(snapshot)
+        return snapshot
+
+    def switch_layout(self, layout: str) -> ConfigSnapshot:
+        """Make the profile of a display layout current and notify listeners; a no-op if it already is.
+
+        A layout seen for the first time starts with the mapping of the one before it.
+        """
+        with self._lock:
+            current = self._current
+            if layout == current.layout:
+                return current
+            profiles = current.profiles
+            profile = profiles.get(layout)
+            if profile is None:
+                profile = current.profile
+                profiles = {**profiles, layout: profile}
+            snapshot = ConfigSnapshot(profile, current.version + 1, current.rules, layout=layout, profiles=profiles)
+            self._current = snapshot
+        logger.info(f"Switched to the mappings of display layout {layout}")
+        self._notify(snapshot)
+        return snapshot
+
+    def add_listener(self, listener: Callable[[ConfigSnapshot], None]) -> None:
+        self._listeners.append(listener)
 
-def save_config(config: Dict[str, str]):
-    """Save configuration to the JSON file."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=4)
\ No newline at end of file
+    def remove_listener(self, listener: Callable[[ConfigSnapshot], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
@@ -0,0 +1,50 @@
+# src/ctl.py
+"""Send a command to a running engine over its control socket and print the result as JSON.
+
+Examples:
+    python src/ctl.py screens
+    python src/ctl.py set_mapping screen=Screen1 "device=Speakers (Realtek(R) Audio)"
+    python src/ctl.py routes
+"""
+import argparse
+import json
+import sys
+
+from services.control import CONTROL_PORT, ControlClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.splitlines()[2:]))
+    parser.add_argument("command", help="screens, devices, mappings, set_mapping, set_mappings, rules, "
+                                        "set_rules, sessions, mute, refresh, routes, stats or stop")
+    parser.add_argument("arguments", nargs="*", metavar="key=value",
+                        help="command arguments; values that parse as JSON are sent as JSON")
+    parser.add_argument("--port", type=int, default=CONTROL_PORT)
+    args = parser.parse_args()
+
+    arguments = {}
+    for argument in args.arguments:
+        key, sep, value = argument.partition("=")
+        if not sep:
+            parser.error(f"expected key=value, got {argument!r}")
+        try:
+            arguments[key] = json.loads(value)
+        except json.JSONDecodeError:
+            arguments[key] = value
+
+    try:
+        client = ControlClient(args.port)
+    except OSError as e:
+        sys.exit(f"Cannot connect to the engine on port {args.port}: {e}")
+    try:
+        print(json.dumps(client.request(args.command, **arguments), indent=4))
+    except RuntimeError as e:
+        sys.exit(f"Error: {e}")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
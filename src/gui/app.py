@@ -1,168 +1,222 @@
 # src/gui/app.py
 import tkinter as tk
 from tkinter import ttk
-import threading
 import logging
-from config.settings import load_config, save_config
+from typing import Dict, List, Optional
 from audio.audio_service import AudioService
+from gui.view_model import ScreenListModel, ScreenListView, ViewRefresher, ViewState, read_view_state
+from services.engine import RoutingEngine
+from services.metrics import METRICS, format_snapshot
+from services.volume_worker import VolumeWorker
 from window.window_utils import WindowUtils
-from services.monitor_service import start_monitor
-from services.helpers import update_pid_mapping
 
 logger = logging.getLogger(__name__)
 
 
-class App:
-    def __init__(self, root: tk.Tk):
+class App(ScreenListView):
+    def __init__(self, root: tk.Tk, engine: Optional[RoutingEngine] = None):
         self.root = root
         self.root.title("Screen to Audio Device Mapper")
-        self.refresh_lists()
-        
-        self.config = load_config()
-        
-        self.pid_to_device = update_pid_mapping({}, self.config)
-        
-        self.monitoring_thread = None
-        self.stop_event = threading.Event()
-        
-        if self.config:
-            self.start_monitoring()
-        
+        self.engine = engine or RoutingEngine()
+        self.startup = self.engine.startup
+        self.device_map = {}
+        self.stats_window = None
+
+        self.volume_worker = VolumeWorker()
+        self.volume_worker.add_listener(self.post_volume)
+        self.volume_worker.start()
+
+        self.mappings: Dict[str, tk.StringVar] = {}
+        self.volume_labels: Dict[str, tk.Label] = {}
+        self.rows: Dict[str, List[tk.Widget]] = {}
         self.create_widgets()
+        # The startup snapshot is fresh, so the first rows are built right away; later changes are read in the
+        # background and only what differs is updated.
+        self.view_model = ScreenListModel(self)
+        initial = read_view_state(self.engine)
+        self.device_map = initial.devices
+        self.view_model.update(initial)
+        self.refresher = ViewRefresher(lambda rescan: read_view_state(self.engine, rescan), self.post_view)
+        self.refresher.start()
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
-
-    def start_monitoring(self):
-        self.monitoring_thread = threading.Thread(
-            target=start_monitor, 
-            args=(self.config, self.pid_to_device, self.stop_event), 
-            daemon=True
-        )
-        self.monitoring_thread.start()
-    
-    def refresh_lists(self):
-        self.screens = WindowUtils.detect_screens()
-        self.audio_devices = list(AudioService.get_all_output_devices().keys())
+        self.root.after_idle(self.startup.mark, "first_paint")
+        # Mappings can also be changed through the control socket, and devices and displays come and go.
+        self.engine.config_store.add_listener(self.request_refresh)
+        AudioService.get_registry().add_listener(self.request_refresh)
+        WindowUtils.get_topology().add_listener(self.request_refresh)
+
+        # The monitor's first cycle performs the initial routing sweep.
+        self.engine.start()
+        self.read_volumes_async(self.device_map)
+        self.close_when_stopped()
+
+    @property
+    def config(self):
+        """The current, read-only config snapshot."""
+        return self.engine.config
 
     def create_widgets(self):
         tk.Label(self.root, text="Screen").grid(row=0, column=0, padx=10, pady=10, sticky="w")
         tk.Label(self.root, text="Audio Device").grid(row=0, column=1, padx=10, pady=10, sticky="w")
         tk.Label(self.root, text="Volume Control").grid(row=0, column=2, padx=10, pady=10, sticky="w")
 
-        self.mappings = {}
-        self.volume_labels = {}
-
-        for i, screen in enumerate(self.screens):
-            tk.Label(self.root, text=screen["name"]).grid(row=i + 1, column=0, padx=10, pady=5, sticky="w")
-
-            device_var = tk.StringVar(value=self.config.get(screen["name"], ""))
-            self.mappings[screen["name"]] = device_var
+        self.save_button = tk.Button(self.root, text="Apply", command=self.save_mappings)
+        self.refresh_button = tk.Button(self.root, text="Refresh Devices", command=self.refresh_devices)
+        self.stats_button = tk.Button(self.root, text="Stats", command=self.toggle_stats)
+        self.status_label = tk.Label(self.root, text="")
+        self.place_rows(())
 
-            device_dropdown = ttk.Combobox(self.root, textvariable=device_var, values=self.audio_devices, state="readonly")
-            device_dropdown.grid(row=i + 1, column=1, padx=10, pady=5, sticky="w")
-            device_dropdown.bind('<<ComboboxSelected>>', lambda e, s=screen["name"]: self.on_device_change(s))
-            
-            volume_frame = tk.Frame(self.root)
-            volume_frame.grid(row=i + 1, column=2, padx=10, pady=5, sticky="w")
+    def add_row(self, screen: str, devices: List[str]) -> None:
+        label = tk.Label(self.root, text=screen)
+        device_var = tk.StringVar(value="")
+        self.mappings[screen] = device_var
 
-            minus_btn = tk.Button(volume_frame, text="-", width=3,
-                                  command=lambda s=screen["name"]: self.adjust_volume(s, -5))
-            minus_btn.pack(side=tk.LEFT, padx=2)
+        device_dropdown = ttk.Combobox(self.root, textvariable=device_var, values=devices, state="readonly")
+        device_dropdown.bind('<<ComboboxSelected>>', lambda e, s=screen: self.on_device_change(s))
 
-            current_volume = 0
-            if device_var.get():
-                device_map = AudioService.get_all_output_devices()
-                device_id = device_map.get(device_var.get())
-                if device_id:
-                    current_volume = AudioService.get_device_volume(device_id)
+        volume_frame = tk.Frame(self.root)
+        minus_btn = tk.Button(volume_frame, text="-", width=3, command=lambda s=screen: self.adjust_volume(s, -5))
+        minus_btn.pack(side=tk.LEFT, padx=2)
+        volume_label = tk.Label(volume_frame, text="--%", width=6)
+        volume_label.pack(side=tk.LEFT, padx=2)
+        self.volume_labels[screen] = volume_label
+        plus_btn = tk.Button(volume_frame, text="+", width=3, command=lambda s=screen: self.adjust_volume(s, 5))
+        plus_btn.pack(side=tk.LEFT, padx=2)
 
-            volume_label = tk.Label(volume_frame, text=f"{int(current_volume)}%", width=6)
-            volume_label.pack(side=tk.LEFT, padx=2)
-            self.volume_labels[screen["name"]] = volume_label
+        self.rows[screen] = [label, device_dropdown, volume_frame]
 
-            plus_btn = tk.Button(volume_frame, text="+", width=3,
-                                 command=lambda s=screen["name"]: self.adjust_volume(s, 5))
-            plus_btn.pack(side=tk.LEFT, padx=2)
+    def remove_row(self, screen: str) -> None:
+        for widget in self.rows.pop(screen):
+            widget.destroy()
+        del self.mappings[screen]
+        del self.volume_labels[screen]
 
-        save_button = tk.Button(self.root, text="Apply", command=self.save_mappings)
-        save_button.grid(row=len(self.screens) + 1, column=0, pady=10)
+    def place_rows(self, screens) -> None:
+        for i, screen in enumerate(screens):
+            label, device_dropdown, volume_frame = self.rows[screen]
+            label.grid(row=i + 1, column=0, padx=10, pady=5, sticky="w")
+            device_dropdown.grid(row=i + 1, column=1, padx=10, pady=5, sticky="w")
+            volume_frame.grid(row=i + 1, column=2, padx=10, pady=5, sticky="w")
+        self.save_button.grid(row=len(screens) + 1, column=0, pady=10)
+        self.refresh_button.grid(row=len(screens) + 1, column=1, pady=10)
+        self.stats_button.grid(row=len(screens) + 1, column=2, pady=10)
+        self.status_label.grid(row=len(screens) + 2, column=0, columnspan=4, pady=5)
+
+    def set_devices(self, devices: List[str], mappings: Dict[str, str]) -> None:
+        for screen, (_, device_dropdown, _) in self.rows.items():
+            device_dropdown.config(values=devices)
+            device = self.mappings[screen].get()
+            # A mapping to an unplugged device is kept; it applies again when the device is back.
+            if device and device not in devices and device != mappings.get(screen):
+                self.mappings[screen].set("")
+
+    def set_mapping(self, screen: str, device: str) -> None:
+        self.mappings[screen].set(device)
+
+    def request_refresh(self, *args):
+        """Re-read the view in the background; called from notification and publishing threads."""
+        self.refresher.request()
+
+    def post_view(self, state: ViewState, rescanned: bool):
+        """Called from the refresher thread with a freshly read view state."""
+        self.root.after(0, self.show_view, state, rescanned)
+
+    def show_view(self, state: ViewState, rescanned: bool):
+        self.device_map = state.devices
+        diff = self.view_model.update(state)
+        for screen in diff.volumes:
+            device_id = self.device_map.get(self.mappings[screen].get())
+            if device_id:
+                self.volume_worker.read(device_id)
+            else:
+                self.volume_labels[screen].config(text="--%")
+        if rescanned:
+            self.status_label.config(text="Devices refreshed successfully!")
+
+    def read_volumes_async(self, device_map: dict):
+        """Read the volumes of mapped devices in the background and show them when done."""
+        device_ids = [device_map[var.get()] for var in self.mappings.values() if var.get() in device_map]
+        self.startup.read_volumes(device_ids, lambda volumes: self.root.after(0, self.show_volumes, device_map, volumes))
+
+    def show_volumes(self, device_map: dict, volumes: dict):
+        for screen, device_var in self.mappings.items():
+            device_id = device_map.get(device_var.get())
+            if device_id in volumes:
+                self.volume_labels[screen].config(text=f"{int(volumes[device_id])}%")
 
-        refresh_button = tk.Button(self.root, text="Refresh Devices", command=self.refresh_devices)
-        refresh_button.grid(row=len(self.screens) + 1, column=1, pady=10)
+    def post_volume(self, device_id: str, volume: float):
+        """Show a volume reported by the worker or a notification; called from background threads."""
+        self.root.after(0, self.show_volume, device_id, volume)
 
-        self.status_label = tk.Label(self.root, text="")
-        self.status_label.grid(row=len(self.screens) + 2, column=0, columnspan=4, pady=5)
+    def show_volume(self, device_id: str, volume: float):
+        for screen, device_var in self.mappings.items():
+            if self.device_map.get(device_var.get()) == device_id:
+                self.volume_labels[screen].config(text=f"{int(volume)}%")
 
     def adjust_volume(self, screen_name, delta):
-        try:
-            device_name = self.mappings[screen_name].get()
-            if device_name:
-                device_map = AudioService.get_all_output_devices()
-                device_id = device_map.get(device_name)
-                if device_id:
-                    current_volume = AudioService.get_device_volume(device_id)
-                    new_volume = max(0, min(100, current_volume + delta))
-                    AudioService.set_device_volume(device_id, new_volume)
-                    
-                    for scr, dev_var in self.mappings.items():
-                        if dev_var.get() == device_name:
-                            self.volume_labels[scr].config(text=f"{int(new_volume)}%")
-
-        except Exception as e:
-            self.status_label.config(text=f"Error adjusting volume: {str(e)}")
+        device_id = self.device_map.get(self.mappings[screen_name].get())
+        if device_id:
+            self.volume_worker.adjust(device_id, delta)
 
     def on_device_change(self, screen_name):
-        try:
-            device_name = self.mappings[screen_name].get()
-            if device_name:
-                device_map = AudioService.get_all_output_devices()
-                device_id = device_map.get(device_name)
-                if device_id:
-                    current_volume = AudioService.get_device_volume(device_id)
-                    self.volume_labels[screen_name].config(text=f"{int(current_volume)}%")
-        except Exception as e:
-            self.status_label.config(text=f"Error updating volume: {str(e)}")
+        device_id = self.device_map.get(self.mappings[screen_name].get())
+        if device_id:
+            self.volume_worker.read(device_id)
 
     def save_mappings(self):
-        for screen, device_var in self.mappings.items():
-            self.config[screen] = device_var.get()
-        save_config(self.config)
-
-        if self.monitoring_thread is not None:
-            self.stop_event.set()
-            self.monitoring_thread.join()
-
-        self.pid_to_device = update_pid_mapping(self.pid_to_device, self.config)
-        self.stop_event.clear()
-        self.start_monitoring()
+        # Only the screens whose selection differs from the config are sent, so Apply without changes saves nothing.
+        # Devices are sent by endpoint ID, as several may share a name.
+        shown = self.view_model.state.mappings
+        changed = {screen: self.device_map.get(var.get(), var.get()) for screen, var in self.mappings.items()
+                   if var.get() != shown.get(screen, "")}
+        if not changed:
+            self.status_label.config(text="No changes to apply")
+            return
+        try:
+            self.engine.set_mappings(changed)
+        except ValueError as e:
+            self.status_label.config(text=str(e))
 
     def refresh_devices(self):
-        current_volumes = {screen: label.cget("text") for screen, label in self.volume_labels.items()}
-        current_mappings = {screen: var.get() for screen, var in self.mappings.items()}
-        
-        for widget in self.root.grid_slaves():
-            widget.destroy()
-        
-        self.refresh_lists()
-        self.create_widgets()
-        
-        for screen, device in current_mappings.items():
-            if screen in self.mappings:
-                if device in self.audio_devices:
-                    self.mappings[screen].set(device)
-                    if screen in current_volumes and screen in self.volume_labels:
-                        vol_str = current_volumes[screen].replace("%", "")
-                        if vol_str.isdigit():
-                            self.volume_labels[screen].config(text=current_volumes[screen])
-                else:
-                    self.mappings[screen].set('')
-                    if screen in self.config:
-                        del self.config[screen]
-        
-        save_config(self.config)
-        self.status_label.config(text="Devices refreshed successfully!")
+        """Enumerate screens and devices again in the background; the rows are updated when that is done."""
+        self.status_label.config(text="Refreshing devices...")
+        self.refresher.request(rescan=True)
+
+    def toggle_stats(self):
+        """Show or hide a window with the live metrics and the most recent routing decisions."""
+        if self.stats_window is not None:
+            self.stats_window.destroy()
+            self.stats_window = None
+            return
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Stats")
+        self.stats_window.protocol("WM_DELETE_WINDOW", self.toggle_stats)
+        self.stats_label = tk.Label(self.stats_window, justify=tk.LEFT, anchor="nw", font=("Consolas", 9))
+        self.stats_label.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        self.update_stats()
+
+    def update_stats(self):
+        if self.stats_window is None:
+            return
+        snapshot = METRICS.snapshot()
+        lines = [f"uptime: {snapshot['uptime_s']}s"] + format_snapshot(snapshot) + ["", "recent decisions:"]
+        for decision in snapshot["recent_decisions"][-10:]:
+            lines.append(f"  PID {decision['pid']} -> {decision['device_id']}: {decision['outcome']}")
+        self.stats_label.config(text="\n".join(lines))
+        self.stats_window.after(1000, self.update_stats)
+
+    def close_when_stopped(self):
+        """Close the window once the engine is stopped, e.g. by a control client."""
+        if self.engine.stop_event.is_set():
+            self.on_closing()
+        else:
+            self.root.after(500, self.close_when_stopped)
 
     def on_closing(self):
-        self.stop_event.set()
-        if self.monitoring_thread is not None:
-            self.monitoring_thread.join()
+        self.engine.config_store.remove_listener(self.request_refresh)
+        AudioService.get_registry().remove_listener(self.request_refresh)
+        WindowUtils.get_topology().remove_listener(self.request_refresh)
+        self.refresher.stop()
+        self.volume_worker.stop()
+        self.engine.stop()
         self.root.destroy()
@@ -0,0 +1,182 @@
+# src/gui/view_model.py
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ViewState(NamedTuple):
+    """What the window shows: a row per screen with its mapped device, and the active devices to choose from."""
+    screens: Tuple[str, ...]
+    mappings: Dict[str, str]  # screen -> label of the mapped device, from the config
+    devices: Dict[str, str]  # label -> endpoint ID of the active devices
+
+
+EMPTY_VIEW = ViewState((), {}, {})
+
+
+class ViewDiff(NamedTuple):
+    added: List[Tuple[int, str]]  # (row, screen) of the screens that appeared
+    removed: List[str]
+    devices: Optional[List[str]]  # the device labels to choose from, if they changed
+    mappings: Dict[str, str]  # screen -> device label of new rows and rows whose mapping changed
+    volumes: List[str]  # screens whose device changed, so their volume is read again
+
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.devices is not None or self.mappings or self.volumes)
+
+
+def read_view_state(engine, rescan: bool = False) -> ViewState:
+    """Read the screens, devices and mappings of a RoutingEngine; with rescan, re-enumerate the backends first.
+
+    Without rescan this only reads state kept current by notifications; with it, it is slow and belongs off the
+    Tk thread.
+    """
+    if rescan:
+        engine.refresh_devices()
+    config = engine.config
+    labels = device_labels(engine.endpoints)
+    devices = {label: device_id for device_id, label in labels.items()}
+    mappings = {}
+    for screen, name in config.items():
+        device_id = config.endpoints.get(screen)
+        if device_id in labels:
+            mappings[screen] = labels[device_id]
+        elif device_id is None and name in devices:
+            mappings[screen] = name  # saved by name only, before endpoint IDs were kept
+        else:
+            # Unplugged, or saved by a name several devices share: its name is shown, told apart from the label
+            # of an active device.
+            mappings[screen] = f"{name} (unavailable)" if name in devices else name
+    return ViewState(tuple(screen["name"] for screen in engine.screens), mappings, devices)
+
+
+def device_labels(endpoints: Dict[str, str]) -> Dict[str, str]:
+    """Return endpoint ID -> the label a device is listed under: its name, numbered if other devices share it.
+
+    Devices of the same name are numbered in endpoint ID order, so each keeps its label across enumerations.
+    """
+    counts = Counter(endpoints.values())
+    numbers = Counter()
+    labels = {}
+    for device_id in sorted(endpoints):
+        name = endpoints[device_id]
+        if counts[name] > 1:
+            numbers[name] += 1
+            name = f"{name} ({numbers[name]})"
+        labels[device_id] = name
+    return {device_id: labels[device_id] for device_id in endpoints}
+
+
+def _device_id(state: ViewState, screen: str) -> Optional[str]:
+    return state.devices.get(state.mappings.get(screen, ""))
+
+
+def diff_view(old: ViewState, new: ViewState) -> ViewDiff:
+    """Return what changed between two view states, row by row."""
+    kept, current = set(old.screens), set(new.screens)
+    added = [(row, screen) for row, screen in enumerate(new.screens) if screen not in kept]
+    removed = [screen for screen in old.screens if screen not in current]
+    devices = list(new.devices) if list(new.devices) != list(old.devices) else None
+    mappings = {screen: new.mappings.get(screen, "") for screen in new.screens
+                if screen not in kept or new.mappings.get(screen, "") != old.mappings.get(screen, "")}
+    volumes = [screen for screen in new.screens if (screen not in kept and _device_id(new, screen))
+               or (screen in kept and _device_id(new, screen) != _device_id(old, screen))]
+    return ViewDiff(added, removed, devices, mappings, volumes)
+
+
+class ScreenListView:
+    """Interface of the widgets a ScreenListModel updates; App implements it with Tk, benchmarks with counters."""
+
+    def add_row(self, screen: str, devices: List[str]) -> None:
+        raise NotImplementedError
+
+    def remove_row(self, screen: str) -> None:
+        raise NotImplementedError
+
+    def place_rows(self, screens: Tuple[str, ...]) -> None:
+        """Lay the rows out in this order, after rows were added or removed."""
+        raise NotImplementedError
+
+    def set_devices(self, devices: List[str], mappings: Dict[str, str]) -> None:
+        """Offer devices in every row; a selection not yet applied is cleared if its device is gone."""
+        raise NotImplementedError
+
+    def set_mapping(self, screen: str, device: str) -> None:
+        raise NotImplementedError
+
+
+class ScreenListModel:
+    """Keeps a ScreenListView in step with the latest ViewState by applying only what changed."""
+
+    def __init__(self, view: ScreenListView):
+        self.view = view
+        self.state = EMPTY_VIEW
+
+    def update(self, state: ViewState) -> ViewDiff:
+        """Show state, touching only the rows, device lists and selections that differ from what is shown."""
+        diff = diff_view(self.state, state)
+        for screen in diff.removed:
+            self.view.remove_row(screen)
+        for _, screen in diff.added:
+            self.view.add_row(screen, list(state.devices))
+        if diff.added or diff.removed:
+            self.view.place_rows(state.screens)
+        if diff.devices is not None and self.state is not EMPTY_VIEW:
+            self.view.set_devices(diff.devices, state.mappings)
+        for screen, device in diff.mappings.items():
+            self.view.set_mapping(screen, device)
+        self.state = state
+        return diff
+
+
+class ViewRefresher:
+    """Reads view states off the Tk thread; requests made while one is being read are served by one more read."""
+
+    def __init__(self, read: Callable[[bool], ViewState], callback: Callable[[ViewState, bool], None]):
+        self.read = read  # read(rescan) -> ViewState
+        self.callback = callback  # callback(state, rescanned), called from the refresher thread
+        self._cond = threading.Condition()
+        self._requested = False
+        self._rescan = False
+        self._stopped = False
+        self._thread = None
+        self.requested = 0
+        self.reads = 0
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="ViewRefresher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def request(self, rescan: bool = False) -> None:
+        """Queue a read; with rescan, the backends are enumerated again first, e.g. for the Refresh button."""
+        with self._cond:
+            self.requested += 1
+            self._requested = True
+            self._rescan = self._rescan or rescan
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._requested or self._stopped):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                rescan, self._requested, self._rescan = self._rescan, False, False
+            try:
+                state = self.read(rescan)
+                self.reads += 1
+                self.callback(state, rescan)
+            except Exception as e:
+                logger.error(f"Error refreshing the view: {e}")
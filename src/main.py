@@ -1,19 +1,92 @@
 # src/main.py
+import argparse
 import logging
-import tkinter as tk
 
-from gui.app import App
+from services.control import CONTROL_PORT, ControlServer
+from services.dwell import DWELL_MS
+from services.engine import RoutingEngine
+from services.metrics import METRICS, MetricsServer
+from window.monitor_topology import LARGEST_OVERLAP, SPANNING_POLICIES
+from window.window_utils import WindowUtils
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-def main():
+def parse_args():
+    parser = argparse.ArgumentParser(description="Route application audio to the output device of its screen.")
+    parser.add_argument("--headless", action="store_true",
+                        help="run only the routing engine, without a window; control it with ctl.py")
+    parser.add_argument("--control-port", type=int,
+                        help=f"accept control commands on 127.0.0.1:PORT (headless default: {CONTROL_PORT})")
+    parser.add_argument("--metrics-port", type=int,
+                        help="serve a JSON metrics snapshot on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", help="write a JSON metrics snapshot to this file on exit")
+    parser.add_argument("--spanning", choices=SPANNING_POLICIES, default=LARGEST_OVERLAP,
+                        help="screen of a window spanning two monitors: the one holding most of it, or the one "
+                             "under its centre (default: %(default)s)")
+    parser.add_argument("--dwell-ms", type=int, default=DWELL_MS,
+                        help="re-route a window's app only after the window stayed on a screen this long; moves "
+                             "are held until the drag ends (default: %(default)s, 0 routes at once)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record focus, window, device and route changes to FILE, to replay with "
+                             "python -m benchmarks.replay FILE")
+    parser.add_argument("--trace-titles", action="store_true",
+                        help="include window titles in the trace, so rules matching on titles replay too")
+    return parser.parse_args()
+
+
+def run_headless(engine: RoutingEngine):
+    engine.start()
+    try:
+        # Waiting in short steps keeps Ctrl+C responsive on Windows.
+        while not engine.stop_event.wait(0.5):
+            pass
+    except KeyboardInterrupt:
+        pass
+    engine.stop()
+
+
+def run_gui(engine: RoutingEngine):
+    # Tk is only imported for the window, so the headless engine never loads it.
+    import tkinter as tk
+    from gui.app import App
+
     root = tk.Tk()
-    app = App(root)
+    app = App(root, engine)
     root.mainloop()
 
 
+def main():
+    args = parse_args()
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server = MetricsServer(args.metrics_port)
+        metrics_server.start()
+
+    WindowUtils.set_spanning_policy(args.spanning)
+    engine = RoutingEngine(dwell_ms=args.dwell_ms, trace_path=args.trace, trace_titles=args.trace_titles)
+    control_port = args.control_port
+    if control_port is None and args.headless:
+        control_port = CONTROL_PORT
+    control_server = None
+    if control_port is not None:
+        control_server = ControlServer(engine, control_port)
+        control_server.start()
+
+    if args.headless:
+        run_headless(engine)
+    else:
+        run_gui(engine)
+
+    if control_server is not None:
+        control_server.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
+    if args.metrics_file:
+        METRICS.dump(args.metrics_file)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
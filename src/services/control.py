@@ -0,0 +1,188 @@
+# src/services/control.py
+import hmac
+import inspect
+import json
+import logging
+import os
+import secrets
+import socket
+import socketserver
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from services.engine import RoutingEngine
+
+logger = logging.getLogger(__name__)
+
+CONTROL_PORT = 8766
+MAX_REQUEST_BYTES = 64 * 1024
+# In the user's profile, which only that user can read on Windows; elsewhere the token files are mode 0600.
+TOKEN_DIR = Path(os.environ.get("LOCALAPPDATA") or Path.home()) / "ScreenAudioMapper"
+
+# The protocol is one JSON object per line in each direction:
+#   request  {"command": "set_mapping", "screen": "Screen1", "device": "Speakers", "token": "..."}
+#   response {"ok": true, "result": ...} or {"ok": false, "error": "..."}
+# token is the secret the server wrote to token_file(port) when it started. The first line that is not a valid
+# request is answered with an error and the connection is closed, so other protocols, such as an HTTP request a
+# web page sends to the port, cannot smuggle requests in.
+
+
+class RequestError(ValueError):
+    """A request line that is malformed, unauthenticated or names no valid command; its connection is closed."""
+
+
+def token_file(port: int) -> Path:
+    return TOKEN_DIR / f"control-{port}.token"
+
+
+def write_token(path: Path) -> str:
+    """Create a new secret and write it to path, readable by the current user only; return it."""
+    token = secrets.token_urlsafe(32)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        path.unlink()  # created afresh, so an existing file's permissions are not kept
+    except FileNotFoundError:
+        pass
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(token)
+    return token
+
+
+def read_token(path: Path) -> str:
+    return path.read_text().strip()
+
+
+class ControlServer:
+    """Local control socket for a RoutingEngine, bound to the loopback interface only.
+
+    Every request must carry the token start() writes to token_path, token_file(port) unless given; it is new
+    on every run.
+    """
+
+    def __init__(self, engine: RoutingEngine, port: int = CONTROL_PORT, token_path: Optional[Path] = None):
+        self.engine = engine
+        self.token: Optional[str] = None
+        self.commands: Dict[str, Callable[..., object]] = {
+            "screens": lambda: engine.screens,
+            "devices": lambda: engine.devices,
+            "endpoints": lambda: engine.endpoints,
+            "mappings": lambda: dict(engine.config),
+            "set_mapping": lambda screen, device: dict(engine.set_mappings({screen: device})),
+            "set_mappings": lambda mappings: dict(engine.set_mappings(mappings)),
+            "profiles": engine.profiles,
+            "rules": lambda: engine.config.rules.to_json(),
+            "set_rules": lambda rules: engine.set_rules(rules).to_json(),
+            "sessions": lambda device=None: engine.sessions(device),
+            "mute": lambda processes, action="toggle": engine.mute(processes, action),
+            "refresh": lambda: dict(engine.refresh_devices()),
+            "routes": lambda: {str(pid): device_id for pid, device_id in engine.routes().items()},
+            "stats": engine.stats,
+            "stop": self._stop_engine,
+        }
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                while True:
+                    line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+                    if not line:
+                        return
+                    try:
+                        response = server.dispatch(line)
+                    except RequestError as e:
+                        self.wfile.write(json.dumps({"ok": False, "error": str(e)}).encode() + b"\n")
+                        return
+                    self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        self._server = socketserver.ThreadingTCPServer(("127.0.0.1", port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self.token_path = token_path or token_file(self.port)
+        self._thread: Optional[threading.Thread] = None
+
+    def _stop_engine(self) -> None:
+        # Answer first; the owner of the engine notices stop_event and shuts down.
+        self.engine.stop_event.set()
+
+    def dispatch(self, line: bytes) -> dict:
+        """Run one request line and return the response object.
+
+        Raises RequestError if the line is not a valid request; errors of the command itself are returned.
+        """
+        if len(line) > MAX_REQUEST_BYTES:
+            raise RequestError("Request too large")
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise RequestError("Request must be a line of JSON")
+        if not isinstance(request, dict):
+            raise RequestError("Request must be a JSON object")
+        token = request.pop("token", None)
+        if self.token is None or not isinstance(token, str) or \
+                not hmac.compare_digest(token.encode(), self.token.encode()):
+            raise RequestError("Invalid or missing token")
+        name = request.pop("command", None)
+        command = self.commands.get(name) if isinstance(name, str) else None
+        if command is None:
+            raise RequestError(f"Unknown command, expected one of: {', '.join(self.commands)}")
+        try:
+            inspect.signature(command).bind(**request)
+        except TypeError as e:
+            raise RequestError(f"Invalid arguments for {name}: {e}")
+        try:
+            return {"ok": True, "result": command(**request)}
+        except ValueError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"Error handling control request {name}: {e}")
+            return {"ok": False, "error": str(e)}
+
+    def start(self) -> None:
+        self.token = write_token(self.token_path)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="ControlServer", daemon=True)
+        self._thread.start()
+        logger.info(f"Accepting control commands on 127.0.0.1:{self.port}")
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+        if self.token is not None:
+            try:
+                if read_token(self.token_path) == self.token:  # not one written by another instance since
+                    self.token_path.unlink()
+            except OSError:
+                pass
+            self.token = None
+
+
+class ControlClient:
+    """Client of a ControlServer; each request is answered on the same connection.
+
+    The token is read from the server's token file, token_file(port), unless given.
+    """
+
+    def __init__(self, port: int = CONTROL_PORT, timeout: float = 5.0, token: Optional[str] = None):
+        self.token = token if token is not None else read_token(token_file(port))
+        self._socket = socket.create_connection(("127.0.0.1", port), timeout=timeout)
+        self._file = self._socket.makefile("rwb")
+
+    def request(self, command: str, **arguments):
+        """Send a command and return its result, raising RuntimeError if the engine rejected it."""
+        self._file.write(json.dumps(dict(arguments, command=command, token=self.token)).encode() + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise ConnectionError("Control connection closed")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
@@ -0,0 +1,101 @@
+# src/services/dwell.py
+import logging
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from services.metrics import METRICS
+
+logger = logging.getLogger(__name__)
+
+DWELL_MS = 200  # time a window must stay on a screen before its process is re-routed
+MOVE_TIMEOUT = 30.0  # seconds after which a move/size loop without an end event is considered over
+
+
+class PendingRoute(NamedTuple):
+    hwnd: int
+    device_id: str
+    since: float  # when the window got to the screen of device_id
+    timestamp: float  # perf_counter time of the event that proposed it, for latency metrics
+
+
+class DwellPolicy:
+    """Holds foreground routes back until the window has stayed on its screen for dwell_ms and is not being dragged.
+
+    A route that changes again while held replaces the held one, and one back to the endpoint the process already
+    has cancels it, so a burst of focus changes or a drag across screens ends in at most one call per process.
+    Times are passed in by the caller, so scripted timelines replay deterministically.
+    """
+
+    def __init__(self, dwell_ms: float = DWELL_MS):
+        self.dwell = dwell_ms / 1000
+        self._pending: Dict[int, PendingRoute] = {}  # pid -> route waiting for its dwell time
+        self._settled: List[Tuple[int, str]] = []
+        self._moving: Dict[int, float] = {}  # hwnd -> when its move/size loop started
+        self.suppressed = 0
+        self.committed = 0
+
+    def move_started(self, hwnd: int, now: float) -> None:
+        # Loops whose end was never seen, e.g. because the window closed while dragged, are dropped here.
+        self._moving = {other: started for other, started in self._moving.items() if now - started < MOVE_TIMEOUT}
+        self._moving[hwnd] = now
+
+    def move_ended(self, hwnd: int, now: float) -> None:
+        self._moving.pop(hwnd, None)
+
+    def _suppress(self, pid: int) -> None:
+        del self._pending[pid]
+        self.suppressed += 1
+        METRICS.incr("routes.dwell_suppressed")
+
+    def propose(self, hwnd: int, pid: int, device_id: str, current: Optional[str], now: float,
+                timestamp: float = 0.0) -> None:
+        """Offer the route the foreground window's process should get; current is the endpoint it has now."""
+        pending = self._pending.get(pid)
+        if device_id == current:
+            if pending is not None:
+                self._suppress(pid)
+            self._settled.append((pid, device_id))
+            return
+        if pending is not None:
+            if pending.device_id == device_id:
+                return  # still on the same screen; the dwell time keeps running
+            self._suppress(pid)
+        self._pending[pid] = PendingRoute(hwnd, device_id, now, timestamp)
+
+    @property
+    def holding(self) -> bool:
+        return bool(self._pending)
+
+    def holds(self, pid: int) -> bool:
+        """Whether a route of pid is being held back, so background routing must leave it alone too."""
+        return pid in self._pending
+
+    def _due_at(self, route: PendingRoute) -> float:
+        started = self._moving.get(route.hwnd)
+        if started is not None:
+            return started + MOVE_TIMEOUT
+        return route.since + self.dwell
+
+    def take_due(self, now: float) -> List[Tuple[int, str, float]]:
+        """Return the (pid, device_id, timestamp) routes to issue now, including routes that need no call."""
+        due = [(pid, device_id, 0.0) for pid, device_id in self._settled]
+        self._settled = []
+        for pid, route in list(self._pending.items()):
+            if self._due_at(route) <= now:
+                del self._pending[pid]
+                self._moving.pop(route.hwnd, None)
+                self.committed += 1
+                METRICS.incr("routes.dwell_committed")
+                due.append((pid, route.device_id, route.timestamp))
+        return due
+
+    def time_until_due(self, now: float) -> Optional[float]:
+        """Seconds until the next held route is due, or None if nothing is held."""
+        if self._settled:
+            return 0.0
+        if not self._pending:
+            return None
+        return max(0.0, min(self._due_at(route) for route in self._pending.values()) - now)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "moving": len(self._moving),
+                "suppressed": self.suppressed, "committed": self.committed}
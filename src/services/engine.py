@@ -0,0 +1,216 @@
+# src/services/engine.py
+import logging
+import threading
+from typing import Dict, List, Optional, Union
+
+from audio.audio_service import MUTE, TOGGLE, UNMUTE, AudioService
+from config.rules import RuleSet, parse_rules
+from config.settings import ConfigSnapshot, ConfigStore, load_config, load_profiles, load_rules, save_config
+from services.dwell import DWELL_MS
+from services.metrics import METRICS
+from services.monitor_service import start_monitor
+from services.processes import ProcessTable
+from services.route_journal import RouteJournal
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from services.startup import StartupPipeline
+from services.trace import TraceRecorder
+from window.monitor_topology import layout_fingerprint
+from window.window_utils import WindowUtils
+
+logger = logging.getLogger(__name__)
+
+MUTE_ACTIONS = {"unmute": UNMUTE, "mute": MUTE, "toggle": TOGGLE}
+
+
+class RoutingEngine:
+    """The monitor and routing engine without any UI; the GUI and the control socket are both clients of it."""
+
+    def __init__(self, process_table: Optional[ProcessTable] = None, dwell_ms: float = DWELL_MS,
+                 trace_path: Optional[str] = None, trace_titles: bool = False):
+        self.dwell_ms = dwell_ms
+        self.startup = StartupPipeline()
+        snapshot = self.startup.take_snapshot()
+        self.screens: List[dict] = snapshot.screens
+        mapping, endpoints = load_config()
+        # Each display layout has its own mappings; the saved ones of the current layout win over the flat mapping.
+        self.config_store = ConfigStore(mapping, load_rules(), endpoints, WindowUtils.get_topology().fingerprint,
+                                        load_profiles())
+        # Routes applied before a restart are adopted, so the first sweep only issues the missing or changed ones.
+        self.journal = RouteJournal()
+        applied = AppliedRoutes(process_table, journal=self.journal)
+        applied.restore(self.journal.load())
+        self.journal.start()
+        self.route_queue = RouteQueue(applied)
+        self.startup.watch_routes(self.route_queue)
+        self.recorder = None
+        if trace_path is not None:
+            self.recorder = TraceRecorder(trace_path, applied.process_table, titles=trace_titles)
+            self.route_queue.add_listener(self.recorder.route)
+            self.route_queue.session_index.add_listener(self.recorder.session)
+        self.stop_event = threading.Event()
+        self.monitoring_thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        WindowUtils.get_topology().add_listener(self._on_topology_changed)
+
+    def _on_topology_changed(self, screens) -> None:
+        # Mappings are kept by screen name per layout; docking or undocking swaps in the new layout's profile,
+        # which the running monitor picks up like any config change.
+        self.screens = [{"name": screen.name, "position": screen.rect, "device_name": screen.device_name}
+                        for screen in screens]
+        layout = layout_fingerprint(screens)
+        with self._lock:
+            known = layout in self.config.profiles
+            snapshot = self.config_store.switch_layout(layout)
+            if not known:
+                save_config(snapshot)  # the new layout's profile is kept across restarts like any mapping
+
+    @property
+    def devices(self) -> Dict[str, str]:
+        """Friendly name -> endpoint ID of the active output devices, kept current by endpoint notifications."""
+        return AudioService.get_all_output_devices()
+
+    @property
+    def endpoints(self) -> Dict[str, str]:
+        """Endpoint ID -> friendly name of the active output devices; unlike devices, names may repeat."""
+        return AudioService.get_active_endpoints()
+
+    @property
+    def config(self) -> ConfigSnapshot:
+        """The current, read-only config snapshot."""
+        return self.config_store.current
+
+    def start(self) -> None:
+        """Start routing if anything is mapped or a rule exists; otherwise the monitor starts with the first mapping."""
+        if self.config or self.config.rules:
+            self.start_monitoring()
+
+    def start_monitoring(self) -> None:
+        with self._lock:
+            if self.monitoring_thread is None:
+                if self.recorder is not None:
+                    self.recorder.start(self.config, self.route_queue.applied.items(), self.dwell_ms)
+                self.monitoring_thread = start_monitor(self.config_store, self.route_queue, self.stop_event,
+                                                       dwell_ms=self.dwell_ms, recorder=self.recorder)
+
+    def stop(self) -> None:
+        self.stop_event.set()
+        if self.monitoring_thread is not None:
+            self.monitoring_thread.join()
+        self.journal.stop()
+        if self.recorder is not None:
+            self.recorder.stop()
+
+    def set_mappings(self, mappings: Dict[str, str]) -> ConfigSnapshot:
+        """Map screens to devices by endpoint ID ('' unmaps a screen), save the config and apply it to the running
+        monitor.
+
+        A device may also be given by its name if no other active device has it. A screen may keep its current
+        device while that device is unplugged; the mapping stays dormant.
+        """
+        with self._lock:
+            current = self.config
+            active = self.endpoints
+            screens = {screen["name"] for screen in self.screens}
+            config = dict(current)
+            endpoints = dict(current.endpoints)
+            for screen, device in mappings.items():
+                if screen not in screens:
+                    raise ValueError(f"Unknown screen: {screen}")
+                if not device:
+                    config.pop(screen, None)
+                    endpoints.pop(screen, None)
+                elif device in active:
+                    config[screen], endpoints[screen] = active[device], device
+                elif device not in (current.endpoints.get(screen), current.get(screen)):
+                    device_id = self._device_id(device, active)
+                    config[screen], endpoints[screen] = device, device_id
+            # Mappings saved by name only, before endpoint IDs were kept, are stored by the ID of their device.
+            for screen, device in config.items():
+                if screen not in endpoints:
+                    matches = [device_id for device_id, name in active.items() if name == device]
+                    if len(matches) == 1:
+                        endpoints[screen] = matches[0]
+            snapshot = self.config_store.publish(config, endpoints=endpoints)
+            if snapshot is not current:
+                save_config(snapshot)
+        # The running monitor picks up the new snapshot on its next wakeup.
+        self.start_monitoring()
+        return snapshot
+
+    @staticmethod
+    def _device_id(device: str, active: Dict[str, str]) -> str:
+        """Return the endpoint ID of the only active device named device."""
+        matches = [device_id for device_id, name in active.items() if name == device]
+        if not matches:
+            raise ValueError(f"Unknown device: {device}")
+        if len(matches) > 1:
+            raise ValueError(f"Several devices are named {device}; give one of their endpoint IDs: "
+                             f"{', '.join(matches)}")
+        return matches[0]
+
+    def set_rules(self, section: dict) -> RuleSet:
+        """Replace the routing rules with a rules section (see config.rules), save it and apply it."""
+        rules = parse_rules(section)
+        with self._lock:
+            save_config(self.config, rules)
+            self.config_store.publish(self.config, rules)
+        self.start_monitoring()
+        return rules
+
+    def refresh_devices(self) -> ConfigSnapshot:
+        """Re-read screens and devices; mappings to devices that are gone stay in the config, dormant."""
+        with self._lock:
+            AudioService.refresh_devices()
+            self.screens = WindowUtils.detect_screens()
+            dormant = self.config.dormant(AudioService.get_active_endpoints())
+            if dormant:
+                logger.info(f"Devices of {', '.join(dormant)} are unavailable; their mappings wait for them")
+            return self.config
+
+    def sessions(self, device: Optional[str] = None) -> List[dict]:
+        """Return the live audio sessions from the session index, only those on the given device if any.
+
+        The device is an endpoint ID, or the name of the only active device that has it.
+        """
+        endpoints = self.endpoints
+        device_id = None
+        if device is not None:
+            device_id = device if device in endpoints else self._device_id(device, endpoints)
+        index = AudioService.get_session_index()
+        return [
+            {"pid": session.pid, "process": index.process_name(session.pid),
+             "device": endpoints.get(session.device_id, session.device_id), "muted": session.muted}
+            for session in AudioService.list_sessions(device_id)
+        ]
+
+    def mute(self, processes: Union[str, List[str]], action: str = "toggle") -> Dict[str, Optional[bool]]:
+        """Mute, unmute or toggle every session of each named process; return whether each is now muted."""
+        if isinstance(processes, str):
+            processes = [processes]
+        if action not in MUTE_ACTIONS:
+            raise ValueError(f"Unknown mute action {action!r}, expected one of {', '.join(MUTE_ACTIONS)}")
+        return AudioService.set_processes_mute(processes, MUTE_ACTIONS[action])
+
+    def profiles(self) -> Dict[str, Dict[str, str]]:
+        """Return the screen -> device name mappings saved for each display layout, by layout fingerprint."""
+        return {layout: dict(profile.mapping) for layout, profile in self.config.profiles.items()}
+
+    def routes(self) -> Dict[int, str]:
+        """Return the pid -> endpoint ID routes currently applied."""
+        return dict(self.route_queue.applied.items())
+
+    def stats(self) -> dict:
+        return {
+            "config_version": self.config.version,
+            "layout": self.config.layout,
+            "layout_profiles": len(self.config.profiles),
+            "dormant_mappings": self.config.dormant(AudioService.get_active_endpoints()),
+            "monitoring": self.monitoring_thread is not None and self.monitoring_thread.is_alive(),
+            "startup_ms": {name: round(seconds * 1000, 3) for name, seconds in self.startup.timings.items()},
+            "route_queue": self.route_queue.stats(),
+            "applied_routes": self.route_queue.applied.stats(),
+            "journal": self.journal.stats(),
+            "com_executor": AudioService.get_executor().stats(),
+            "metrics": METRICS.snapshot(),
+        }
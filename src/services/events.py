@@ -0,0 +1,292 @@
+# src/services/events.py
+import logging
+import queue
+import sys
+import threading
+import time
+from typing import List, NamedTuple, Optional
+
+from window.window_utils import WindowUtils
+
+logger = logging.getLogger(__name__)
+
+POLLING_INTERVAL = 0.1  # seconds, fastest polling rate of the fallback source
+MAX_POLLING_INTERVAL = 1.0  # seconds, slowest polling rate when nothing changes
+POLLING_BACKOFF = 1.5
+
+FOREGROUND = "foreground"
+LOCATION = "location"
+MOVE_START = "move_start"  # the user started dragging or resizing a window
+MOVE_END = "move_end"
+DISPLAY = "display"  # monitors were attached, detached or rearranged
+WAKE = "wake"
+
+
+class WindowEvent(NamedTuple):
+    kind: str
+    hwnd: int
+    timestamp: float
+
+
+class EventSource:
+    """Base class for sources of foreground and window-move events consumed by the monitor loop."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self.wakeups = 0
+
+    def start(self) -> None:
+        """Start producing events."""
+
+    def stop(self) -> None:
+        """Stop producing events and release any hooks."""
+
+    def post(self, kind: str, hwnd: int) -> None:
+        """Queue an event for the consumer."""
+        self._queue.put(WindowEvent(kind, hwnd, time.perf_counter()))
+
+    def wake(self) -> None:
+        """Wake a consumer blocked in get(), e.g. so it can notice a stop request."""
+        self.post(WAKE, 0)
+
+    def _get(self, timeout: Optional[float]) -> Optional[WindowEvent]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WindowEvent]:
+        """Block until the next event arrives, or return None after timeout seconds; each return is one wakeup."""
+        event = self._get(timeout)
+        self.wakeups += 1
+        return event
+
+    def drain(self) -> List[WindowEvent]:
+        """Return every event that is already queued without blocking."""
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def ack(self, event: WindowEvent) -> None:
+        """Called by the consumer once an event has been fully handled."""
+
+
+class SyntheticEventSource(EventSource):
+    """Event source driven by explicit emit() calls, used to exercise the monitor loop off Windows."""
+
+    def __init__(self):
+        super().__init__()
+        self.latencies = []
+
+    def emit(self, hwnd: int, kind: str = FOREGROUND) -> None:
+        self.post(kind, hwnd)
+
+    def ack(self, event: WindowEvent) -> None:
+        if event.kind != WAKE:
+            self.latencies.append(time.perf_counter() - event.timestamp)
+
+
+class PollingEventSource(EventSource):
+    """Fallback source that samples the foreground window, backing off while nothing changes."""
+
+    def __init__(self, min_interval: float = POLLING_INTERVAL, max_interval: float = MAX_POLLING_INTERVAL):
+        super().__init__()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self._last = None
+
+    def _sample(self) -> Optional[WindowEvent]:
+        hwnd = WindowUtils.get_foreground_window()
+        state = (hwnd, WindowUtils.get_window_monitor(hwnd)) if hwnd else None
+        if state == self._last:
+            self.interval = min(self.interval * POLLING_BACKOFF, self.max_interval)
+            return None
+        self._last = state
+        self.interval = self.min_interval
+        return WindowEvent(FOREGROUND, hwnd, time.perf_counter()) if hwnd else None
+
+    def get(self, timeout: Optional[float] = None) -> Optional[WindowEvent]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            try:
+                event = self._sample()
+            except Exception as e:
+                logger.error(f"Error polling foreground window: {e}")
+                event = None
+            if event is None:
+                wait = self.interval
+                if deadline is not None:
+                    wait = min(wait, deadline - time.monotonic())
+                    if wait <= 0:
+                        break
+                event = self._get(wait)  # posted events, e.g. a wake on stop, end the wait early
+            if event is not None:
+                break
+        self.wakeups += 1
+        return event
+
+
+class WinEventHookSource(EventSource):
+    """Source fed by SetWinEventHook foreground and location-change notifications.
+
+    A hidden window on the hook thread turns WM_DISPLAYCHANGE, which is only sent to top-level windows, into
+    display events.
+    """
+
+    EVENT_SYSTEM_FOREGROUND = 0x0003
+    EVENT_SYSTEM_MOVESIZESTART = 0x000A
+    EVENT_SYSTEM_MOVESIZEEND = 0x000B
+    EVENT_SYSTEM_MINIMIZEEND = 0x0017
+    EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+    WINEVENT_OUTOFCONTEXT = 0x0000
+    WINEVENT_SKIPOWNPROCESS = 0x0002
+    OBJID_WINDOW = 0
+    WM_DISPLAYCHANGE = 0x007E
+    WM_QUIT = 0x0012
+    WINDOW_CLASS = "ScreenAudioMapperDisplayChange"
+
+    def __init__(self):
+        super().__init__()
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="WinEventHook", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def stop(self) -> None:
+        if self._thread_id is not None:
+            import ctypes
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, self.WM_QUIT, 0, 0)
+            self._thread.join()
+            self._thread_id = None
+
+    def _run(self) -> None:
+        import ctypes
+        from ctypes import wintypes
+
+        user32 = ctypes.windll.user32
+        kernel32 = ctypes.windll.kernel32
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD,
+        )
+        WNDPROC = ctypes.WINFUNCTYPE(ctypes.c_ssize_t, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+
+        def callback(hook, event, hwnd, id_object, id_child, thread, time_ms):
+            if not hwnd or id_object != self.OBJID_WINDOW:
+                return
+            if event == self.EVENT_OBJECT_LOCATIONCHANGE:
+                if hwnd != user32.GetForegroundWindow():
+                    return
+                self.post(LOCATION, hwnd)
+            elif event == self.EVENT_SYSTEM_MOVESIZESTART:
+                self.post(MOVE_START, hwnd)
+            elif event == self.EVENT_SYSTEM_MOVESIZEEND:
+                self.post(MOVE_END, hwnd)
+            else:
+                self.post(FOREGROUND, hwnd)
+
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+        ]
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        user32.GetForegroundWindow.restype = wintypes.HWND
+
+        proc = WinEventProc(callback)
+        ranges = [
+            (self.EVENT_SYSTEM_FOREGROUND, self.EVENT_SYSTEM_FOREGROUND),
+            (self.EVENT_SYSTEM_MOVESIZESTART, self.EVENT_SYSTEM_MOVESIZEEND),
+            (self.EVENT_SYSTEM_MINIMIZEEND, self.EVENT_SYSTEM_MINIMIZEEND),
+            (self.EVENT_OBJECT_LOCATIONCHANGE, self.EVENT_OBJECT_LOCATIONCHANGE),
+        ]
+        flags = self.WINEVENT_OUTOFCONTEXT | self.WINEVENT_SKIPOWNPROCESS
+        hooks = [user32.SetWinEventHook(low, high, 0, proc, 0, 0, flags) for low, high in ranges]
+
+        if not all(hooks):
+            for hook in filter(None, hooks):
+                user32.UnhookWinEvent(hook)
+            self._error = OSError("SetWinEventHook failed")
+            self._ready.set()
+            return
+
+        def window_callback(hwnd, message, wparam, lparam):
+            if message == self.WM_DISPLAYCHANGE:
+                self.post(DISPLAY, 0)
+            return user32.DefWindowProcW(hwnd, message, wparam, lparam)
+
+        window_proc = WNDPROC(window_callback)
+        display_window = self._create_display_window(user32, kernel32, window_proc)
+
+        msg = wintypes.MSG()
+        user32.PeekMessageW(ctypes.byref(msg), 0, 0, 0, 0)  # create the thread's message queue
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._ready.set()
+        self.post(FOREGROUND, user32.GetForegroundWindow() or 0)
+
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+        for hook in hooks:
+            user32.UnhookWinEvent(hook)
+        if display_window:
+            user32.DestroyWindow(display_window)
+            user32.UnregisterClassW(self.WINDOW_CLASS, kernel32.GetModuleHandleW(None))
+
+    def _create_display_window(self, user32, kernel32, window_proc):
+        """Create the hidden top-level window that receives WM_DISPLAYCHANGE; return its handle, or None."""
+        import ctypes
+        from ctypes import wintypes
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [("style", wintypes.UINT), ("lpfnWndProc", type(window_proc)), ("cbClsExtra", ctypes.c_int),
+                        ("cbWndExtra", ctypes.c_int), ("hInstance", wintypes.HINSTANCE), ("hIcon", wintypes.HICON),
+                        ("hCursor", wintypes.HANDLE), ("hbrBackground", wintypes.HBRUSH),
+                        ("lpszMenuName", wintypes.LPCWSTR), ("lpszClassName", wintypes.LPCWSTR)]
+
+        kernel32.GetModuleHandleW.restype = wintypes.HMODULE
+        user32.CreateWindowExW.restype = wintypes.HWND
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD, ctypes.c_int, ctypes.c_int,
+            ctypes.c_int, ctypes.c_int, wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+        ]
+        user32.DefWindowProcW.restype = ctypes.c_ssize_t
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        instance = kernel32.GetModuleHandleW(None)
+        wndclass = WNDCLASSW(lpfnWndProc=window_proc, hInstance=instance, lpszClassName=self.WINDOW_CLASS)
+        window = None
+        if user32.RegisterClassW(ctypes.byref(wndclass)):
+            # Not a message-only window: those do not get the broadcast. It is never shown.
+            window = user32.CreateWindowExW(0, self.WINDOW_CLASS, self.WINDOW_CLASS, 0, 0, 0, 0, 0, None, None,
+                                            instance, None)
+        if not window:
+            logger.warning("Display changes will only be noticed by the periodic sweeps: "
+                           f"creating a window failed with error {ctypes.GetLastError()}")
+        return window
+
+
+def create_event_source() -> EventSource:
+    """Create and start the best available event source, falling back to adaptive polling."""
+    if sys.platform == "win32":
+        source = WinEventHookSource()
+        try:
+            source.start()
+            return source
+        except Exception as e:
+            logger.warning(f"Window event hooks unavailable, falling back to polling: {e}")
+
+    source = PollingEventSource()
+    source.start()
+    return source
@@ -1,38 +1,55 @@
 # src/services/helpers.py
 import logging
+from typing import Optional
 
 from audio.audio_service import AudioService
+from services.rule_matcher import RuleMatcher, screen_endpoint, target_device
+from window.window_index import WindowIndex
 from window.window_utils import WindowUtils
 
 logger = logging.getLogger(__name__)
 
 
-def get_pid_mapping(config: dict) -> dict:
-    """Get the PID to device mapping from the config."""
+def get_pid_mapping(config: dict, window_index: WindowIndex = None, matcher: Optional[RuleMatcher] = None) -> dict:
+    """Get the PID to device mapping from the config, rebuilding the shared window index unless one is given.
+
+    The config's rules are applied when a matcher is given; titles are only read if some rule matches on them.
+    """
     pid_to_device = {}
-    pid_to_screen = WindowUtils.get_screen_pids()
+    if window_index is None:
+        window_index = WindowUtils.get_window_index()
+        window_index.rebuild()
     audio_devices = AudioService.get_all_output_devices()
-
-    for pid, screen in pid_to_screen.items():
-        if screen in config:
-            target_device_name = config[screen]
-            target_device_id = audio_devices[target_device_name]
+    active = AudioService.get_active_endpoints()
+    rules = getattr(config, "rules", None) if matcher is not None else None
+
+    targets = {}  # screen -> endpoint ID, resolved once per screen
+
+    def screen_target(screen: str) -> Optional[str]:
+        if screen not in targets:
+            targets[screen] = screen_endpoint(config, screen, audio_devices, active)
+        return targets[screen]
+
+    if not rules:
+        for pid, screen in window_index.screen_pids().items():
+            target_device_id = screen_target(screen)
+            if target_device_id:
+                pid_to_device[pid] = target_device_id
+        return pid_to_device
+
+    backend = WindowUtils.get_backend()
+    for pid, entry in window_index.top_windows().items():
+        try:
+            title = backend.get_window_text(entry.hwnd) if rules.uses_titles else None
+        except OSError:
+            continue  # closed since the index was built
+        rule = matcher.match(rules, pid, title)
+        if rule is None:
+            target_device_id = screen_target(entry.screen)
+        else:
+            target_device_id = target_device(config, entry.screen, rule, audio_devices, active)
+        if target_device_id:
             pid_to_device[pid] = target_device_id
 
     return pid_to_device
 
-
-def update_pid_mapping(old_pid_to_device: dict, config: dict) -> dict:
-    """Update the PID to device mapping."""
-    new_pid_to_device = get_pid_mapping(config)
-
-    if not old_pid_to_device:
-        for pid, device in new_pid_to_device.items():
-            AudioService.set_application_output_device(pid, device)
-        return new_pid_to_device
-
-    for pid, new_device in new_pid_to_device.items():
-        if pid not in old_pid_to_device or old_pid_to_device[pid] != new_device:
-            AudioService.set_application_output_device(pid, new_device)
-
-    return new_pid_to_device
\ No newline at end of file
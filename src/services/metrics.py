@@ -0,0 +1,177 @@
+# src/services/metrics.py
+import bisect
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in milliseconds of the histogram buckets; the last bucket holds everything slower.
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+DECISION_HISTORY = 256
+
+
+class Histogram:
+    """Latency histogram over fixed buckets, so recording never allocates."""
+
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+    def percentile(self, fraction: float) -> float:
+        """Return the upper bound of the bucket holding the given fraction of samples (max for the last one)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        buckets = {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(0.5), 3),
+            "p95_ms": round(self.percentile(0.95), 3),
+            "p99_ms": round(self.percentile(0.99), 3),
+            "max_ms": round(self.max, 3),
+            "buckets": buckets,
+        }
+
+
+class Metrics:
+    """Counters, latency histograms and a ring buffer of recent routing decisions, all behind one lock."""
+
+    def __init__(self, history: int = DECISION_HISTORY):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.decisions: Deque[dict] = deque(maxlen=history)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, ms: float) -> None:
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.record(ms)
+
+    @contextmanager
+    def timer(self, name: str):
+        """Record the duration of the with block in the histogram name, also when it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def decision(self, pid: int, device_id: str, outcome: str, latency_ms: Optional[float] = None) -> None:
+        """Remember a routing decision; only the last DECISION_HISTORY are kept."""
+        entry = {"time": time.time(), "pid": pid, "device_id": device_id, "outcome": outcome}
+        if latency_ms is not None:
+            entry["latency_ms"] = round(latency_ms, 3)
+        with self._lock:
+            self.decisions.append(entry)
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serialisable copy of everything recorded so far."""
+        with self._lock:
+            return {
+                "uptime_s": round(time.time() - self._started, 1),
+                "counters": dict(sorted(self.counters.items())),
+                "histograms": {name: h.snapshot() for name, h in sorted(self.histograms.items())},
+                "recent_decisions": list(self.decisions),
+            }
+
+    def dump(self, path: str) -> None:
+        """Write the snapshot to path atomically."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(self.snapshot(), f, indent=4)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started = time.time()
+            self.counters.clear()
+            self.histograms.clear()
+            self.decisions.clear()
+
+
+METRICS = Metrics()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        body = json.dumps(METRICS.snapshot(), indent=4).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics request: {format % args}")
+
+
+class MetricsServer:
+    """Serves the metrics snapshot as JSON on GET /metrics, bound to the loopback interface only."""
+
+    def __init__(self, port: int = 0):
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), _MetricsHandler)
+        self.port = self._server.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving metrics on http://127.0.0.1:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+
+def format_snapshot(snapshot: dict) -> List[str]:
+    """Render the counters and histograms of a snapshot as short text lines for display."""
+    lines = [f"{name}: {value}" for name, value in snapshot["counters"].items()]
+    for name, h in snapshot["histograms"].items():
+        lines.append(f"{name}: n={h['count']} p50={h['p50_ms']}ms p95={h['p95_ms']}ms max={h['max_ms']}ms")
+    return lines
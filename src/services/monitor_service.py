@@ -1,45 +1,156 @@
 # src/services/monitor_service.py
 import threading
 import logging
+import time
+from typing import List, Optional, Tuple
 
 from audio.audio_service import AudioService
+from config.settings import ConfigStore
 from window.window_utils import WindowUtils
+from services.dwell import DWELL_MS, DwellPolicy
+from services.events import DISPLAY, MOVE_END, MOVE_START, WAKE, EventSource, WindowEvent, create_event_source
+from services.metrics import METRICS
+from services.reconciler import Reconciler
+from services.route_queue import RouteQueue
+from services.rule_matcher import RuleMatcher, target_device
+from services.trace import TraceRecorder
 
 logger = logging.getLogger(__name__)
 
-POLLING_INTERVAL = 0.1  # seconds
 
+def _wake_on_stop(stop_event: threading.Event, source: EventSource):
+    stop_event.wait()
+    source.wake()
 
-def _monitor_loop(config: dict, pid_to_device: dict, stop_event: threading.Event):
+
+def _foreground_route(hwnd: int, config: dict, matcher: Optional[RuleMatcher] = None) -> Optional[Tuple[int, str]]:
+    """Return the (pid, device_id) the window's process should be routed to by a rule or its screen's mapping."""
+    pid, title, current_display_name = WindowUtils.get_window_info(hwnd)
+
+    rules = getattr(config, "rules", None)
+    rule = None
+    if matcher is not None and rules:
+        rule = matcher.match(rules, pid, title if rules.uses_titles else None)
+    target_device_id = target_device(config, current_display_name, rule, AudioService.get_all_output_devices(),
+                                     AudioService.get_active_endpoints())
+    if target_device_id:
+        return pid, target_device_id
+    return None
+
+
+def _handle_events(events: List[WindowEvent], config: dict, dwell: DwellPolicy, reconciler: Reconciler,
+                   now: float) -> List[Tuple[int, str, float]]:
+    """Run one monitor cycle: propose the foreground route of a burst of events, then reconcile the due routes.
+
+    Returns the (pid, device_id, event timestamp) foreground routes that moved a process to another endpoint.
+    """
+    pid_to_device = reconciler.applied
+    hwnds = [e.hwnd for e in events if e.kind != WAKE and e.hwnd]
+    for e in events:
+        if e.kind == MOVE_START:
+            dwell.move_started(e.hwnd, now)
+        elif e.kind == MOVE_END:
+            dwell.move_ended(e.hwnd, now)
+        elif e.kind == DISPLAY:
+            reconciler.displays_changed()
+    proposal = _foreground_route(hwnds[-1], config, reconciler.rules) if hwnds else None
+    if proposal is not None and not reconciler.layout_current(config):
+        proposal = None  # located on displays whose profile is not in yet; the layout switch routes it
+    if proposal is not None:
+        pid, device_id = proposal
+        # Timed from the oldest event of the burst, which is when the user acted.
+        first = next(e for e in events if e.kind != WAKE and e.hwnd)
+        dwell.propose(hwnds[-1], pid, device_id, pid_to_device.get(pid), now, first.timestamp)
+    due = dwell.take_due(now)
+    # A window's audio may play from other processes of its family, whose routes are the ones that move.
+    changed = [(pid, device_id, timestamp, reconciler.audio_pids(pid)) for pid, device_id, timestamp in due]
+    changed = [route for route in changed if any(pid_to_device.get(member) != route[1] for member in route[3])]
+    for pid, _, _, _ in changed:
+        logger.info(f"Updating audio device for foreground PID {pid}")
+    reconciler.reconcile(config, [(pid, device_id) for pid, device_id, _ in due])
+    return [(pid, device_id, timestamp) for pid, device_id, timestamp, members in changed
+            if all(pid_to_device.get(member) == device_id for member in members)]
+
+
+def _monitor_loop(config_store: ConfigStore, route_queue: RouteQueue, stop_event: threading.Event,
+                  event_source: Optional[EventSource] = None, dwell_ms: float = DWELL_MS,
+                  recorder: Optional[TraceRecorder] = None):
     logger.info("Starting monitor loop")
-    device_map = AudioService.get_all_output_devices()
-    
-    while not stop_event.is_set():
-        try:
-            pid, title, current_display_name = WindowUtils.get_active_window()
+    dwell = DwellPolicy(dwell_ms)
+    reconciler = Reconciler(WindowUtils.get_window_index(), route_queue, dwell=dwell, recorder=recorder)
 
-            if current_display_name and current_display_name in config and config[current_display_name]:
-                target_device_name = config[current_display_name]
-                target_device_id = device_map[target_device_name]
+    source = event_source or create_event_source()
+    route_queue.wake = source.wake
 
-                if pid not in pid_to_device or pid_to_device[pid] != target_device_id:
-                    logger.info(f"Updating audio device for PID {pid} on display {current_display_name}")
-                    pid_to_device[pid] = target_device_id
-                    AudioService.set_application_output_device(pid, target_device_id)
+    def wake_on_config(snapshot):
+        source.wake()
 
-            stop_event.wait(POLLING_INTERVAL)
+    # Endpoint notifications arrive on another thread, which must not call back into the enumerator.
+    devices_changed = threading.Event()
+    registry = AudioService.get_registry()
 
-        except Exception as e:
-            logger.error(f"Error in monitor loop: {str(e)}")
-            stop_event.wait(POLLING_INTERVAL)
+    def wake_on_devices(device_id):
+        devices_changed.set()
+        source.wake()
 
-def start_monitor(config: dict, pid_to_device: dict, stop_event: threading.Event) -> threading.Thread:
-    monitor_thread = threading.Thread(target=_monitor_loop, args=(config, pid_to_device, stop_event))
-    monitor_thread.daemon = True
-    monitor_thread.start()
-    return monitor_thread
+    config_store.add_listener(wake_on_config)
+    registry.add_listener(wake_on_devices)
+    threading.Thread(target=_wake_on_stop, args=(stop_event, source), daemon=True).start()
+
+    config = config_store.current
+    try:
+        while not stop_event.is_set():
+            timeout = reconciler.time_until_due()
+            dwell_due = dwell.time_until_due(time.monotonic())
+            event = source.get(timeout if dwell_due is None else min(timeout, dwell_due))
+
+            # Only the latest state matters, so a burst of queued events is handled once.
+            events = [event] + source.drain() if event is not None else []
+            METRICS.incr("monitor.iterations")
+            METRICS.incr("monitor.events", sum(1 for e in events if e.kind != WAKE and e.hwnd))
+            try:
+                if stop_event.is_set():
+                    break
+                if config_store.current is not config:
+                    layout_changed = config_store.current.layout != config.layout
+                    config = config_store.current
+                    logger.info(f"Applying config version {config.version}")
+                    if recorder is not None:
+                        recorder.config(config)
+                    if layout_changed:
+                        reconciler.layout_changed(config)
+                    else:
+                        reconciler.apply_config(config)
+                if devices_changed.is_set():
+                    devices_changed.clear()
+                    if recorder is not None:
+                        recorder.endpoints()
+                    reconciler.devices_changed()
+                if recorder is not None:
+                    recorder.events(events)
+                for pid, device_id, timestamp in _handle_events(events, config, dwell, reconciler, time.monotonic()):
+                    METRICS.observe("focus_to_route_ms", (time.perf_counter() - timestamp) * 1000)
+            except Exception as e:
+                logger.error(f"Error in monitor loop: {str(e)}")
+            finally:
+                for e in events:
+                    source.ack(e)
+    finally:
+        config_store.remove_listener(wake_on_config)
+        registry.remove_listener(wake_on_devices)
+        if event_source is None:
+            source.stop()
 
 
-if __name__ == "__main__":
-    start_monitor()
+def start_monitor(config_store: ConfigStore, route_queue: RouteQueue, stop_event: threading.Event,
+                  event_source: Optional[EventSource] = None, dwell_ms: float = DWELL_MS,
+                  recorder: Optional[TraceRecorder] = None) -> threading.Thread:
+    """Start the monitor loop; foreground routes are committed once a window stayed on a screen for dwell_ms.
 
+    A recorder is shown the config, endpoint, window and event changes the loop handles.
+    """
+    monitor_thread = threading.Thread(target=_monitor_loop,
+                                      args=(config_store, route_queue, stop_event, event_source, dwell_ms, recorder))
+    monitor_thread.daemon = True
+    monitor_thread.start()
+    return monitor_thread
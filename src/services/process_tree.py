@@ -0,0 +1,127 @@
+# src/services/process_tree.py
+import logging
+import threading
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional, Set
+
+from services.metrics import METRICS
+from services.processes import ProcessTable
+
+logger = logging.getLogger(__name__)
+
+# Apps whose audio is played by a child process (a renderer, utility or audio service process) of the one that
+# owns the window. Lower-case executable names.
+FAMILY_APPS = frozenset({"chrome.exe", "msedge.exe", "firefox.exe", "discord.exe", "spotify.exe"})
+
+
+class ProcessInfo(NamedTuple):
+    parent: Optional[int]
+    name: Optional[str]  # lower-cased
+    create_time: Optional[float]
+
+
+class ProcessTree:
+    """Cached parent/child snapshot of the process table, updated from PID diffs instead of full rescans.
+
+    Only processes that appeared since the last refresh are inspected; single processes can be added on demand,
+    e.g. when one opens an audio session between refreshes.
+    """
+
+    def __init__(self, table: ProcessTable, family_apps: Iterable[str] = FAMILY_APPS):
+        self.table = table
+        self.family_apps = frozenset(name.lower() for name in family_apps)
+        self._lock = threading.RLock()
+        self._processes: Dict[int, ProcessInfo] = {}
+        self._children: Dict[int, Set[int]] = {}
+        self._families: Dict[int, FrozenSet[int]] = {}
+        self.loaded = False
+
+    def _add(self, pid: int) -> Optional[ProcessInfo]:
+        create_time = self.table.create_time(pid)
+        if create_time is None:
+            return None
+        name = self.table.name(pid)
+        info = ProcessInfo(self.table.parent(pid), name.lower() if name else None, create_time)
+        self._processes[pid] = info
+        if info.parent:
+            self._children.setdefault(info.parent, set()).add(pid)
+        self._families.clear()
+        return info
+
+    def _remove(self, pid: int) -> None:
+        info = self._processes.pop(pid, None)
+        if info is not None and info.parent:
+            children = self._children.get(info.parent)
+            if children is not None:
+                children.discard(pid)
+                if not children:
+                    del self._children[info.parent]
+        self._families.clear()
+
+    def refresh(self) -> int:
+        """Bring the snapshot up to date with the running processes; return how many processes changed."""
+        live = self.table.pids()
+        with self._lock:
+            known = set(self._processes)
+            gone = known - live
+            new = live - known
+            for pid in gone:
+                self._remove(pid)
+            for pid in new:
+                self._add(pid)
+            self.loaded = True
+        if gone or new:
+            METRICS.incr("process_tree.changes", len(gone) + len(new))
+        return len(gone) + len(new)
+
+    def ensure(self, pid: int) -> Optional[ProcessInfo]:
+        """Return what is known about pid, reading just that process if it is new."""
+        with self._lock:
+            info = self._processes.get(pid)
+            if info is None:
+                info = self._add(pid)
+            return info
+
+    def _parent_of(self, pid: int, info: ProcessInfo) -> Optional[int]:
+        # Windows keeps the parent PID of an exited parent, which may since belong to an unrelated process;
+        # a real parent always started before its child.
+        parent = self.ensure(info.parent) if info.parent and info.parent != pid else None
+        if parent is None or parent.create_time > info.create_time:
+            return None
+        return info.parent
+
+    def family(self, pid: int) -> FrozenSet[int]:
+        """Return pid and the processes of the same multi-process app, found through the root of its process tree.
+
+        For executables outside family_apps, the family is pid alone.
+        """
+        if not self.loaded:
+            self.refresh()
+        with self._lock:
+            cached = self._families.get(pid)
+            if cached is not None:
+                return cached
+            info = self.ensure(pid)
+            if info is None or info.name not in self.family_apps:
+                return frozenset((pid,))
+            root = pid
+            while True:
+                parent = self._parent_of(root, self._processes[root])
+                if parent is None or self._processes[parent].name != info.name:
+                    break
+                root = parent
+            members = set()
+            stack = [root]
+            while stack:
+                member = stack.pop()
+                members.add(member)
+                stack.extend(child for child in self._children.get(member, ())
+                             if child not in members and self._processes[child].name == info.name
+                             and self._parent_of(child, self._processes[child]) == member)
+            family = frozenset(members)
+            for member in family:
+                self._families[member] = family
+            return family
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"processes": len(self._processes), "cached_families": len(self._families)}
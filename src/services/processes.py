@@ -0,0 +1,101 @@
+# src/services/processes.py
+import logging
+import time
+from collections import Counter
+from typing import Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessTable:
+    """Interface over the process list, used to tell a live process from a reused PID."""
+
+    def pids(self) -> Set[int]:
+        """Return the PIDs of all running processes."""
+        raise NotImplementedError
+
+    def create_time(self, pid: int) -> Optional[float]:
+        """Return the creation time of a running process, or None if it does not exist."""
+        raise NotImplementedError
+
+    def name(self, pid: int) -> Optional[str]:
+        """Return the executable name of a running process, e.g. 'Discord.exe', or None if it does not exist."""
+        raise NotImplementedError
+
+    def parent(self, pid: int) -> Optional[int]:
+        """Return the PID of the process that started pid; on Windows it may since have exited or been reused."""
+        raise NotImplementedError
+
+
+class PsutilProcessTable(ProcessTable):
+    """Process table on top of psutil."""
+
+    def __init__(self):
+        import psutil
+        self._psutil = psutil
+
+    def pids(self) -> Set[int]:
+        return set(self._psutil.pids())
+
+    def create_time(self, pid: int) -> Optional[float]:
+        try:
+            return self._psutil.Process(pid).create_time()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied, ValueError):
+            return None
+
+    def name(self, pid: int) -> Optional[str]:
+        try:
+            return self._psutil.Process(pid).name()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied, ValueError):
+            return None
+
+    def parent(self, pid: int) -> Optional[int]:
+        try:
+            return self._psutil.Process(pid).ppid()
+        except (self._psutil.NoSuchProcess, self._psutil.AccessDenied, ValueError):
+            return None
+
+
+class SimulatedProcessTable(ProcessTable):
+    """In-memory process table that can exit processes and hand their PIDs to new ones."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.processes: Dict[int, float] = {}
+        self.names: Dict[int, str] = {}
+        self.parents: Dict[int, int] = {}
+        self._next_pid = 1000
+        self._clock = 0.0
+
+    def spawn(self, pid: Optional[int] = None, name: Optional[str] = None, parent: Optional[int] = None) -> int:
+        """Start a process, reusing pid if given, as a child of parent if given; return its PID."""
+        if pid is None:
+            self._next_pid += 4
+            pid = self._next_pid
+        self._clock += 1.0
+        self.processes[pid] = time.time() + self._clock
+        self.names[pid] = name or f"process{pid}.exe"
+        self.parents[pid] = parent or 0
+        return pid
+
+    def exit(self, pid: int) -> None:
+        # Like on Windows, children keep the PID of their exited parent.
+        self.processes.pop(pid, None)
+        self.names.pop(pid, None)
+        self.parents.pop(pid, None)
+
+    def pids(self) -> Set[int]:
+        self.calls["pids"] += 1
+        return set(self.processes)
+
+    def create_time(self, pid: int) -> Optional[float]:
+        self.calls["create_time"] += 1
+        return self.processes.get(pid)
+
+    def name(self, pid: int) -> Optional[str]:
+        self.calls["name"] += 1
+        return self.names.get(pid)
+
+    def parent(self, pid: int) -> Optional[int]:
+        self.calls["parent"] += 1
+        return self.parents.get(pid)
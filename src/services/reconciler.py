@@ -0,0 +1,214 @@
+# src/services/reconciler.py
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from audio.audio_service import AudioService
+from services.dwell import DwellPolicy
+from services.helpers import get_pid_mapping
+from services.metrics import METRICS
+from services.route_queue import RouteQueue
+from services.rule_matcher import RuleMatcher
+from services.trace import TraceRecorder
+from window.window_index import WindowIndex
+
+logger = logging.getLogger(__name__)
+
+SWEEP_INTERVAL = 5.0  # seconds between full re-reads of the window index
+PROCESS_SWEEP_INTERVAL = 30.0  # seconds between evictions of exited processes
+BATCH_SIZE = 8  # background routes issued per batch
+BATCH_INTERVAL = 0.5  # seconds between background batches
+
+
+class Reconciler:
+    """Drives the applied pid -> endpoint routes towards the state desired by the config."""
+
+    def __init__(self, window_index: WindowIndex, route_queue: RouteQueue,
+                 sweep_interval: float = SWEEP_INTERVAL, batch_size: int = BATCH_SIZE,
+                 batch_interval: float = BATCH_INTERVAL, dwell: Optional[DwellPolicy] = None,
+                 clock: Callable[[], float] = time.monotonic, recorder: Optional[TraceRecorder] = None):
+        self.window_index = window_index
+        self.route_queue = route_queue
+        self.dwell = dwell  # background routing skips processes whose foreground route it holds back
+        self.clock = clock  # a virtual clock makes a trace replay deterministic
+        self.recorder = recorder  # a TraceRecorder that is shown every sweep's windows
+        self.applied = route_queue.applied
+        self.rules = RuleMatcher(self.applied.process_table)
+        self.sweep_interval = sweep_interval
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.desired: Dict[int, str] = {}
+        self._owners: Dict[int, int] = {}  # audio pid -> window pid whose foreground route it followed last
+        self._pending: List[int] = []
+        self._next_sweep = 0.0
+        self._next_batch = 0.0
+        self._burst = True  # the first sweep and config changes are routed in one go
+        self._swept_layout: Optional[str] = None  # fingerprint of the displays the last sweep located windows on
+        self._next_process_sweep = clock() + PROCESS_SWEEP_INTERVAL
+        self.last_cycle_calls = 0
+        self.total_calls = 0
+        self.cycles = 0
+
+    def route(self, pid: int, device_id: str) -> bool:
+        """Route a single pid right away if it is not already on device_id; return whether a call was issued."""
+        return self.route_queue.submit(pid, device_id)
+
+    def audio_pids(self, pid: int) -> List[int]:
+        """Return the processes of pid's family that own audio sessions, or just pid if none of them does."""
+        family = self.route_queue.process_tree.family(pid)
+        if len(family) == 1:
+            return [pid]
+        has_session = self.route_queue.session_index.has_session
+        return [member for member in family if has_session(member)] or [pid]
+
+    def _expand(self, mapping: Dict[int, str]) -> Dict[int, str]:
+        """Extend the window pid -> endpoint mapping to the audio processes of multi-process apps.
+
+        An audio process shared by windows routed to different endpoints follows the one that was last in the
+        foreground; if none of them was since it started playing, it keeps its route.
+        """
+        desired = dict(mapping)
+        claims: Dict[int, Dict[int, str]] = {}  # audio pid -> window pid -> endpoint
+        for pid, device_id in mapping.items():
+            for member in self.audio_pids(pid):
+                if member not in mapping:
+                    claims.setdefault(member, {})[pid] = device_id
+        for member, owners in claims.items():
+            if len(set(owners.values())) == 1:
+                desired[member] = next(iter(owners.values()))
+            elif self._owners.get(member) in owners:
+                desired[member] = owners[self._owners[member]]
+        return desired
+
+    def _held(self, pid: int) -> bool:
+        if self.dwell is None or not self.dwell.holding:
+            return False
+        return any(self.dwell.holds(member) for member in self.route_queue.process_tree.family(pid))
+
+    def request_sweep(self) -> None:
+        """Re-read the window index on the next cycle, e.g. after the config changed."""
+        self._next_sweep = 0.0
+
+    def displays_changed(self) -> None:
+        """Re-read the monitors and windows after a display change was reported.
+
+        Until then a window on a monitor that was moved or removed would still be located by the old topology.
+        """
+        self.window_index.invalidate_monitors()
+        self.request_sweep()
+
+    def devices_changed(self) -> None:
+        """Re-route after endpoints came or went.
+
+        Mappings to a device that arrived become active again; routes to a device that left are forgotten, so
+        they are applied again when it is back.
+        """
+        dropped = self.applied.discard_devices(AudioService.get_active_endpoints())
+        if dropped:
+            logger.info(f"Forgot {dropped} route(s) to unavailable devices")
+        # Like a config change, a device coming back moves whole screens at once.
+        self.request_sweep()
+        self._next_batch = 0.0
+        self._burst = True
+
+    def layout_current(self, config: dict) -> bool:
+        """Whether config's mappings are those of the display layout windows are located on now.
+
+        Not so from the moment the displays change until their layout's profile is swapped in, which re-routes
+        everything anyway.
+        """
+        layout = getattr(config, "layout", None)
+        return layout is None or layout == self.window_index.topology.fingerprint
+
+    def layout_changed(self, config: dict) -> None:
+        """Re-route after the display layout changed and its profile was swapped in.
+
+        Screens may have been renumbered, so unless the last sweep already read the windows under the new layout,
+        they are read again first; the routes that differ are then issued in one go.
+        """
+        if self._swept_layout == self.window_index.topology.fingerprint:
+            self.apply_config(config)
+            return
+        self.request_sweep()
+        self._next_batch = 0.0
+        self._burst = True
+
+    def sweep(self, config: dict) -> None:
+        """Rebuild the window index and recompute which pids differ from their desired endpoint."""
+        METRICS.incr("reconcile.sweeps")
+        self.window_index.rebuild()
+        self._swept_layout = self.window_index.topology.fingerprint
+        if self.recorder is not None:
+            self.recorder.sweep(self.window_index.windows)
+        self._next_sweep = self.clock() + self.sweep_interval
+        if not self.layout_current(config):
+            self._pending = []  # the displays changed under this sweep; routed once their profile is in
+            return
+        self.route_queue.process_tree.refresh()
+        self.desired = self._expand(get_pid_mapping(config, self.window_index, self.rules))
+        self.applied.validate(self.desired)  # one process table read per routed pid and sweep, not per lookup
+        reused = self.applied.take_reused()  # found here or when a process opened a session
+        if reused:
+            self.rules.drop(reused)  # they were matched under the exe of the process that had the PID before
+            self.desired = self._expand(get_pid_mapping(config, self.window_index, self.rules))
+        self._pending = [pid for pid, device_id in self.desired.items() if self.applied.get(pid) != device_id]
+
+    def apply_config(self, config: dict) -> None:
+        """Recompute the desired state for a new config from the current index, queueing only changed targets."""
+        self.desired = self._expand(get_pid_mapping(config, self.window_index, self.rules))
+        self._pending = [pid for pid, device_id in self.desired.items() if self.applied.get(pid) != device_id]
+        self._next_batch = 0.0
+        self._burst = True
+
+    def time_until_due(self) -> float:
+        """Seconds until the next batch, retry or sweep should run."""
+        due = self._next_batch if self._pending else self._next_sweep
+        until_due = max(0.0, due - self.clock())
+        retry_due = self.route_queue.time_until_due()
+        return until_due if retry_due is None else min(until_due, retry_due)
+
+    def reconcile(self, config: dict, foreground: Iterable[Tuple[int, str]] = ()) -> int:
+        """Route the (pid, device_id) foreground pairs, then at most one background batch; return routes issued."""
+        calls = 0
+        for pid, device_id in foreground:
+            for member in self.audio_pids(pid):
+                self.desired[member] = device_id  # a stale sweep must not move it back
+                if member != pid:
+                    self._owners[member] = pid
+                if self.route(member, device_id):
+                    calls += 1
+        calls += self.route_queue.process()
+
+        now = self.clock()
+        if now >= self._next_sweep:
+            self.sweep(config)
+        if now >= self._next_process_sweep:
+            live = self.applied.process_table.pids()
+            self.applied.sweep(live)
+            self.route_queue.sweep(live)
+            self.rules.forget(live)
+            self._owners = {member: owner for member, owner in self._owners.items() if member in live}
+            self._next_process_sweep = now + PROCESS_SWEEP_INTERVAL
+
+        if self._pending and now >= self._next_batch:
+            size = len(self._pending) if self._burst else self.batch_size
+            batch, self._pending = self._pending[:size], self._pending[size:]
+            self._burst = False
+            by_device: Dict[str, List[int]] = {}
+            for pid in batch:
+                if self._held(pid):
+                    continue  # the next sweep picks it up again if the window settles elsewhere
+                by_device.setdefault(self.desired[pid], []).append(pid)
+            for device_id, pids in by_device.items():
+                for pid in self.route_queue.submit_many(pids, device_id):
+                    logger.info(f"Updated audio device for background PID {pid}")
+                    calls += 1
+            self._next_batch = now + self.batch_interval
+
+        self.cycles += 1
+        METRICS.incr("reconcile.cycles")
+        self.last_cycle_calls = calls
+        self.total_calls += calls
+        if calls:
+            logger.debug(f"Reconcile cycle {self.cycles} issued {calls} route(s)")
+        return calls
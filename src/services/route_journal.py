@@ -0,0 +1,192 @@
+# src/services/route_journal.py
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config.settings import CONFIG_FILE
+from services.metrics import METRICS
+from services.route_state import ProcessIdentity
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = CONFIG_FILE.with_name("screen_audio_routes.jsonl")
+JOURNAL_VERSION = 1
+FLUSH_INTERVAL = 1.0  # seconds route changes are collected before they are appended
+COMPACT_MIN_RECORDS = 512  # appended records before the journal is considered for compaction
+
+# One JSON array per line after a {"version": 1} header: [pid, creation time, endpoint ID, unix time], where an
+# endpoint ID of null removes the route. Later lines win; a torn last line from a crash is ignored.
+
+
+class RouteJournal:
+    """Append-only record of the routes applied to each process, so a restart knows what Windows still has.
+
+    record and forget only queue the change; a background thread appends the queued changes about once a second
+    and rewrites the file once it holds mostly superseded lines.
+    """
+
+    def __init__(self, path: Path = JOURNAL_FILE, flush_interval: float = FLUSH_INTERVAL,
+                 compact_min_records: int = COMPACT_MIN_RECORDS):
+        self.path = Path(path)
+        self.flush_interval = flush_interval
+        self.compact_min_records = compact_min_records
+        self._cond = threading.Condition()
+        self._routes: Dict[ProcessIdentity, Tuple[str, float]] = {}  # identity -> (endpoint ID, applied at)
+        self._queued: Dict[ProcessIdentity, Optional[Tuple[str, float]]] = {}
+        self._records = 0  # lines in the file after the header
+        self._stopped = False
+        self._thread = None
+        self.writes = 0
+        self.compactions = 0
+
+    def load(self) -> Dict[ProcessIdentity, str]:
+        """Read the journal and return the recorded identity -> endpoint ID routes."""
+        routes: Dict[ProcessIdentity, Tuple[str, float]] = {}
+        records, damaged = 0, False
+        try:
+            with open(self.path, "r") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("version") != JOURNAL_VERSION:
+                    raise ValueError(f"unsupported journal version {header.get('version')!r}")
+                for line in f:
+                    try:
+                        pid, created, device_id, at = json.loads(line)
+                    except (ValueError, TypeError):
+                        logger.warning(f"Ignoring a damaged line in {self.path}")
+                        damaged = True
+                        continue
+                    records += 1
+                    if device_id is None:
+                        routes.pop((pid, created), None)
+                    else:
+                        routes[(pid, created)] = (device_id, at)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, AttributeError) as e:
+            logger.error(f"Ignoring the route journal {self.path}: {e}")
+            routes, records = {}, -1  # rewritten on the first flush
+        with self._cond:
+            self._routes = routes
+            # Appending after a torn line would damage the next record too, so such a file is rewritten.
+            self._records = -1 if damaged else records
+        logger.info(f"Loaded {len(routes)} route(s) from {self.path}")
+        return {identity: device_id for identity, (device_id, _) in routes.items()}
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="RouteJournal", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write the queued changes and stop the writer thread."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        else:
+            self.flush()
+
+    def _queue(self, identity: ProcessIdentity, route: Optional[Tuple[str, float]]) -> None:
+        if not self._queued:
+            self._cond.notify()
+        self._queued[identity] = route
+
+    def record(self, identity: ProcessIdentity, device_id: str) -> None:
+        with self._cond:
+            self._queue(identity, (device_id, time.time()))
+
+    def forget(self, identity: ProcessIdentity) -> None:
+        with self._cond:
+            if identity in self._routes or identity in self._queued:
+                self._queue(identity, None)
+
+    def retain(self, live: Dict[ProcessIdentity, str]) -> None:
+        """Forget every recorded route not in live, e.g. those of processes that exited while the app was down."""
+        with self._cond:
+            for identity in [identity for identity in self._routes if identity not in live]:
+                self._queue(identity, None)
+
+    def flush(self) -> int:
+        """Append the queued changes, compacting the file instead if that leaves it smaller; return lines written."""
+        with self._cond:
+            queued, self._queued = self._queued, {}
+            changes = []
+            for identity, route in queued.items():
+                if route is None:
+                    if self._routes.pop(identity, None) is not None:
+                        changes.append((identity, None))
+                elif self._routes.get(identity, (None,))[0] != route[0]:
+                    self._routes[identity] = route
+                    changes.append((identity, route))
+            if not changes and self._records >= 0:
+                return 0
+            compact = self._records < 0 or (
+                self._records + len(changes) >= self.compact_min_records
+                and self._records + len(changes) > 2 * len(self._routes)
+            )
+            routes = dict(self._routes) if compact else None
+        started = time.perf_counter()
+        try:
+            if compact:
+                written = self._rewrite(routes)
+            else:
+                with open(self.path, "a") as f:
+                    if f.tell() == 0:
+                        f.write(json.dumps({"version": JOURNAL_VERSION}) + "\n")
+                    f.writelines(json.dumps([pid, created, route[0] if route else None,
+                                             route[1] if route else time.time()]) + "\n"
+                                 for (pid, created), route in changes)
+                written = len(changes)
+        except OSError as e:
+            logger.error(f"Could not write the route journal {self.path}: {e}")
+            with self._cond:
+                self._records = -1  # the file may be torn; rewrite it next time
+            return 0
+        with self._cond:
+            self._records = written if compact else self._records + written
+        self.writes += 1
+        METRICS.observe("journal_flush_ms", (time.perf_counter() - started) * 1000)
+        return written
+
+    def _rewrite(self, routes: Dict[ProcessIdentity, Tuple[str, float]]) -> int:
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(json.dumps({"version": JOURNAL_VERSION}) + "\n")
+                f.writelines(json.dumps([pid, created, device_id, at]) + "\n"
+                             for (pid, created), (device_id, at) in routes.items())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self.compactions += 1
+        return len(routes)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not (self._queued or self._stopped):
+                    self._cond.wait()
+                if not self._stopped:
+                    # Changes arriving within the interval are written together.
+                    self._cond.wait(self.flush_interval)
+                stopped = self._stopped
+            self.flush()
+            if stopped:
+                return
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"routes": len(self._routes), "records": max(self._records, 0), "queued": len(self._queued),
+                    "writes": self.writes, "compactions": self.compactions}
@@ -0,0 +1,200 @@
+# src/services/route_queue.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from audio.audio_service import AudioService
+from audio.session_index import SessionIndex
+from services.metrics import METRICS
+from services.process_tree import ProcessTree
+from services.route_state import AppliedRoutes
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE = 1.0  # seconds before the first retry of a failed route
+RETRY_MAX = 60.0  # longest delay between retries
+MAX_ATTEMPTS = 6  # failed attempts before a route goes into the negative cache
+NEGATIVE_TTL = 300.0  # seconds a given-up route is ignored unless the process opens a new session
+
+
+class RouteQueue:
+    """Applies routes once the process has an audio session, retrying failures with exponential backoff."""
+
+    def __init__(self, applied: AppliedRoutes, session_index: Optional[SessionIndex] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.applied = applied
+        self.clock = clock
+        self.session_index = session_index or AudioService.get_session_index()
+        self.process_tree = ProcessTree(applied.process_table)
+        self.wake: Optional[Callable[[], None]] = None  # called when parked routes become ready
+        self._lock = threading.RLock()
+        self._parked: Dict[int, str] = {}  # pid -> endpoint, waiting for an audio session
+        self._ready: List[int] = []
+        self._retries: Dict[int, Tuple[str, int, float]] = {}  # pid -> (endpoint, attempts, due)
+        self._negative: Dict[int, Tuple[str, float]] = {}  # pid -> (endpoint, expires)
+        self.attempted = 0
+        self.failed = 0
+        self.deferred = 0
+        self._listeners: List[Callable[[int, str], None]] = []
+        self.session_index.add_listener(self.on_session_created)
+
+    def add_listener(self, listener: Callable[[int, str], None]) -> None:
+        """Call listener(pid, device_id) after each route that was applied successfully."""
+        self._listeners.append(listener)
+
+    def _admit(self, pid: int, device_id: str, now: float) -> bool:
+        """Return whether pid should be routed to device_id now, parking it if it has no session; hold the lock."""
+        if self.applied.get(pid) == device_id or self._parked.get(pid) == device_id:
+            METRICS.incr("routes.skipped")
+            return False
+        retry = self._retries.get(pid)
+        if retry is not None and retry[0] == device_id:
+            METRICS.incr("routes.skipped")
+            return False
+        negative = self._negative.get(pid)
+        if negative is not None and negative[0] == device_id and negative[1] > now:
+            METRICS.incr("routes.skipped")
+            return False
+        self._retries.pop(pid, None)
+        self._negative.pop(pid, None)
+
+        if not self.session_index.has_session(pid):
+            self._parked[pid] = device_id
+            self.deferred += 1
+            METRICS.incr("routes.parked")
+            METRICS.decision(pid, device_id, "parked")
+            return False
+        self._parked.pop(pid, None)
+        return True
+
+    def submit(self, pid: int, device_id: str) -> bool:
+        """Route pid to device_id now if it has a session, otherwise park it; return whether a call was issued."""
+        now = self.clock()
+        with self._lock:
+            if not self._admit(pid, device_id, now):
+                return False
+        self._attempt(pid, device_id, 0)
+        return True
+
+    def submit_many(self, pids: Iterable[int], device_id: str) -> List[int]:
+        """Like submit for each pid, issuing the routes to device_id as one backend call; return the pids routed.
+
+        With the COM executor in between, a batch makes one round trip to its thread instead of one per process.
+        """
+        now = self.clock()
+        with self._lock:
+            issued = [pid for pid in pids if self._admit(pid, device_id, now)]
+        if len(issued) == 1:
+            self._attempt(issued[0], device_id, 0)
+        elif issued:
+            self.attempted += len(issued)
+            started = time.perf_counter()
+            results = AudioService.set_applications_output_device(issued, device_id)
+            latency_ms = (time.perf_counter() - started) * 1000 / len(issued)
+            for pid in issued:
+                METRICS.observe("set_application_endpoint_ms", latency_ms)
+                self._record(pid, device_id, 0, results.get(pid, False), latency_ms)
+        return issued
+
+    def _attempt(self, pid: int, device_id: str, attempts: int) -> bool:
+        self.attempted += 1
+        started = time.perf_counter()
+        ok = AudioService.set_application_output_device(pid, device_id)
+        latency_ms = (time.perf_counter() - started) * 1000
+        METRICS.observe("set_application_endpoint_ms", latency_ms)
+        self._record(pid, device_id, attempts, ok, latency_ms)
+        return ok
+
+    def _record(self, pid: int, device_id: str, attempts: int, ok: bool, latency_ms: float) -> None:
+        """Apply a route's outcome: remember it, or schedule a retry or give up, and notify the listeners."""
+        with self._lock:
+            if ok:
+                self.applied[pid] = device_id
+                outcome = "routed"
+            else:
+                self.failed += 1
+                attempts += 1
+                now = self.clock()
+                if attempts >= MAX_ATTEMPTS:
+                    logger.info(f"Giving up routing PID {pid} after {attempts} attempts")
+                    self._negative[pid] = (device_id, now + NEGATIVE_TTL)
+                    outcome = "gave_up"
+                else:
+                    delay = min(RETRY_BASE * 2 ** (attempts - 1), RETRY_MAX)
+                    self._retries[pid] = (device_id, attempts, now + delay)
+                    outcome = "failed"
+        METRICS.incr(f"routes.{outcome}")
+        METRICS.decision(pid, device_id, outcome, latency_ms)
+        if ok:
+            for listener in list(self._listeners):
+                try:
+                    listener(pid, device_id)
+                except Exception as e:
+                    logger.error(f"Error in route listener: {e}")
+
+    def on_session_created(self, pid: int) -> None:
+        """Move a parked or given-up route of pid to the ready list; called from the notifying thread.
+
+        A process of a multi-process app inherits the parked route of its family, e.g. a browser tab's audio
+        process opening its first session while the route of the window's process waits for one.
+        """
+        self.process_tree.ensure(pid)  # so the family of a process started since the last refresh includes it
+        self.applied.validate([pid])  # a new session may be a new process that was handed a routed PID
+        with self._lock:
+            device_id = self._parked.get(pid)
+            if device_id is None and pid in self._negative:
+                device_id = self._negative.pop(pid)[0]
+                self._parked[pid] = device_id
+            if device_id is None and self._parked and pid not in self.applied:
+                device_id = next((self._parked[member] for member in self.process_tree.family(pid)
+                                  if member in self._parked), None)
+                if device_id is not None:
+                    self._parked[pid] = device_id
+                    METRICS.incr("routes.family_inherited")
+            if device_id is None:
+                return
+            self._ready.append(pid)
+        if self.wake is not None:
+            self.wake()
+
+    def process(self) -> int:
+        """Issue routes that became ready or are due for a retry; return how many calls were issued."""
+        now = self.clock()
+        with self._lock:
+            ready = [(pid, self._parked.pop(pid), 0) for pid in self._ready if pid in self._parked]
+            self._ready.clear()
+            due = [(pid, device_id, attempts) for pid, (device_id, attempts, at) in self._retries.items() if at <= now]
+            for pid, _, _ in due:
+                del self._retries[pid]
+        for pid, device_id, attempts in ready + due:
+            self._attempt(pid, device_id, attempts)
+        return len(ready) + len(due)
+
+    def time_until_due(self) -> Optional[float]:
+        """Seconds until the next retry, 0 if routes are ready, or None if nothing is scheduled."""
+        with self._lock:
+            if self._ready:
+                return 0.0
+            if not self._retries:
+                return None
+            return max(0.0, min(at for _, _, at in self._retries.values()) - self.clock())
+
+    def sweep(self, live_pids: Iterable[int]) -> None:
+        """Forget queued routes of processes that exited."""
+        live = set(live_pids)
+        with self._lock:
+            for table in (self._parked, self._retries, self._negative):
+                for pid in [pid for pid in table if pid not in live]:
+                    del table[pid]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "attempted": self.attempted,
+                "failed": self.failed,
+                "deferred": self.deferred,
+                "parked": len(self._parked),
+                "retrying": len(self._retries),
+                "negative": len(self._negative),
+            }
@@ -0,0 +1,181 @@
+# src/services/route_state.py
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from typing import Container, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+from services.processes import ProcessTable, PsutilProcessTable
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 4096
+
+ProcessIdentity = Tuple[int, Optional[float]]  # (pid, creation time)
+
+
+class AppliedRoutes:
+    """pid -> endpoint ID routes keyed by process identity, so a reused PID is not mistaken for a routed one.
+
+    Lookups do not read the process table; validate() drops the routes of reused PIDs, and is called once per
+    sweep and when a process opens an audio session. take_reused() hands the reused PIDs it found to other caches.
+    """
+
+    def __init__(self, process_table: Optional[ProcessTable] = None, max_entries: int = MAX_ENTRIES,
+                 journal=None):
+        self.process_table = process_table or PsutilProcessTable()
+        self.max_entries = max_entries
+        self.journal = journal  # a RouteJournal told about every route added or dropped
+        self._lock = threading.RLock()
+        self._routes: "OrderedDict[ProcessIdentity, str]" = OrderedDict()
+        self._identities: Dict[int, ProcessIdentity] = {}
+        self._reused: Set[int] = set()
+        self.evicted_dead = 0
+        self.evicted_overflow = 0
+
+    def identity(self, pid: int) -> ProcessIdentity:
+        return pid, self.process_table.create_time(pid)
+
+    def _drop(self, identity: ProcessIdentity) -> None:
+        self._routes.pop(identity, None)
+        if self._identities.get(identity[0]) == identity:
+            del self._identities[identity[0]]
+        if self.journal is not None:
+            self.journal.forget(identity)
+
+    def get(self, pid: int, default: Optional[str] = None) -> Optional[str]:
+        """Return the endpoint applied to pid, as of the last validate() of it."""
+        with self._lock:
+            known = self._identities.get(pid)
+            if known is None:
+                return default
+            self._routes.move_to_end(known)
+            return self._routes[known]
+
+    def validate(self, pids: Optional[Iterable[int]] = None) -> int:
+        """Drop the routes of pids, or of every routed pid, that now belong to another process or none.
+
+        Return how many were dropped. The process table is read outside the lock.
+        """
+        with self._lock:
+            known = list(self._identities.values()) if pids is None else \
+                [self._identities[pid] for pid in pids if pid in self._identities]
+        stale = [identity for identity in known if self.identity(identity[0]) != identity]
+        with self._lock:
+            stale = [identity for identity in stale if identity in self._routes]
+            for identity in stale:
+                self._drop(identity)
+            self._reused.update(identity[0] for identity in stale)
+            self.evicted_dead += len(stale)
+        if stale:
+            logger.debug(f"Dropped {len(stale)} route(s) of reused or exited PIDs")
+        return len(stale)
+
+    def take_reused(self) -> Set[int]:
+        """Return the pids found handed to another process since the last call, and forget them."""
+        with self._lock:
+            reused, self._reused = self._reused, set()
+        return reused
+
+    def __getitem__(self, pid: int) -> str:
+        device_id = self.get(pid)
+        if device_id is None:
+            raise KeyError(pid)
+        return device_id
+
+    def __setitem__(self, pid: int, device_id: str) -> None:
+        with self._lock:
+            known = self._identities.get(pid)
+            identity = self.identity(pid)
+            if known is not None and known != identity:
+                self._drop(known)
+                self._reused.add(pid)
+            self._routes[identity] = device_id
+            self._routes.move_to_end(identity)
+            self._identities[pid] = identity
+            if self.journal is not None:
+                self.journal.record(identity, device_id)
+            while len(self._routes) > self.max_entries:
+                self._drop(next(iter(self._routes)))
+                self.evicted_overflow += 1
+
+    def restore(self, routes: Dict[ProcessIdentity, str]) -> int:
+        """Adopt routes recorded before a restart whose process is still running; return how many were adopted.
+
+        Windows keeps a process's endpoint when this app exits, so these are not applied again; routes of
+        processes that exited, or whose PID was reused, are dropped from the journal.
+        """
+        with self._lock:
+            adopted = {}
+            for (pid, created), device_id in routes.items():
+                identity = self.identity(pid)
+                if identity[1] is not None and identity[1] == created:
+                    adopted[identity] = device_id
+            for identity, device_id in adopted.items():
+                self._routes[identity] = device_id
+                self._identities[identity[0]] = identity
+            if self.journal is not None:
+                self.journal.retain(adopted)
+        if routes:
+            logger.info(f"Restored {len(adopted)} of {len(routes)} journaled route(s)")
+        return len(adopted)
+
+    def __contains__(self, pid: int) -> bool:
+        return self.get(pid) is not None
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __iter__(self) -> Iterator[int]:
+        with self._lock:
+            return iter(list(self._identities))
+
+    def items(self):
+        with self._lock:
+            return [(identity[0], device_id) for identity, device_id in self._routes.items()]
+
+    def discard(self, pid: int) -> None:
+        """Forget the route of pid, e.g. when its process exited."""
+        with self._lock:
+            known = self._identities.get(pid)
+            if known is not None:
+                self._drop(known)
+                self.evicted_dead += 1
+
+    def discard_devices(self, keep: Container) -> int:
+        """Forget the routes to endpoints not in keep, e.g. unplugged devices; return how many were dropped."""
+        with self._lock:
+            gone = [identity for identity, device_id in self._routes.items() if device_id not in keep]
+            for identity in gone:
+                self._drop(identity)
+        return len(gone)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._identities.clear()
+
+    def sweep(self, live: Optional[Set[int]] = None) -> int:
+        """Evict routes of processes that are no longer running; return how many were dropped."""
+        if live is None:
+            live = self.process_table.pids()
+        with self._lock:
+            dead = [identity for identity in self._routes if identity[0] not in live]
+            for identity in dead:
+                self._drop(identity)
+            self.evicted_dead += len(dead)
+        if dead:
+            logger.debug(f"Evicted {len(dead)} route(s) of exited processes")
+        return len(dead)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            approx_bytes = sys.getsizeof(self._routes) + sys.getsizeof(self._identities)
+            approx_bytes += sum(sys.getsizeof(identity) for identity in self._routes)
+            return {
+                "entries": len(self._routes),
+                "max_entries": self.max_entries,
+                "evicted_dead": self.evicted_dead,
+                "evicted_overflow": self.evicted_overflow,
+                "approx_bytes": approx_bytes,
+            }
@@ -0,0 +1,83 @@
+# src/services/rule_matcher.py
+import logging
+from typing import Container, Dict, Iterable, Mapping, Optional, Set, Tuple
+
+from config.rules import Rule, RuleSet
+from services.processes import ProcessTable
+
+logger = logging.getLogger(__name__)
+
+
+class RuleMatcher:
+    """Memoizes rule lookups per pid; a result is reused for as long as the window title stays the same.
+
+    Used from the monitor thread only. Entries of exited processes are dropped by forget(), those of reused PIDs
+    by drop() once AppliedRoutes.validate() has found them.
+    """
+
+    def __init__(self, process_table: ProcessTable):
+        self.process_table = process_table
+        self._rules: Optional[RuleSet] = None
+        self._exes: Dict[int, Optional[str]] = {}
+        self._memo: Dict[int, Tuple[Optional[str], Optional[Rule]]] = {}  # pid -> (title, rule)
+        self.hits = 0
+        self.misses = 0
+
+    def exe_name(self, pid: int) -> Optional[str]:
+        if pid not in self._exes:
+            self._exes[pid] = self.process_table.name(pid)
+        return self._exes[pid]
+
+    def match(self, rules: RuleSet, pid: int, title: Optional[str]) -> Optional[Rule]:
+        """Return the rule for a process and its window title; pass title None if rules.uses_titles is false."""
+        if not rules:
+            return None
+        if rules is not self._rules:
+            self._rules = rules
+            self._memo = {}
+        cached = self._memo.get(pid)
+        if cached is not None and cached[0] == title:
+            self.hits += 1
+            return cached[1]
+        self.misses += 1
+        rule = rules.match(self.exe_name(pid), title)
+        self._memo[pid] = (title, rule)
+        return rule
+
+    def forget(self, live: Set[int]) -> None:
+        """Drop everything cached for pids that are no longer running, so a reused PID is looked up again."""
+        self._exes = {pid: exe for pid, exe in self._exes.items() if pid in live}
+        self._memo = {pid: entry for pid, entry in self._memo.items() if pid in live}
+
+    def drop(self, pids: Iterable[int]) -> None:
+        """Drop everything cached for pids that were handed to another process."""
+        for pid in pids:
+            self._exes.pop(pid, None)
+            self._memo.pop(pid, None)
+
+
+def screen_endpoint(config: Mapping[str, str], screen: Optional[str], devices: Mapping[str, str],
+                    active: Container) -> Optional[str]:
+    """Return the endpoint ID a screen is mapped to while that device is available, see ConfigSnapshot.endpoint."""
+    if screen is None:
+        return None
+    endpoint = getattr(config, "endpoint", None)
+    if endpoint is not None:
+        return endpoint(screen, devices, active)
+    return devices.get(config.get(screen))
+
+
+def target_device(config: Mapping[str, str], screen: Optional[str], rule: Optional[Rule],
+                  devices: Mapping[str, str], active: Container) -> Optional[str]:
+    """Return the endpoint ID a window should be routed to, or None to leave its process alone.
+
+    devices maps the friendly names of active devices to endpoint IDs, active holds the active endpoint IDs.
+    A rule's device wins over the screen mapping while that device is available; an ignore rule never routes.
+    """
+    if rule is not None:
+        if rule.ignore:
+            return None
+        device_id = devices.get(rule.device)
+        if device_id:
+            return device_id
+    return screen_endpoint(config, screen, devices, active)
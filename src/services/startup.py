@@ -0,0 +1,53 @@
+# src/services/startup.py
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+from audio.audio_service import AudioService
+from window.window_utils import WindowUtils
+
+logger = logging.getLogger(__name__)
+
+
+class StartupSnapshot(NamedTuple):
+    screens: List[dict]
+    devices: Dict[str, str]  # friendly name -> endpoint ID
+
+
+class StartupPipeline:
+    """Takes one device/screen snapshot for the first paint and moves routing and volume reads off the UI thread."""
+
+    def __init__(self):
+        self._started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.timings: Dict[str, float] = {}
+
+    def mark(self, name: str) -> None:
+        """Record the seconds since startup at which name first happened."""
+        with self._lock:
+            if name not in self.timings:
+                self.timings[name] = time.perf_counter() - self._started
+                logger.debug(f"Startup {name} after {self.timings[name] * 1000:.1f} ms")
+
+    def take_snapshot(self) -> StartupSnapshot:
+        snapshot = StartupSnapshot(WindowUtils.detect_screens(), AudioService.get_all_output_devices())
+        self.mark("snapshot")
+        return snapshot
+
+    def watch_routes(self, route_queue) -> None:
+        """Mark first_route when route_queue applies its first route."""
+        route_queue.add_listener(lambda pid, device_id: self.mark("first_route"))
+
+    def read_volumes(self, device_ids: List[str], callback: Callable[[Dict[str, int]], None]) -> threading.Thread:
+        """Read the volume of each device in the background, then pass {device_id: volume} to callback."""
+        def run():
+            volumes = {}
+            for device_id in dict.fromkeys(device_ids):
+                volumes[device_id] = AudioService.get_device_volume(device_id)
+            self.mark("volumes")
+            callback(volumes)
+
+        thread = threading.Thread(target=run, name="StartupVolumes", daemon=True)
+        thread.start()
+        return thread
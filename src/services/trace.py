@@ -0,0 +1,182 @@
+# src/services/trace.py
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from audio.audio_service import AudioService
+from config.settings import ConfigSnapshot
+from services.dwell import DWELL_MS
+from services.events import WAKE, WindowEvent
+from services.processes import ProcessTable
+from window.window_index import WindowEntry
+from window.window_utils import WindowUtils
+
+logger = logging.getLogger(__name__)
+
+TRACE_VERSION = 1
+FLUSH_INTERVAL = 1.0  # seconds between flushes of the trace file
+
+# One JSON array per line after a {"version": 1, "started": unix time, "dwell_ms": ...} header:
+# [milliseconds since the start, kind, *fields].
+#   ["monitors", [[hmonitor, display device name, [left, top, right, bottom]], ...]]  the display topology
+#   ["endpoints", [[endpoint ID, friendly name], ...]]  the active render endpoints
+#   ["config", {screen: device name}, {screen: endpoint ID}, rules section, layout]  a published config
+#   ["applied", [[pid, endpoint ID], ...]]  routes already applied when recording started
+#   ["process", pid, parent pid, executable name]  a process, the first time it is referred to
+#   ["window", hwnd, pid, hmonitor, title]  a window seen for the first time or on another monitor
+#   ["closed", hwnd]
+#   ["sweep"]  a full re-read of the windows, after the window records of what it found
+#   ["session", pid, endpoint ID]  a process that opened an audio session
+#   ["events", [[kind, hwnd], ...]]  one burst of window events handled by the monitor loop
+#   ["route", pid, endpoint ID]  a route that was applied
+# Records are written in the order the app saw the changes, so a replay applies them in file order.
+
+
+def load_trace(path) -> Tuple[dict, List[list]]:
+    """Read a trace file and return its header and records; a torn last line, e.g. from a crash, is ignored."""
+    with open(path, "r") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("version") != TRACE_VERSION:
+            raise ValueError(f"Unsupported trace version {header.get('version')!r}")
+        records = []
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning(f"Ignoring a damaged line in {path}")
+        return header, records
+
+
+class TraceRecorder:
+    """Writes a compact, timestamped trace of what the routing logic saw and did, for benchmarks.replay.
+
+    Window titles are only recorded with titles=True, as they may be private; rules matching on titles then
+    replay exactly. Writes are buffered and flushed about once a second and on stop.
+    """
+
+    def __init__(self, path, process_table: ProcessTable, titles: bool = False,
+                 flush_interval: float = FLUSH_INTERVAL):
+        self.path = Path(path)
+        self.process_table = process_table
+        self.titles = titles
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._file = None
+        self._started = 0.0
+        self._flushed = 0.0
+        self._processes = set()
+        self._windows: Dict[int, Tuple[int, int]] = {}  # hwnd -> (pid, hmonitor) as last recorded
+        self._screens = None  # topology screens as last recorded
+        self._endpoints = None
+        self.records = 0
+
+    def start(self, config: ConfigSnapshot, applied: Iterable[Tuple[int, str]] = (),
+              dwell_ms: float = DWELL_MS) -> None:
+        """Open the trace and record the state routing starts from."""
+        self._file = open(self.path, "w")
+        self._file.write(json.dumps({"version": TRACE_VERSION, "started": time.time(), "dwell_ms": dwell_ms}) + "\n")
+        self._started = self._flushed = time.monotonic()
+        self.topology()
+        self.endpoints()
+        self.config(config)
+        applied = list(applied)
+        for pid, _ in applied:
+            self._process(pid)
+        self._write("applied", [[pid, device_id] for pid, device_id in applied])
+        for session in AudioService.list_sessions():
+            self.session(session.pid, session.device_id)
+        logger.info(f"Recording a routing trace to {self.path}")
+
+    def stop(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _write(self, kind: str, *fields) -> None:
+        now = time.monotonic()
+        line = json.dumps([round((now - self._started) * 1000, 1), kind, *fields], separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+            self.records += 1
+            if now - self._flushed >= self.flush_interval:
+                self._file.flush()
+                self._flushed = now
+
+    def _process(self, pid: int) -> None:
+        with self._lock:
+            if pid in self._processes:
+                return
+            self._processes.add(pid)
+            parent = self.process_table.parent(pid)
+            if parent is not None:
+                self._process(parent)
+            self._write("process", pid, parent, self.process_table.name(pid))
+
+    def topology(self) -> None:
+        """Record the monitors if they changed since they were last recorded."""
+        screens = WindowUtils.get_topology().screens
+        if screens is self._screens:
+            return
+        self._screens = screens
+        self._write("monitors", [[screen.hmonitor, screen.device_name, list(screen.rect)] for screen in screens])
+
+    def endpoints(self) -> None:
+        """Record the active endpoints if they changed since they were last recorded."""
+        endpoints = AudioService.get_active_endpoints()
+        if endpoints == self._endpoints:
+            return
+        self._endpoints = endpoints
+        self._write("endpoints", [[device_id, name] for device_id, name in endpoints.items()])
+
+    def config(self, config: ConfigSnapshot) -> None:
+        rules = config.rules.to_json() if config.rules else None
+        self._write("config", dict(config), dict(config.endpoints), rules, config.layout)
+
+    def _window(self, hwnd: int, pid: int, hmonitor: int) -> None:
+        if self._windows.get(hwnd) == (pid, hmonitor):
+            return
+        self._process(pid)
+        title = WindowUtils.get_backend().get_window_text(hwnd) if self.titles else ""
+        self._windows[hwnd] = (pid, hmonitor)
+        self._write("window", hwnd, pid, hmonitor, title)
+
+    def sweep(self, entries: Dict[int, WindowEntry]) -> None:
+        """Record the windows a sweep found that are new, moved or gone, then the sweep itself."""
+        self.topology()
+        for hwnd, entry in entries.items():
+            try:
+                self._window(hwnd, entry.pid, entry.monitor)
+            except OSError:
+                continue  # closed since the index was built
+        for hwnd in [hwnd for hwnd in self._windows if hwnd not in entries]:
+            del self._windows[hwnd]
+            self._write("closed", hwnd)
+        self._write("sweep")
+
+    def events(self, events: List[WindowEvent]) -> None:
+        """Record a burst of window events, after the current state of each window they refer to."""
+        events = [event for event in events if event.kind != WAKE and event.hwnd]
+        if not events:
+            return
+        self.topology()
+        backend = WindowUtils.get_backend()
+        topology = WindowUtils.get_topology()
+        for hwnd in dict.fromkeys(event.hwnd for event in events):
+            try:
+                self._window(hwnd, backend.get_window_pid(hwnd), topology.locate(hwnd)[0])
+            except OSError:
+                pass  # closed already; the replay finds it gone too
+        self._write("events", [[event.kind, event.hwnd] for event in events])
+
+    def session(self, pid: int, device_id: Optional[str] = None) -> None:
+        self._process(pid)
+        self._write("session", pid, device_id)
+
+    def route(self, pid: int, device_id: str) -> None:
+        self._write("route", pid, device_id)
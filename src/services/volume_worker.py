@@ -0,0 +1,89 @@
+# src/services/volume_worker.py
+import logging
+import threading
+from typing import Callable, Dict, List, Set
+
+from audio.audio_service import AudioService
+
+logger = logging.getLogger(__name__)
+
+
+class VolumeWorker:
+    """Runs volume reads and changes off the calling thread, coalescing rapid changes into one set per device."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._deltas: Dict[str, float] = {}  # device_id -> accumulated change, in percent
+        self._reads: Set[str] = set()
+        self._listeners: List[Callable[[str, float], None]] = []
+        self._stopped = False
+        self._thread = None
+        self._watcher = None
+        self.requested = 0
+        self.issued = 0
+
+    def start(self) -> None:
+        """Start the worker; it also forwards volume changes made outside the app to the listeners."""
+        self._thread = threading.Thread(target=self._run, name="VolumeWorker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._watcher is not None:
+            self._watcher.remove_listener(self._notify)
+
+    def add_listener(self, listener: Callable[[str, float], None]) -> None:
+        """Call listener(device_id, volume) from the worker thread after each read or change."""
+        self._listeners.append(listener)
+
+    def adjust(self, device_id: str, delta: float) -> None:
+        """Queue a change of delta percent; changes queued before the worker gets to them are summed."""
+        with self._cond:
+            self.requested += 1
+            self._deltas[device_id] = self._deltas.get(device_id, 0) + delta
+            self._cond.notify()
+
+    def read(self, device_id: str) -> None:
+        """Queue a read of the current volume of device_id."""
+        with self._cond:
+            self._reads.add(device_id)
+            self._cond.notify()
+
+    def _notify(self, device_id: str, volume: float) -> None:
+        for listener in list(self._listeners):
+            try:
+                listener(device_id, volume)
+            except Exception as e:
+                logger.error(f"Error in volume listener: {e}")
+
+    def _run(self) -> None:
+        # Subscribing starts the notification thread, so it is done here rather than on the caller's thread.
+        self._watcher = AudioService.get_volume_watcher()
+        self._watcher.add_listener(self._notify)
+        while True:
+            with self._cond:
+                while not (self._deltas or self._reads or self._stopped):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                deltas, self._deltas = self._deltas, {}
+                reads, self._reads = self._reads - set(deltas), set()
+
+            results = {}
+            for device_id, delta in deltas.items():
+                if delta:
+                    self.issued += 1
+                    results[device_id] = AudioService.adjust_device_volume(device_id, delta)
+                else:
+                    reads.add(device_id)
+            for device_id in reads:
+                results[device_id] = AudioService.get_device_volume(device_id)
+
+            for device_id, volume in results.items():
+                if volume is not None:
+                    self._notify(device_id, volume)
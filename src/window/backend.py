@@ -0,0 +1,176 @@
+# src/window/backend.py
+from typing import Dict, List, Optional, Tuple
+import logging
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+Rect = Tuple[int, int, int, int]
+
+
+class WindowBackend:
+    """Interface over the window-system calls used by WindowUtils and WindowIndex."""
+
+    def enum_windows(self) -> List[int]:
+        """Return every top-level window handle in z-order."""
+        raise NotImplementedError
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def is_tool_window(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def is_cloaked(self, hwnd: int) -> bool:
+        raise NotImplementedError
+
+    def get_window_pid(self, hwnd: int) -> int:
+        raise NotImplementedError
+
+    def get_window_text(self, hwnd: int) -> str:
+        raise NotImplementedError
+
+    def get_foreground_window(self) -> int:
+        raise NotImplementedError
+
+    def get_window_rect(self, hwnd: int) -> Rect:
+        raise NotImplementedError
+
+    def monitor_from_window(self, hwnd: int) -> int:
+        """Return the monitor with the largest intersection with the window, or the nearest one."""
+        raise NotImplementedError
+
+    def get_monitor_device(self, hmonitor: int) -> str:
+        """Return the display device name of a monitor, e.g. '\\\\.\\DISPLAY1'."""
+        raise NotImplementedError
+
+    def enum_monitors(self) -> List[Tuple[int, Rect]]:
+        """Return a list of monitors with their handle and rect."""
+        raise NotImplementedError
+
+
+class SimulatedWindowBackend(WindowBackend):
+    """In-memory window system with call counters, used off Windows.
+
+    latencies maps a backend method name to the seconds each call to it sleeps, to stand in for slow Win32 calls.
+    """
+
+    def __init__(self, latencies: Optional[Dict[str, float]] = None):
+        self.calls = Counter()
+        self.latencies = dict(latencies or {})
+        self.monitors: Dict[int, Tuple[str, Rect]] = {}
+        self.windows: Dict[int, dict] = {}
+        self.foreground = 0
+        self._next_handle = 0x10000
+
+    def _call(self, name: str) -> None:
+        self.calls[name] += 1
+        delay = self.latencies.get(name)
+        if delay:
+            time.sleep(delay)
+
+    def _handle(self) -> int:
+        self._next_handle += 4
+        return self._next_handle
+
+    def add_monitor(self, rect: Rect, device_name: Optional[str] = None) -> int:
+        hmonitor = self._handle()
+        if device_name is None:
+            device_name = f"\\\\.\\DISPLAY{len(self.monitors) + 1}"
+        self.monitors[hmonitor] = (device_name, rect)
+        return hmonitor
+
+    def add_window(self, pid: int, monitor: int, title: str = "", visible: bool = True,
+                   tool: bool = False, cloaked: bool = False) -> int:
+        hwnd = self._handle()
+        self.windows[hwnd] = {
+            "pid": pid, "monitor": monitor, "rect": self._centered(monitor), "title": title,
+            "visible": visible, "tool": tool, "cloaked": cloaked,
+        }
+        return hwnd
+
+    def _centered(self, monitor: int) -> Rect:
+        left, top, right, bottom = self.monitors[monitor][1]
+        width, height = (right - left) // 2, (bottom - top) // 2
+        return left + width // 2, top + height // 2, left + width // 2 + width, top + height // 2 + height
+
+    def move_window(self, hwnd: int, monitor: int) -> None:
+        """Move a window to the middle of a monitor."""
+        self.windows[hwnd]["monitor"] = monitor
+        self.windows[hwnd]["rect"] = self._centered(monitor)
+
+    def set_window_rect(self, hwnd: int, rect: Rect) -> None:
+        """Place a window anywhere; it belongs to the monitor it overlaps most, like MonitorFromWindow."""
+        def overlap(monitor_rect: Rect) -> int:
+            width = min(rect[2], monitor_rect[2]) - max(rect[0], monitor_rect[0])
+            height = min(rect[3], monitor_rect[3]) - max(rect[1], monitor_rect[1])
+            return max(width, 0) * max(height, 0)
+
+        self.windows[hwnd]["rect"] = rect
+        self.windows[hwnd]["monitor"] = max(self.monitors, key=lambda m: overlap(self.monitors[m][1]))
+
+    def remove_monitor(self, hmonitor: int) -> None:
+        """Unplug a monitor; its windows move to the first remaining one."""
+        del self.monitors[hmonitor]
+        for hwnd, window in self.windows.items():
+            if window["monitor"] == hmonitor and self.monitors:
+                self.move_window(hwnd, next(iter(self.monitors)))
+
+    def close_window(self, hwnd: int) -> None:
+        self.windows.pop(hwnd, None)
+        if self.foreground == hwnd:
+            self.foreground = 0
+
+    def set_foreground(self, hwnd: int) -> None:
+        self.foreground = hwnd
+
+    def _window(self, hwnd: int) -> dict:
+        try:
+            return self.windows[hwnd]
+        except KeyError:
+            raise OSError(f"Invalid window handle {hwnd}")
+
+    def enum_windows(self) -> List[int]:
+        self._call("enum_windows")
+        return list(self.windows)
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        self._call("is_window_visible")
+        return hwnd in self.windows and self.windows[hwnd]["visible"]
+
+    def is_tool_window(self, hwnd: int) -> bool:
+        self._call("is_tool_window")
+        return self._window(hwnd)["tool"]
+
+    def is_cloaked(self, hwnd: int) -> bool:
+        self._call("is_cloaked")
+        return self._window(hwnd)["cloaked"]
+
+    def get_window_pid(self, hwnd: int) -> int:
+        self._call("get_window_pid")
+        return self._window(hwnd)["pid"]
+
+    def get_window_text(self, hwnd: int) -> str:
+        self._call("get_window_text")
+        return self._window(hwnd)["title"]
+
+    def get_foreground_window(self) -> int:
+        self._call("get_foreground_window")
+        return self.foreground
+
+    def get_window_rect(self, hwnd: int) -> Rect:
+        self._call("get_window_rect")
+        return self._window(hwnd)["rect"]
+
+    def monitor_from_window(self, hwnd: int) -> int:
+        self._call("monitor_from_window")
+        return self._window(hwnd)["monitor"]
+
+    def get_monitor_device(self, hmonitor: int) -> str:
+        self._call("get_monitor_device")
+        return self.monitors[hmonitor][0]
+
+    def enum_monitors(self) -> List[Tuple[int, Rect]]:
+        self._call("enum_monitors")
+        return [(hmonitor, rect) for hmonitor, (_, rect) in self.monitors.items()]
@@ -0,0 +1,157 @@
+# src/window/monitor_topology.py
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+import logging
+import re
+import threading
+
+from window.backend import Rect, WindowBackend
+
+logger = logging.getLogger(__name__)
+
+LARGEST_OVERLAP = "largest_overlap"  # the monitor holding most of the window, as MonitorFromWindow decides
+CENTER = "center"  # the monitor under the window's centre point
+SPANNING_POLICIES = (LARGEST_OVERLAP, CENTER)
+
+
+class Screen(NamedTuple):
+    name: str
+    hmonitor: int
+    device_name: str
+    rect: Rect
+
+
+def _display_number(device_name: str) -> int:
+    match = re.search(r"(\d+)$", device_name or "")
+    return int(match.group(1)) if match else 0
+
+
+def layout_fingerprint(screens: List[Screen]) -> str:
+    """Identify a display layout by its monitors' device names and rects, e.g. 'DISPLAY1@0,0,1920,1080'.
+
+    Readable, so the profiles in the config file can be told apart; the same monitors in the same places always
+    give the same fingerprint.
+    """
+    parts = []
+    for screen in screens:
+        short_name = (screen.device_name or "").rsplit("\\", 1)[-1]  # \\.\DISPLAY1 -> DISPLAY1
+        parts.append(f"{short_name}@{','.join(map(str, screen.rect))}")
+    return "+".join(parts)
+
+
+def _contains(rect: Rect, x: int, y: int) -> bool:
+    left, top, right, bottom = rect
+    return left <= x < right and top <= y < bottom
+
+
+class MonitorTopology:
+    """HMONITOR and display device name -> screen, rebuilt only when the set of monitors changes.
+
+    Screens are numbered by display device number (then device name, then position), so a screen keeps
+    its name regardless of the order in which monitors are enumerated.
+    """
+
+    def __init__(self, backend: WindowBackend, policy: str = LARGEST_OVERLAP):
+        self.backend = backend
+        self.policy = policy
+        self._lock = threading.RLock()
+        self._monitors: Optional[List[Tuple[int, Rect]]] = None  # as last enumerated
+        self.screens: List[Screen] = []
+        self.fingerprint = ""  # see layout_fingerprint
+        self._by_monitor: Dict[int, Screen] = {}
+        self._by_device: Dict[str, Screen] = {}
+        self._listeners: List[Callable[[List[Screen]], None]] = []
+        self.rebuilds = 0
+
+    @property
+    def policy(self) -> str:
+        return self._policy
+
+    @policy.setter
+    def policy(self, policy: str) -> None:
+        if policy not in SPANNING_POLICIES:
+            raise ValueError(f"Unknown spanning policy {policy!r}, expected one of {', '.join(SPANNING_POLICIES)}")
+        self._policy = policy
+
+    def add_listener(self, listener: Callable[[List[Screen]], None]) -> None:
+        """Call listener(screens) after the topology changed."""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[List[Screen]], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def rebuild(self, monitors: Optional[List[Tuple[int, Rect]]] = None) -> List[Screen]:
+        """Read the monitors (unless given) and their device names and rebuild the lookup tables."""
+        if monitors is None:
+            monitors = self.backend.enum_monitors()
+        described = [(self.backend.get_monitor_device(hmonitor), hmonitor, tuple(rect)) for hmonitor, rect in monitors]
+        described.sort(key=lambda m: (_display_number(m[0]), m[0], m[2][0], m[2][1]))
+        screens = [Screen(f"Screen{i + 1}", hmonitor, device_name, rect)
+                   for i, (device_name, hmonitor, rect) in enumerate(described)]
+        with self._lock:
+            changed = bool(self.screens) and screens != self.screens
+            self._monitors = list(monitors)
+            self.screens = screens
+            self.fingerprint = layout_fingerprint(screens)
+            self._by_monitor = {screen.hmonitor: screen for screen in screens}
+            self._by_device = {screen.device_name: screen for screen in screens}
+            self.rebuilds += 1
+        if changed:
+            logger.info(f"Display topology changed: {', '.join(f'{s.name}={s.device_name}' for s in screens)}")
+            for listener in list(self._listeners):
+                try:
+                    listener(screens)
+                except Exception as e:
+                    logger.error(f"Error in topology listener: {e}")
+        return screens
+
+    def refresh(self) -> bool:
+        """Re-enumerate monitors and rebuild only if they changed; return whether they did."""
+        monitors = self.backend.enum_monitors()
+        with self._lock:
+            if self._monitors is not None and [(h, tuple(r)) for h, r in monitors] == \
+                    [(h, tuple(r)) for h, r in self._monitors]:
+                return False
+        self.rebuild(monitors)
+        return True
+
+    def invalidate(self) -> None:
+        """Rebuild on the next lookup, e.g. after a display change was reported."""
+        with self._lock:
+            self._monitors = None
+            self._by_monitor = {}
+            self._by_device = {}
+
+    def _ensure_loaded(self) -> None:
+        if self._monitors is None:
+            self.rebuild()
+
+    def screen_for_monitor(self, hmonitor: int) -> Optional[str]:
+        """Return the name of the screen of a monitor handle; an unknown handle means the topology changed."""
+        with self._lock:
+            self._ensure_loaded()
+            screen = self._by_monitor.get(hmonitor)
+            if screen is None and self.refresh():
+                screen = self._by_monitor.get(hmonitor)
+            return screen.name if screen else None
+
+    def screen_for_device(self, device_name: str) -> Optional[str]:
+        """Return the name of the screen of a display device, e.g. '\\\\.\\DISPLAY1'."""
+        with self._lock:
+            self._ensure_loaded()
+            screen = self._by_device.get(device_name)
+            return screen.name if screen else None
+
+    def locate(self, hwnd: int) -> Tuple[int, Optional[str]]:
+        """Return the (monitor handle, screen name) a window belongs to under the spanning policy."""
+        if self.policy == CENTER:
+            left, top, right, bottom = self.backend.get_window_rect(hwnd)
+            x, y = (left + right) // 2, (top + bottom) // 2
+            with self._lock:
+                self._ensure_loaded()
+                for screen in self.screens:
+                    if _contains(screen.rect, x, y):
+                        return screen.hmonitor, screen.name
+        # MonitorFromWindow picks the monitor with the largest intersection, or the nearest one.
+        hmonitor = self.backend.monitor_from_window(hwnd)
+        return hmonitor, self.screen_for_monitor(hmonitor)
@@ -0,0 +1,63 @@
+# src/window/win32_backend.py
+from typing import List, Tuple
+import ctypes
+import logging
+
+import win32api
+import win32con
+import win32gui
+import win32process
+
+from window.backend import Rect, WindowBackend
+
+logger = logging.getLogger(__name__)
+
+DWMWA_CLOAKED = 14
+
+
+class Win32WindowBackend(WindowBackend):
+    """Window backend on top of pywin32 and DWM."""
+
+    def __init__(self):
+        self._dwmapi = ctypes.windll.dwmapi
+
+    def enum_windows(self) -> List[int]:
+        hwnds = []
+        win32gui.EnumWindows(lambda hwnd, acc: acc.append(hwnd) or True, hwnds)
+        return hwnds
+
+    def is_window_visible(self, hwnd: int) -> bool:
+        return bool(win32gui.IsWindowVisible(hwnd))
+
+    def is_tool_window(self, hwnd: int) -> bool:
+        ex_style = win32gui.GetWindowLong(hwnd, win32con.GWL_EXSTYLE)
+        return bool(ex_style & win32con.WS_EX_TOOLWINDOW)
+
+    def is_cloaked(self, hwnd: int) -> bool:
+        cloaked = ctypes.c_int(0)
+        result = self._dwmapi.DwmGetWindowAttribute(
+            hwnd, DWMWA_CLOAKED, ctypes.byref(cloaked), ctypes.sizeof(cloaked)
+        )
+        return result == 0 and cloaked.value != 0
+
+    def get_window_pid(self, hwnd: int) -> int:
+        _, pid = win32process.GetWindowThreadProcessId(hwnd)
+        return pid
+
+    def get_window_text(self, hwnd: int) -> str:
+        return win32gui.GetWindowText(hwnd)
+
+    def get_foreground_window(self) -> int:
+        return win32gui.GetForegroundWindow()
+
+    def get_window_rect(self, hwnd: int) -> Rect:
+        return win32gui.GetWindowRect(hwnd)
+
+    def monitor_from_window(self, hwnd: int) -> int:
+        return int(win32api.MonitorFromWindow(hwnd, win32con.MONITOR_DEFAULTTONEAREST))
+
+    def get_monitor_device(self, hmonitor: int) -> str:
+        return win32api.GetMonitorInfo(hmonitor)['Device']
+
+    def enum_monitors(self) -> List[Tuple[int, Rect]]:
+        return [(int(handle), rect) for handle, _, rect in win32api.EnumDisplayMonitors()]
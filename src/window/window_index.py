@@ -0,0 +1,89 @@
+# src/window/window_index.py
+from typing import Dict, Iterable, List, NamedTuple, Optional
+import logging
+
+from window.backend import WindowBackend
+from window.monitor_topology import MonitorTopology
+
+logger = logging.getLogger(__name__)
+
+
+class WindowEntry(NamedTuple):
+    hwnd: int
+    pid: int
+    monitor: int
+    screen: Optional[str]
+
+
+class WindowIndex:
+    """Index of routable top-level windows keyed by hwnd, built in a single enumeration pass."""
+
+    def __init__(self, backend: WindowBackend, topology: MonitorTopology):
+        self.backend = backend
+        self.topology = topology
+        self.windows: Dict[int, WindowEntry] = {}  # in enumeration (z-)order
+
+    def _describe(self, hwnd: int) -> Optional[WindowEntry]:
+        """Return the entry for a window, or None if it should not be routed."""
+        backend = self.backend
+        if not backend.is_window_visible(hwnd) or backend.is_tool_window(hwnd) or backend.is_cloaked(hwnd):
+            return None
+        monitor, screen = self.topology.locate(hwnd)
+        return WindowEntry(hwnd, backend.get_window_pid(hwnd), monitor, screen)
+
+    def rebuild(self) -> None:
+        """Re-enumerate every window once and replace the index, rebuilding the topology if monitors changed."""
+        windows = {}
+        self.topology.refresh()
+        for hwnd in self.backend.enum_windows():
+            try:
+                entry = self._describe(hwnd)
+            except Exception as e:
+                logger.debug(f"Skipping window handle {hwnd}: {e}")
+                continue
+            if entry is not None:
+                windows[hwnd] = entry
+        self.windows = windows
+
+    def refresh_window(self, hwnd: int) -> Optional[WindowEntry]:
+        """Re-read a single window, adding, updating or dropping its entry."""
+        try:
+            entry = self._describe(hwnd)
+        except Exception:
+            entry = None
+        if entry is None:
+            self.remove_window(hwnd)
+            return None
+        self.windows[hwnd] = entry
+        return entry
+
+    def refresh(self, hwnds: Iterable[int]) -> None:
+        """Re-read only the given windows."""
+        for hwnd in hwnds:
+            self.refresh_window(hwnd)
+
+    def remove_window(self, hwnd: int) -> None:
+        self.windows.pop(hwnd, None)
+
+    def invalidate_monitors(self) -> None:
+        """Forget the monitor to screen index, e.g. after a display change."""
+        self.topology.invalidate()
+
+    def windows_for_pid(self, pid: int) -> List[WindowEntry]:
+        return [entry for entry in self.windows.values() if entry.pid == pid]
+
+    def top_windows(self) -> Dict[int, WindowEntry]:
+        """Map each pid to its top-most indexed window, whether or not it is on a known screen."""
+        top = {}
+        for entry in self.windows.values():
+            if entry.pid not in top:
+                top[entry.pid] = entry
+        return top
+
+    def screen_pids(self) -> Dict[int, str]:
+        """Map each pid to the screen of its top-most indexed window."""
+        screen_pids = {}
+        for entry in self.windows.values():
+            if entry.screen and entry.pid not in screen_pids:
+                screen_pids[entry.pid] = entry.screen
+        return screen_pids
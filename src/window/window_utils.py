@@ -2,84 +2,113 @@
 from typing import List, Dict, Tuple
 import logging
 
-import win32gui
-import win32process
-import win32api
+from window.backend import WindowBackend
+from window.monitor_topology import LARGEST_OVERLAP, SPANNING_POLICIES, MonitorTopology
 
 logger = logging.getLogger(__name__)
 
 class WindowUtils:
+    _backend = None
+    _window_index = None
+    _topology = None
+    _spanning_policy = LARGEST_OVERLAP
+
+    @staticmethod
+    def get_backend() -> WindowBackend:
+        """Return the window backend, creating the Win32 one on first use."""
+        if WindowUtils._backend is None:
+            from window.win32_backend import Win32WindowBackend
+            WindowUtils._backend = Win32WindowBackend()
+        return WindowUtils._backend
+
+    @staticmethod
+    def set_backend(backend: WindowBackend) -> None:
+        """Replace the window backend, e.g. with a simulated one."""
+        WindowUtils._backend = backend
+        WindowUtils._window_index = None
+        WindowUtils._topology = None
+
+    @staticmethod
+    def get_topology() -> MonitorTopology:
+        """Return the shared monitor topology index."""
+        if WindowUtils._topology is None:
+            WindowUtils._topology = MonitorTopology(WindowUtils.get_backend(), WindowUtils._spanning_policy)
+        return WindowUtils._topology
+
+    @staticmethod
+    def set_spanning_policy(policy: str) -> None:
+        """Choose how a window spanning two monitors is assigned to a screen, see monitor_topology."""
+        if policy not in SPANNING_POLICIES:
+            raise ValueError(f"Unknown spanning policy {policy!r}, expected one of {', '.join(SPANNING_POLICIES)}")
+        WindowUtils._spanning_policy = policy
+        if WindowUtils._topology is not None:
+            WindowUtils._topology.policy = policy
+        WindowUtils._window_index = None
+
+    @staticmethod
+    def get_window_index():
+        """Return the shared window index."""
+        if WindowUtils._window_index is None:
+            from window.window_index import WindowIndex
+            WindowUtils._window_index = WindowIndex(WindowUtils.get_backend(), WindowUtils.get_topology())
+        return WindowUtils._window_index
+
     @staticmethod
-    def get_active_monitors() -> List[Tuple[int, int, Tuple[int, int, int, int]]]:
-        """Return a list of monitors with their handle, DC handle, and rect."""
-        return win32api.EnumDisplayMonitors()
+    def get_active_monitors() -> List[Tuple[int, Tuple[int, int, int, int]]]:
+        """Return a list of monitors with their handle and rect."""
+        return WindowUtils.get_backend().enum_monitors()
 
     @staticmethod
     def detect_screens() -> List[Dict[str, any]]:
-        """Detect screens and return a list of screen dictionaries."""
-        screens = []
-        monitors = WindowUtils.get_active_monitors()
-        for idx, (handle, dc_handle, rect) in enumerate(monitors):
-            monitor_info = win32api.GetMonitorInfo(handle)
-            device_name = monitor_info['Device']
-            screen_name = f"Screen{idx+1}"
-            screens.append({"name": screen_name, "position": rect, "device_name": device_name})
-        return screens
+        """Detect screens, rebuilding the topology index, and return a list of screen dictionaries."""
+        screens = WindowUtils.get_topology().rebuild()
+        return [{"name": screen.name, "position": screen.rect, "device_name": screen.device_name}
+                for screen in screens]
+
+    @staticmethod
+    def get_foreground_window() -> int:
+        """Return the handle of the foreground window."""
+        return WindowUtils.get_backend().get_foreground_window()
+
+    @staticmethod
+    def get_window_monitor(hwnd: int) -> int:
+        """Return the handle of the monitor the window is on."""
+        return WindowUtils.get_backend().monitor_from_window(hwnd)
 
     @staticmethod
-    def get_active_window() -> Tuple[int, str, int, str]:
+    def get_window_info(hwnd: int) -> Tuple[int, str, str]:
+        """Return a tuple of the PID, title, and screen name of a window."""
+        backend = WindowUtils.get_backend()
+        title = backend.get_window_text(hwnd)
+        pid = backend.get_window_pid(hwnd)
+        _, screen_name = WindowUtils.get_topology().locate(hwnd)
+        return pid, title, screen_name
+
+    @staticmethod
+    def get_active_window() -> Tuple[int, str, str]:
         """Get the active window and return a tuple of the PID, title, and screen name."""
-        hwnd = win32gui.GetForegroundWindow()
-        title = win32gui.GetWindowText(hwnd)
-        _, pid = win32process.GetWindowThreadProcessId(hwnd)
-        monitor_info = win32api.GetMonitorInfo(win32api.MonitorFromWindow(hwnd))
-        return pid, title, WindowUtils.screen_name_from_display(monitor_info['Device'])
+        return WindowUtils.get_window_info(WindowUtils.get_foreground_window())
 
     @staticmethod
     def screen_name_from_display(display_name: str) -> str:
-        """Get the screen name from the display name."""
-        base_name = display_name.replace('\\\\.\\', '')  # e.g., 'DISPLAY1'
-        if "DISPLAY" in base_name:
-            num_part = ''.join(filter(str.isdigit, base_name))
-            if num_part.isdigit():
-                return "Screen" + num_part
-        return None
-    
+        """Get the screen name from the display name, e.g. '\\\\.\\DISPLAY1'."""
+        return WindowUtils.get_topology().screen_for_device(display_name)
+
     @staticmethod
     def get_hwnd_from_pid(pid: int) -> int:
-        """Get the window handle from the PID."""
-        def callback(hwnd, hwnds):
-            if win32gui.IsWindowVisible(hwnd):
-                _, found_pid = win32process.GetWindowThreadProcessId(hwnd)
-                if found_pid == pid:
-                    hwnds.append(hwnd)
-            return True
-        
-        hwnds = []
-        win32gui.EnumWindows(callback, hwnds)
-        return hwnds[0] if hwnds else None
-        
+        """Get the top-most indexed window handle of the PID."""
+        windows = WindowUtils.get_window_index().windows_for_pid(pid)
+        return windows[0].hwnd if windows else None
+
     @staticmethod
     def get_window_screen(pid: int) -> str:
-        """Get the screen name from the PID."""
-        hwnd = WindowUtils.get_hwnd_from_pid(pid)
-        monitor_info = win32api.GetMonitorInfo(win32api.MonitorFromWindow(hwnd))
-        return WindowUtils.screen_name_from_display(monitor_info['Device'])
-    
+        """Get the screen name of the top-most indexed window of the PID."""
+        windows = WindowUtils.get_window_index().windows_for_pid(pid)
+        return windows[0].screen if windows else None
+
     @staticmethod
     def get_screen_pids() -> dict:
-        """Get the screen name from the PID."""
-        screen_pids = {}
-
-        def enum_window_callback(hwnd, _):
-            if win32gui.IsWindowVisible(hwnd):
-                _, pid = win32process.GetWindowThreadProcessId(hwnd)
-                try:
-                    screen_name = WindowUtils.get_window_screen(pid)
-                    if screen_name:
-                        screen_pids[pid] = screen_name
-                except Exception as e:
-                    print(f"Error processing window handle {hwnd}: {e}")
-
-        win32gui.EnumWindows(enum_window_callback, None)
-        return screen_pids
\ No newline at end of file
+        """Get the screen name of every PID that owns a visible window."""
+        index = WindowUtils.get_window_index()
+        index.rebuild()
+        return index.screen_pids()
@@ -0,0 +1,31 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+# The application imports its packages from src/, as python src/main.py runs it.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from audio.audio_service import AudioService  # noqa: E402
+from audio.backend import SimulatedAudioBackend  # noqa: E402
+from window.backend import SimulatedWindowBackend  # noqa: E402
+from window.window_utils import WindowUtils  # noqa: E402
+
+
+@pytest.fixture
+def audio_backend():
+    """A SimulatedAudioBackend installed as AudioService's backend for the duration of a test."""
+    backend = SimulatedAudioBackend()
+    AudioService.set_backend(backend)
+    yield backend
+    AudioService.set_backend(SimulatedAudioBackend())
+
+
+@pytest.fixture
+def window_backend():
+    """A SimulatedWindowBackend installed as WindowUtils' backend for the duration of a test."""
+    backend = SimulatedWindowBackend()
+    WindowUtils.set_backend(backend)
+    yield backend
+    WindowUtils.set_backend(SimulatedWindowBackend())
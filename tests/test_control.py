@@ -0,0 +1,141 @@
+# tests/test_control.py
+import json
+import os
+import socket
+import sys
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from services.control import ControlClient, ControlServer, read_token
+
+
+class FakeEngine(SimpleNamespace):
+    """The parts of RoutingEngine the control commands call."""
+
+    def __init__(self):
+        super().__init__(stop_event=threading.Event(), config={"Screen1": "Speakers"}, rules_set=[],
+                         profiles=lambda: {}, stats=lambda: {"routes": 0})
+
+    def set_rules(self, rules):
+        self.rules_set.append(rules)
+        return SimpleNamespace(to_json=lambda: rules)
+
+    def set_mappings(self, mappings):
+        if "Screen9" in mappings:
+            raise ValueError("Unknown screen: Screen9")
+        return mappings
+
+    def sessions(self, device=None):
+        raise TypeError("a bug inside the command")
+
+
+@pytest.fixture
+def engine():
+    return FakeEngine()
+
+
+@pytest.fixture
+def server(engine, tmp_path):
+    server = ControlServer(engine, port=0, token_path=tmp_path / "control.token")
+    server.start()
+    yield server
+    server.stop()
+
+
+def connect(server):
+    connection = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    return connection, connection.makefile("rwb")
+
+
+def send(stream, line: bytes):
+    stream.write(line)
+    stream.flush()
+    response = stream.readline()
+    return json.loads(response) if response else None
+
+
+def request(server, **fields) -> bytes:
+    return json.dumps(dict(fields, token=server.token)).encode() + b"\n"
+
+
+def test_authenticated_requests_share_a_connection(server):
+    connection, stream = connect(server)
+    assert send(stream, request(server, command="mappings")) == {"ok": True, "result": {"Screen1": "Speakers"}}
+    assert send(stream, request(server, command="stats")) == {"ok": True, "result": {"routes": 0}}
+    connection.close()
+
+
+def test_client_sends_its_token(server):
+    client = ControlClient(server.port, token=read_token(server.token_path))
+    assert client.request("set_mapping", screen="Screen1", device="Headset") == {"Screen1": "Headset"}
+    client.close()
+
+
+@pytest.mark.parametrize("token", [None, "wrong", 42, "é"])
+def test_request_without_the_token_closes_the_connection(server, engine, token):
+    connection, stream = connect(server)
+    fields = {"command": "stop"} if token is None else {"command": "stop", "token": token}
+    response = send(stream, json.dumps(fields).encode() + b"\n")
+
+    assert response == {"ok": False, "error": "Invalid or missing token"}
+    assert stream.readline() == b""
+    assert not engine.stop_event.is_set()
+    connection.close()
+
+
+def test_cross_protocol_http_request_runs_nothing(server, engine):
+    body = request(server, command="set_rules", rules={"version": 1, "rules": []})
+    connection, stream = connect(server)
+    http = (b"POST / HTTP/1.1\r\nHost: 127.0.0.1:8766\r\nContent-Type: text/plain\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    response = send(stream, http)
+
+    assert not response["ok"]
+    assert stream.readline() == b""
+    assert engine.rules_set == []
+    connection.close()
+
+
+@pytest.mark.parametrize("line", [b"not json\n", b"[1, 2]\n", b'{"command": ["stop"]}\n'])
+def test_malformed_line_closes_the_connection(server, line):
+    connection, stream = connect(server)
+    assert not send(stream, line)["ok"]
+    assert stream.readline() == b""
+    connection.close()
+
+
+def test_invalid_arguments_close_the_connection(server):
+    connection, stream = connect(server)
+    response = send(stream, request(server, command="set_mapping", screen="Screen1"))
+
+    assert response["error"].startswith("Invalid arguments for set_mapping")
+    assert stream.readline() == b""
+    connection.close()
+
+
+def test_command_errors_are_reported_as_such(server):
+    connection, stream = connect(server)
+    assert send(stream, request(server, command="set_mapping", screen="Screen9", device="Speakers")) == \
+        {"ok": False, "error": "Unknown screen: Screen9"}
+    # A TypeError raised inside a command is not mistaken for bad arguments.
+    assert send(stream, request(server, command="sessions")) == {"ok": False, "error": "a bug inside the command"}
+    assert send(stream, request(server, command="mappings"))["ok"]
+    connection.close()
+
+
+def test_token_is_new_per_run_and_removed_on_stop(engine, tmp_path):
+    path = tmp_path / "control.token"
+    first = ControlServer(engine, port=0, token_path=path)
+    first.start()
+    token = read_token(path)
+    if sys.platform != "win32":
+        assert os.stat(path).st_mode & 0o777 == 0o600
+    first.stop()
+    assert not path.exists()
+
+    second = ControlServer(engine, port=0, token_path=path)
+    second.start()
+    assert read_token(path) != token
+    second.stop()
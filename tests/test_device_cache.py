@@ -0,0 +1,172 @@
+# tests/test_device_cache.py
+import pytest
+
+from audio.backend import SimulatedAudioBackend
+from audio.device_registry import DeviceRegistry
+from audio.volume_cache import EndpointVolumeCache
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+HEADSET = "{0.0.0.00000000}.{headset}"
+USB = "{0.0.0.00000000}.{usb}"
+
+
+@pytest.fixture
+def backend():
+    backend = SimulatedAudioBackend()
+    backend.add_endpoint(SPEAKERS, "Speakers")
+    backend.add_endpoint(HEADSET, "Headset")
+    return backend
+
+
+@pytest.fixture
+def registry(backend):
+    registry = DeviceRegistry(backend)
+    registry.start()
+    yield registry
+    registry.stop()
+
+
+@pytest.fixture
+def cache(backend, registry):
+    # Wired as AudioService wires them: every device change evicts that device's interface.
+    cache = EndpointVolumeCache(backend)
+    registry.add_listener(cache.evict)
+    return cache
+
+
+def test_reads_after_the_first_are_served_from_the_snapshot(backend, registry):
+    assert registry.devices() == {"Speakers": SPEAKERS, "Headset": HEADSET}
+    assert registry.device_name(HEADSET) == "Headset"
+    assert registry.is_active(SPEAKERS)
+
+    assert (registry.misses, registry.hits) == (1, 2)
+    assert backend.calls["enumerate_output_devices"] == 1
+
+
+def test_added_device_is_read_alone(backend, registry):
+    registry.devices()
+    backend.add_endpoint(USB, "USB Audio")
+
+    assert registry.devices() == {"Speakers": SPEAKERS, "Headset": HEADSET, "USB Audio": USB}
+    assert backend.calls["enumerate_output_devices"] == 1
+    assert backend.calls["get_output_device"] == 1
+    assert registry.device_reads == 1
+
+
+def test_removed_device_leaves_without_a_read(backend, registry):
+    registry.devices()
+    backend.remove_endpoint(HEADSET)
+
+    assert registry.devices() == {"Speakers": SPEAKERS}
+    assert not registry.is_active(HEADSET)
+    assert backend.calls["enumerate_output_devices"] == 1
+    assert backend.calls["get_output_device"] == 0
+
+
+def test_renamed_device_keeps_its_id(backend, registry):
+    registry.devices()
+    backend.rename(HEADSET, "Gaming Headset")
+
+    assert registry.devices() == {"Speakers": SPEAKERS, "Gaming Headset": HEADSET}
+    assert registry.device_name(HEADSET) == "Gaming Headset"
+    assert backend.calls["enumerate_output_devices"] == 1
+
+
+def test_disabled_and_reenabled_device(backend, registry):
+    registry.devices()
+    backend.set_state(HEADSET, False)
+    assert registry.endpoints() == {SPEAKERS: "Speakers"}
+
+    backend.set_state(HEADSET, True)
+    assert registry.endpoints() == {SPEAKERS: "Speakers", HEADSET: "Headset"}
+    assert backend.calls["enumerate_output_devices"] == 1
+
+
+def test_same_name_devices_are_both_kept(backend, registry):
+    backend.add_endpoint(USB, "Headset")
+    assert registry.endpoints() == {SPEAKERS: "Speakers", HEADSET: "Headset", USB: "Headset"}
+
+    backend.remove_endpoint(HEADSET)
+    assert registry.device_id("Headset") == USB
+
+
+def test_invalidate_enumerates_again(backend, registry):
+    registry.devices()
+    registry.invalidate()
+    registry.devices()
+
+    assert registry.misses == 2
+    assert backend.calls["enumerate_output_devices"] == 2
+
+
+def test_without_notifications_the_snapshot_expires(monkeypatch):
+    backend = SimulatedAudioBackend(notifications=False)
+    backend.add_endpoint(SPEAKERS, "Speakers")
+    registry = DeviceRegistry(backend)
+    registry.start()
+    now = [100.0]
+    monkeypatch.setattr("audio.device_registry.time.monotonic", lambda: now[0])
+    registry.devices()
+    now[0] += 1.0
+    registry.devices()
+    assert backend.calls["enumerate_output_devices"] == 1
+
+    now[0] += 10.0
+    registry.devices()
+    assert backend.calls["enumerate_output_devices"] == 2
+
+
+def test_volume_interfaces_are_activated_once(backend, registry, cache):
+    assert cache.get_volume(SPEAKERS) == 0.5
+    assert cache.set_volume(SPEAKERS, 0.8)
+    assert cache.adjust_volume(SPEAKERS, 0.5) == 1.0
+
+    assert (cache.misses, cache.hits) == (1, 2)
+    assert backend.calls["activate_endpoint_volume"] == 1
+
+
+@pytest.mark.parametrize("change", [
+    lambda backend: backend.remove_endpoint(HEADSET),
+    lambda backend: backend.set_state(HEADSET, False),
+    lambda backend: backend.rename(HEADSET, "Gaming Headset"),
+])
+def test_device_change_evicts_only_that_device(backend, registry, cache, change):
+    registry.devices()
+    cache.get_volume(SPEAKERS)
+    cache.get_volume(HEADSET)
+    headset = cache.get(HEADSET)
+
+    change(backend)
+
+    assert headset.released
+    assert not cache.get(SPEAKERS).released
+    assert backend.calls["release_endpoint_volume"] == 1
+
+
+def test_added_device_evicts_nothing_else(backend, registry, cache):
+    registry.devices()
+    cache.get_volume(SPEAKERS)
+    backend.add_endpoint(USB, "USB Audio")
+
+    assert cache.get_volume(USB) == 0.5
+    assert backend.calls["release_endpoint_volume"] == 0
+    assert cache.misses == 2
+
+
+def test_unavailable_device_is_not_cached(backend, registry, cache):
+    backend.set_state(HEADSET, False)
+
+    assert cache.get_volume(HEADSET) is None
+    assert not cache.set_volume(HEADSET, 0.3)
+    assert cache.misses == 2
+
+
+def test_failed_call_evicts_the_stale_interface(backend):
+    cache = EndpointVolumeCache(backend)  # no notifications reach it, as when they are unavailable
+    cache.get_volume(HEADSET)
+    backend.endpoints[HEADSET]["active"] = False
+
+    with pytest.raises(OSError):
+        cache.get_volume(HEADSET)
+    assert backend.calls["release_endpoint_volume"] == 1
+    assert cache.get_volume(HEADSET) is None
@@ -0,0 +1,32 @@
+# tests/test_events.py
+from services.events import FOREGROUND, WAKE, PollingEventSource, SyntheticEventSource
+
+
+def test_each_get_is_one_wakeup():
+    source = SyntheticEventSource()
+    source.emit(1)
+    assert source.get(0.01).hwnd == 1
+    assert source.get(0.01) is None
+    assert source.wakeups == 2
+
+
+def test_polling_counts_one_wakeup_per_return(window_backend):
+    monitor = window_backend.add_monitor((0, 0, 1920, 1080))
+    window_backend.set_foreground(window_backend.add_window(1234, monitor))
+    source = PollingEventSource(min_interval=0.01, max_interval=0.02)
+
+    assert source.get(1.0).kind == FOREGROUND
+    assert source.wakeups == 1
+    # Nothing changes, so this samples several times before timing out; that is still one wakeup.
+    assert source.get(0.1) is None
+    assert source.wakeups == 2
+    assert window_backend.calls["get_foreground_window"] > 3
+
+
+def test_polling_wakes_for_posted_events(window_backend):
+    source = PollingEventSource(min_interval=0.01, max_interval=0.02)
+    source.get(0.05)
+    source.wake()
+
+    assert source.get(1.0).kind == WAKE
+    assert source.wakeups == 2
@@ -0,0 +1,128 @@
+# tests/test_mappings.py
+from types import SimpleNamespace
+
+import pytest
+
+import services.engine
+from config.rules import NO_RULES
+from config.settings import ConfigSnapshot
+from gui.app import App
+from gui.view_model import device_labels, read_view_state
+from services.engine import RoutingEngine
+from services.processes import SimulatedProcessTable
+from services.route_journal import RouteJournal
+from window.window_utils import WindowUtils
+
+FRONT = "{0.0.0.00000000}.{front}"
+REAR = "{0.0.0.00000000}.{rear}"
+HEADSET = "{0.0.0.00000000}.{headset}"
+
+
+@pytest.fixture
+def saved():
+    """The configs the engine saved, instead of writing them to screen_audio_mapping.json."""
+    return []
+
+
+@pytest.fixture
+def make_engine(audio_backend, window_backend, saved, monkeypatch, tmp_path):
+    """Build a RoutingEngine over two screens and two devices named Speakers, starting from a saved mapping."""
+    window_backend.add_monitor((0, 0, 1920, 1080))
+    window_backend.add_monitor((1920, 0, 3840, 1080))
+    audio_backend.add_endpoint(FRONT, "Speakers")
+    audio_backend.add_endpoint(REAR, "Speakers")
+    audio_backend.add_endpoint(HEADSET, "Headset")
+    monkeypatch.setattr(services.engine, "load_profiles", lambda: {})
+    monkeypatch.setattr(services.engine, "load_rules", lambda: NO_RULES)
+    monkeypatch.setattr(services.engine, "save_config", lambda config, rules=None: saved.append(config))
+    monkeypatch.setattr(services.engine, "RouteJournal", lambda: RouteJournal(tmp_path / "routes.jsonl"))
+    monkeypatch.setattr(services.engine, "start_monitor", lambda *args, **kwargs: None)
+    engines = []
+
+    def make(mapping=None, endpoints=None):
+        monkeypatch.setattr(services.engine, "load_config", lambda: (dict(mapping or {}), dict(endpoints or {})))
+        engines.append(RoutingEngine(SimulatedProcessTable()))
+        return engines[-1]
+
+    yield make
+    for engine in engines:
+        engine.stop()
+
+
+def test_devices_with_the_same_name_are_mapped_by_endpoint_id(make_engine, saved):
+    engine = make_engine()
+    config = engine.set_mappings({"Screen1": FRONT, "Screen2": REAR})
+    assert dict(config) == {"Screen1": "Speakers", "Screen2": "Speakers"}
+    assert config.endpoints == {"Screen1": FRONT, "Screen2": REAR}
+    assert saved == [config]
+
+
+def test_a_name_is_accepted_only_if_one_device_has_it(make_engine):
+    engine = make_engine()
+    assert engine.set_mappings({"Screen1": "Headset"}).endpoints == {"Screen1": HEADSET}
+    with pytest.raises(ValueError, match="Several devices are named Speakers"):
+        engine.set_mappings({"Screen2": "Speakers"})
+    with pytest.raises(ValueError, match="Unknown device"):
+        engine.set_mappings({"Screen2": "Monitor"})
+
+
+def test_unplugged_device_keeps_its_mapping(make_engine, audio_backend):
+    engine = make_engine({"Screen1": "Speakers"}, {"Screen1": REAR})
+    audio_backend.set_state(REAR, False)
+    config = engine.set_mappings({"Screen1": REAR, "Screen2": FRONT})
+    assert config.endpoints == {"Screen1": REAR, "Screen2": FRONT}
+    config = engine.set_mappings({"Screen1": ""})
+    assert dict(config) == {"Screen2": "Speakers"}
+
+
+def test_legacy_mapping_by_name_is_stored_by_endpoint_id(make_engine):
+    engine = make_engine({"Screen1": "Headset", "Screen2": "Speakers"})
+    config = engine.set_mappings({})
+    # The headset is the only device of its name; which Speakers was meant cannot be told, so that stays a name.
+    assert config.endpoints == {"Screen1": HEADSET}
+
+
+def test_profile_of_a_new_display_layout_is_saved(make_engine, window_backend, saved):
+    engine = make_engine({"Screen1": "Headset"})
+    docked = engine.config.layout
+    topology = WindowUtils.get_topology()
+    third = window_backend.add_monitor((3840, 0, 5760, 1080))
+
+    topology.refresh()
+    assert [config.layout for config in saved] == [engine.config.layout]
+    assert set(saved[0].profiles) == {docked, engine.config.layout}
+
+    window_backend.remove_monitor(third)
+    topology.refresh()
+    assert len(saved) == 1  # a layout seen before has its profile saved already
+
+
+def test_duplicate_names_are_numbered_by_endpoint_id():
+    endpoints = {REAR: "Speakers", HEADSET: "Headset", FRONT: "Speakers"}
+    assert device_labels(endpoints) == {REAR: "Speakers (2)", HEADSET: "Headset", FRONT: "Speakers (1)"}
+
+
+def test_view_lists_every_device_and_shows_mappings_by_label():
+    engine = SimpleNamespace(
+        screens=[{"name": "Screen1"}, {"name": "Screen2"}, {"name": "Screen3"}],
+        config=ConfigSnapshot({"Screen1": "Speakers", "Screen2": "Headset", "Screen3": "Speakers"}, 1,
+                              endpoints={"Screen1": REAR, "Screen3": "{0.0.0.00000000}.{unplugged}"}),
+        endpoints={FRONT: "Speakers", REAR: "Speakers", HEADSET: "Headset"},
+    )
+    state = read_view_state(engine)
+    assert state.devices == {"Speakers (1)": FRONT, "Speakers (2)": REAR, "Headset": HEADSET}
+    assert state.mappings == {"Screen1": "Speakers (2)", "Screen2": "Headset", "Screen3": "Speakers"}
+
+
+def test_apply_sends_the_endpoint_id_of_the_chosen_device():
+    sent = []
+    state = read_view_state(SimpleNamespace(screens=[{"name": "Screen1"}, {"name": "Screen2"}],
+                                            config=ConfigSnapshot({"Screen2": "Headset"}, 1),
+                                            endpoints={FRONT: "Speakers", REAR: "Speakers", HEADSET: "Headset"}))
+    selected = {"Screen1": "Speakers (2)", "Screen2": "Headset"}
+    app = SimpleNamespace(view_model=SimpleNamespace(state=state), device_map=state.devices,
+                          mappings={screen: SimpleNamespace(get=lambda label=label: label)
+                                    for screen, label in selected.items()},
+                          engine=SimpleNamespace(set_mappings=sent.append))
+    App.save_mappings(app)
+    assert sent == [{"Screen1": REAR}]
@@ -0,0 +1,119 @@
+# tests/test_reconciler_families.py
+import pytest
+
+from services.dwell import DwellPolicy
+from services.events import FOREGROUND, WindowEvent
+from services.monitor_service import _handle_events
+from services.processes import SimulatedProcessTable
+from services.reconciler import Reconciler
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from window.monitor_topology import MonitorTopology
+from window.window_index import WindowIndex
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+HEADSET = "{0.0.0.00000000}.{headset}"
+CONFIG = {"Screen1": "Speakers", "Screen2": "Headset"}
+
+
+class Desktop:
+    """A browser whose main window is on Screen1 and a pop-out window of one of its child processes on Screen2,
+    both played through one audio process."""
+
+    def __init__(self, audio_backend, window_backend):
+        audio_backend.add_endpoint(SPEAKERS, "Speakers")
+        audio_backend.add_endpoint(HEADSET, "Headset")
+        self.audio = audio_backend
+        self.processes = SimulatedProcessTable()
+        self.windows = window_backend
+        self.screen1 = self.windows.add_monitor((0, 0, 1920, 1080))
+        self.screen2 = self.windows.add_monitor((1920, 0, 3840, 1080))
+
+        self.browser = self.processes.spawn(name="chrome.exe")
+        self.popout = self.processes.spawn(name="chrome.exe", parent=self.browser)
+        self.player = self.processes.spawn(name="chrome.exe", parent=self.browser)
+        audio_backend.start_session(self.player, SPEAKERS, name="chrome.exe")
+        self.main_window = self.windows.add_window(self.browser, self.screen1)
+        self.popout_window = self.windows.add_window(self.popout, self.screen2)
+
+        self.now = 0.0
+        self.route_queue = RouteQueue(AppliedRoutes(self.processes))
+        self.reconciler = Reconciler(WindowIndex(self.windows, MonitorTopology(self.windows)), self.route_queue,
+                                     clock=lambda: self.now)
+
+    def raise_window(self, hwnd: int) -> None:
+        """Move a window to the top of the z-order without a foreground event, as a sweep would find it."""
+        window = self.windows.windows.pop(hwnd)
+        self.windows.windows = {hwnd: window, **self.windows.windows}
+
+    def cycle(self, foreground=()) -> None:
+        self.now += 10.0  # past the sweep and batch intervals
+        self.reconciler.reconcile(CONFIG, foreground)
+
+    def player_route(self):
+        return self.audio.routes.get(self.player)
+
+
+@pytest.fixture
+def desktop(audio_backend, window_backend):
+    return Desktop(audio_backend, window_backend)
+
+
+def test_shared_audio_process_is_left_alone_until_a_window_is_focused(desktop):
+    for top in (desktop.main_window, desktop.popout_window, desktop.main_window):
+        desktop.raise_window(top)
+        desktop.cycle()
+        assert desktop.player_route() is None
+        assert desktop.player not in desktop.reconciler.desired
+
+
+def test_shared_audio_process_follows_the_last_focused_window(desktop):
+    desktop.cycle([(desktop.popout, HEADSET)])
+    assert desktop.player_route() == HEADSET
+
+    # Sweeps keep it there whichever window happens to be on top.
+    for top in (desktop.main_window, desktop.popout_window, desktop.main_window):
+        desktop.raise_window(top)
+        desktop.cycle()
+        assert desktop.player_route() == HEADSET
+    assert desktop.audio.calls["set_application_endpoint"] == 1
+
+    desktop.cycle([(desktop.browser, SPEAKERS)])
+    desktop.raise_window(desktop.popout_window)
+    desktop.cycle()
+    assert desktop.player_route() == SPEAKERS
+    assert desktop.audio.calls["set_application_endpoint"] == 2
+
+
+def test_audio_process_follows_its_windows_when_they_agree(desktop):
+    desktop.windows.move_window(desktop.popout_window, desktop.screen1)
+    desktop.windows.set_foreground(desktop.main_window)
+    desktop.cycle()
+    assert desktop.player_route() == SPEAKERS
+
+    for hwnd in (desktop.main_window, desktop.popout_window):
+        desktop.windows.move_window(hwnd, desktop.screen2)
+    desktop.cycle()
+    assert desktop.player_route() == HEADSET
+
+
+def test_single_window_family_routes_its_audio_process(desktop):
+    desktop.windows.close_window(desktop.popout_window)
+    desktop.processes.exit(desktop.popout)
+    desktop.cycle()
+    assert desktop.player_route() == SPEAKERS
+
+    desktop.windows.move_window(desktop.main_window, desktop.screen2)
+    desktop.cycle()
+    assert desktop.player_route() == HEADSET
+
+
+def test_focus_route_counts_once_the_audio_process_moved(desktop):
+    desktop.cycle()
+    events = [WindowEvent(FOREGROUND, desktop.popout_window, 1.0)]
+
+    routes = _handle_events(events, CONFIG, DwellPolicy(0), desktop.reconciler, desktop.now)
+
+    # The pop-out's own process has no session; the route is done once the family's audio process moved.
+    assert routes == [(desktop.popout, HEADSET, 1.0)]
+    assert desktop.player_route() == HEADSET
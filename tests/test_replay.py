@@ -0,0 +1,120 @@
+# tests/test_replay.py
+import pytest
+
+from benchmarks.replay import TraceReplayer
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+HEADSET = "{0.0.0.00000000}.{headset}"
+DISPLAY1 = [1, "\\\\.\\DISPLAY1", [0, 0, 1920, 1080]]
+DISPLAY2 = [2, "\\\\.\\DISPLAY2", [1920, 0, 3840, 1080]]
+TWO_SCREENS = "DISPLAY1@0,0,1920,1080+DISPLAY2@1920,0,3840,1080"
+ONE_SCREEN = "DISPLAY1@0,0,1920,1080"
+PLAYER, GAME = 10, 20
+
+# A player on Screen1 and a game on Screen2, both playing through the speakers when recording started.
+START = [
+    [0, "monitors", [DISPLAY1, DISPLAY2]],
+    [0, "endpoints", [[SPEAKERS, "Speakers"], [HEADSET, "Headset"]]],
+    [0, "config", {"Screen1": "Speakers", "Screen2": "Headset"}, {"Screen1": SPEAKERS, "Screen2": HEADSET},
+     None, TWO_SCREENS],
+    [0, "process", PLAYER, None, "player.exe"],
+    [0, "process", GAME, None, "game.exe"],
+    [0, "applied", [[PLAYER, SPEAKERS], [GAME, SPEAKERS]]],
+    [0, "window", 100, PLAYER, 1, ""],
+    [0, "window", 200, GAME, 2, ""],
+    [0, "sweep"],
+    [0, "session", PLAYER, SPEAKERS],
+    [0, "session", GAME, SPEAKERS],
+]
+# The routes the start issues: the game goes to Screen2's headset, the player already plays where it should.
+STARTED = [(0.0, GAME, HEADSET)]
+
+
+# The replayer installs backends of its own; the fixtures give the default ones back to the other tests.
+pytestmark = pytest.mark.usefixtures("window_backend", "audio_backend")
+
+
+def replay(records):
+    """Replay the start and then records with a 200 ms dwell; return the routes issued and the report."""
+    replayer = TraceReplayer(START + records, dwell_ms=200)
+    report = replayer.run()
+    assert report["errors"] == 0
+    return replayer.routes, report
+
+
+def test_start_routes_each_process_to_its_screen():
+    routes, _ = replay([])
+    assert routes == STARTED
+
+
+def test_recorded_routes_are_matched():
+    _, report = replay([
+        [0, "route", GAME, HEADSET],
+        [1000, "window", 100, PLAYER, 2, ""],
+        [1000, "events", [["location", 100]]],
+        [1200, "route", PLAYER, HEADSET],
+    ])
+    assert (report["matched"], report["mismatched"], report["missing"], report["extra"]) == (2, 0, 0, 0)
+    assert report["drift_max_ms"] == 0
+
+
+def test_move_routes_once_the_dwell_expires():
+    routes, _ = replay([
+        [1000, "window", 100, PLAYER, 2, ""],
+        [1000, "events", [["location", 100]]],
+    ])
+    assert routes == STARTED + [(1.2, PLAYER, HEADSET)]
+
+
+def test_move_back_within_the_dwell_routes_nothing():
+    routes, _ = replay([
+        [1000, "window", 100, PLAYER, 2, ""],
+        [1000, "events", [["location", 100]]],
+        [1100, "window", 100, PLAYER, 1, ""],
+        [1100, "events", [["location", 100]]],
+    ])
+    assert routes == STARTED
+
+
+def test_drag_routes_once_when_it_ends():
+    routes, _ = replay([
+        [1000, "events", [["move_start", 100]]],
+        [1100, "window", 100, PLAYER, 2, ""],
+        [1100, "events", [["location", 100]]],
+        [1600, "events", [["location", 100]]],
+        [1700, "events", [["move_end", 100]]],
+    ])
+    # The window sat on Screen2 for longer than the dwell time, but the route waits for the drag to end.
+    assert routes == STARTED + [(1.7, PLAYER, HEADSET)]
+
+
+def test_drag_back_to_the_first_screen_routes_nothing():
+    routes, _ = replay([
+        [1000, "events", [["move_start", 100]]],
+        [1100, "window", 100, PLAYER, 2, ""],
+        [1100, "events", [["location", 100]]],
+        [1500, "window", 100, PLAYER, 1, ""],
+        [1500, "events", [["location", 100]]],
+        [1700, "events", [["move_end", 100]]],
+    ])
+    assert routes == STARTED
+
+
+def test_unplugged_headset_is_routed_to_once_it_returns():
+    routes, _ = replay([
+        [1000, "endpoints", [[SPEAKERS, "Speakers"]]],
+        [2000, "endpoints", [[SPEAKERS, "Speakers"], [HEADSET, "Headset"]]],
+    ])
+    # Screen2 stays mapped to the headset's endpoint ID while it is gone.
+    assert routes == STARTED + [(2.0, GAME, HEADSET)]
+
+
+def test_layout_swap_routes_by_the_new_layouts_profile():
+    routes, _ = replay([
+        [1000, "monitors", [DISPLAY1]],
+        [1000, "window", 200, GAME, 1, ""],
+        [1000, "sweep"],
+        [1000, "config", {"Screen1": "Headset"}, {"Screen1": HEADSET}, None, ONE_SCREEN],
+    ])
+    # The game moved to the only screen left; the player follows Screen1 once its new profile is in.
+    assert routes == STARTED + [(1.0, PLAYER, HEADSET)]
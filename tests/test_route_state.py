@@ -0,0 +1,143 @@
+# tests/test_route_state.py
+import pytest
+
+from audio.session_index import SessionIndex
+from services.processes import SimulatedProcessTable
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+HEADSET = "{0.0.0.00000000}.{headset}"
+
+
+@pytest.fixture
+def processes():
+    return SimulatedProcessTable()
+
+
+@pytest.fixture
+def applied(processes):
+    return AppliedRoutes(processes)
+
+
+def reuse(processes: SimulatedProcessTable, pid: int) -> int:
+    """Exit the process holding pid and start another one under the same PID, with a later create_time."""
+    created = processes.create_time(pid)
+    processes.exit(pid)
+    processes.spawn(pid=pid)
+    assert processes.create_time(pid) != created
+    return pid
+
+
+def test_route_of_a_reused_pid_is_dropped(processes, applied):
+    pid = processes.spawn()
+    applied[pid] = SPEAKERS
+    reuse(processes, pid)
+
+    assert applied.validate() == 1
+    assert applied.get(pid) is None
+    assert pid not in applied
+    assert len(applied) == 0
+    assert applied.stats()["evicted_dead"] == 1
+
+
+def test_reused_pid_is_routed_again(processes, applied):
+    pid = processes.spawn()
+    applied[pid] = SPEAKERS
+    first = applied.identity(pid)
+    reuse(processes, pid)
+    applied.validate([pid])
+
+    applied[pid] = SPEAKERS
+    assert applied.get(pid) == SPEAKERS
+    assert applied.identity(pid) != first
+    assert len(applied) == 1
+
+
+def test_routing_a_reused_pid_replaces_the_old_identity(processes, applied):
+    pid = processes.spawn()
+    applied[pid] = SPEAKERS
+    reuse(processes, pid)
+
+    applied[pid] = HEADSET  # routed before any validation
+    assert applied.items() == [(pid, HEADSET)]
+
+
+def test_lookups_do_not_read_the_process_table(processes, applied):
+    pids = [processes.spawn() for _ in range(10)]
+    for pid in pids:
+        applied[pid] = SPEAKERS
+    processes.calls.clear()
+
+    for _ in range(100):
+        for pid in pids:
+            assert applied.get(pid) == SPEAKERS
+
+    assert processes.calls["create_time"] == 0
+
+
+def test_validate_reads_only_the_given_pids(processes, applied):
+    pids = [processes.spawn() for _ in range(10)]
+    for pid in pids:
+        applied[pid] = SPEAKERS
+    reuse(processes, pids[0])
+    reuse(processes, pids[1])
+    processes.calls.clear()
+
+    assert applied.validate([pids[0], 99999]) == 1
+    assert processes.calls["create_time"] == 1
+    assert applied.get(pids[1]) == SPEAKERS  # not validated yet
+    assert applied.validate() == 1
+    assert applied.get(pids[1]) is None
+
+
+def test_reused_pids_are_handed_on_once(processes, applied):
+    first, second = processes.spawn(), processes.spawn()
+    applied[first] = SPEAKERS
+    applied[second] = SPEAKERS
+    reuse(processes, first)
+    reuse(processes, second)
+
+    applied.validate([first])
+    applied[second] = HEADSET
+    assert applied.take_reused() == {first, second}
+    assert applied.take_reused() == set()
+
+
+def test_exited_process_is_dropped_by_validate_and_sweep(processes, applied):
+    first, second = processes.spawn(), processes.spawn()
+    applied[first] = SPEAKERS
+    applied[second] = HEADSET
+    processes.exit(first)
+
+    assert applied.validate([first]) == 1
+    processes.exit(second)
+    assert applied.sweep() == 1
+    assert len(applied) == 0
+
+
+def test_restore_skips_reused_pids(processes, applied):
+    kept, reused = processes.spawn(), processes.spawn()
+    journaled = {applied.identity(kept): SPEAKERS, applied.identity(reused): HEADSET}
+    reuse(processes, reused)
+
+    assert applied.restore(journaled) == 1
+    assert applied.items() == [(kept, SPEAKERS)]
+
+
+def test_route_queue_routes_a_reused_pid_again(processes, applied, audio_backend):
+    audio_backend.add_endpoint(SPEAKERS, "Speakers")
+    route_queue = RouteQueue(applied, SessionIndex(audio_backend))
+    route_queue.session_index.start()
+    pid = processes.spawn()
+    session_id = audio_backend.start_session(pid, SPEAKERS)
+    assert route_queue.submit(pid, SPEAKERS)
+    assert not route_queue.submit(pid, SPEAKERS)
+
+    audio_backend.end_session(session_id)
+    reuse(processes, pid)
+    audio_backend.start_session(pid, HEADSET)  # the new process's first session validates its PID
+
+    assert applied.get(pid) is None
+    assert route_queue.submit(pid, SPEAKERS)
+    assert audio_backend.calls["set_application_endpoint"] == 2
@@ -0,0 +1,48 @@
+# tests/test_rule_matcher.py
+from config.rules import parse_rules
+from services.processes import SimulatedProcessTable
+from services.rule_matcher import RuleMatcher
+
+RULES = parse_rules({"version": 1, "rules": [{"exe": "Discord.exe", "device": "Headset"},
+                                             {"exe": "obs64.exe", "ignore": True}]})
+
+
+def test_lookups_are_memoized_per_process():
+    processes = SimulatedProcessTable()
+    pid = processes.spawn(name="Discord.exe")
+    matcher = RuleMatcher(processes)
+
+    assert matcher.match(RULES, pid, None).device == "Headset"
+    assert matcher.match(RULES, pid, None).device == "Headset"
+    assert (matcher.misses, matcher.hits) == (1, 1)
+    assert processes.calls["name"] == 1
+    assert processes.calls["create_time"] == 0
+
+
+def test_reused_pid_is_matched_again_once_dropped():
+    processes = SimulatedProcessTable()
+    pid = processes.spawn(name="Discord.exe")
+    matcher = RuleMatcher(processes)
+    assert matcher.match(RULES, pid, None).device == "Headset"
+
+    processes.exit(pid)
+    processes.spawn(pid=pid, name="obs64.exe")  # before forget() runs
+    assert matcher.match(RULES, pid, None).device == "Headset"  # no process table read on a hit
+
+    matcher.drop([pid])
+    assert matcher.exe_name(pid) == "obs64.exe"
+    assert matcher.match(RULES, pid, None).ignore
+
+
+def test_forget_drops_exited_processes():
+    processes = SimulatedProcessTable()
+    kept, gone = processes.spawn(name="Discord.exe"), processes.spawn(name="obs64.exe")
+    matcher = RuleMatcher(processes)
+    matcher.match(RULES, kept, None)
+    matcher.match(RULES, gone, None)
+    processes.exit(gone)
+
+    matcher.forget(processes.pids())
+    matcher.match(RULES, kept, None)
+
+    assert matcher.hits == 1
@@ -0,0 +1,74 @@
+# tests/test_session_index.py
+import threading
+
+from audio.backend import SimulatedAudioBackend
+from audio.com_executor import ExecutorAudioBackend
+from audio.session_index import SessionIndex
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+WAIT = 2.0  # seconds a backend call waits for the notification thread, as set_session_mute does
+
+
+class WaitingBackend(SimulatedAudioBackend):
+    """Lists sessions only after a notification thread has delivered a new session, which pycaw's session thread
+    may do while a mute request waits on it."""
+
+    def __init__(self):
+        super().__init__()
+        self.add_endpoint(SPEAKERS, "Speakers")
+        self.delivered = threading.Event()
+        self.arriving_pid = None
+
+    def list_sessions(self):
+        if self.arriving_pid is not None:
+            pid, self.arriving_pid = self.arriving_pid, None
+            threading.Thread(target=lambda: (self.start_session(pid, SPEAKERS), self.delivered.set())).start()
+            self.delivered.wait(WAIT)
+        return super().list_sessions()
+
+
+def test_notifications_are_not_blocked_by_a_session_read():
+    backend = WaitingBackend()
+    backend.start_session(1, SPEAKERS, name="app.exe")
+    wrapped = ExecutorAudioBackend(backend)
+    index = SessionIndex(wrapped)
+    index.start()
+    backend.arriving_pid = 2
+
+    assert index.has_session(1)
+    assert backend.delivered.is_set()  # the notification got the index's lock during the read
+    assert index.has_session(2)
+    wrapped.executor.stop()
+
+
+def test_notifications_during_a_read_are_kept():
+    backend = SimulatedAudioBackend()
+    backend.add_endpoint(SPEAKERS, "Speakers")
+    stale = backend.start_session(1, SPEAKERS)
+    index = SessionIndex(backend)
+    index.start()
+    listed = backend.list_sessions
+
+    def list_sessions():
+        sessions = listed()  # the snapshot still has the first session
+        backend.end_session(stale)
+        backend.start_session(3, SPEAKERS)
+        return sessions
+
+    backend.list_sessions = list_sessions
+    assert not index.has_session(1)
+    assert index.has_session(3)
+    assert backend.calls["list_sessions"] == 1
+
+
+def test_names_are_read_once_per_process():
+    backend = SimulatedAudioBackend()
+    backend.add_endpoint(SPEAKERS, "Speakers")
+    backend.start_session(1, SPEAKERS, name="Discord.exe")
+    backend.start_session(2, SPEAKERS, name="Spotify.exe")
+    index = SessionIndex(backend)
+    index.start()
+
+    assert [session.pid for session in index.sessions_for_name("discord.exe")] == [1]
+    assert index.process_name(2) == "spotify.exe"
+    assert backend.calls["get_process_name"] == 2
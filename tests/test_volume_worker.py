@@ -0,0 +1,139 @@
+# tests/test_volume_worker.py
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from audio.audio_service import AudioService
+from audio.backend import SimulatedAudioBackend
+from audio.com_executor import ExecutorAudioBackend
+from services.volume_worker import VolumeWorker
+
+SPEAKERS = "{0.0.0.00000000}.{speakers}"
+COM_DELAY = 0.2  # seconds each simulated volume call takes
+UI_BUDGET = 0.05  # seconds a call from the Tk thread may take
+
+
+@pytest.fixture
+def slow_backend():
+    backend = SimulatedAudioBackend(latencies={name: COM_DELAY for name in
+                                               ("activate_endpoint_volume", "get_volume", "set_volume")})
+    backend.add_endpoint(SPEAKERS, "Speakers", volume=0.5)
+    # As in the app, every call runs on the executor thread, so reads queue up behind the writes before them.
+    AudioService.set_backend(ExecutorAudioBackend(backend))
+    yield backend
+    AudioService.set_backend(SimulatedAudioBackend())
+
+
+class Volumes:
+    """Collects the volumes a VolumeWorker reports, from its thread."""
+
+    def __init__(self):
+        self.reported = []
+        self.changed = threading.Event()
+
+    def __call__(self, device_id: str, volume: float) -> None:
+        self.reported.append((device_id, volume))
+        self.changed.set()
+
+    def wait(self, volume: float, timeout: float = 10 * COM_DELAY) -> bool:
+        deadline = time.monotonic() + timeout
+        while (SPEAKERS, volume) not in self.reported:
+            if not self.changed.wait(deadline - time.monotonic()):
+                return False
+            self.changed.clear()
+        return True
+
+
+@pytest.fixture
+def volumes():
+    return Volumes()
+
+
+@pytest.fixture
+def worker(slow_backend, volumes):
+    worker = VolumeWorker()
+    worker.add_listener(volumes)
+    worker.start()
+    yield worker
+    worker.stop()
+    AudioService.get_executor().call(lambda: None)  # lets the writes still queued finish
+
+
+def timed(call, *args) -> float:
+    started = time.perf_counter()
+    call(*args)
+    return time.perf_counter() - started
+
+
+def test_adjust_and_read_return_before_the_com_call(slow_backend, worker, volumes):
+    assert timed(worker.adjust, SPEAKERS, 10) < UI_BUDGET
+    assert timed(worker.read, SPEAKERS) < UI_BUDGET
+    assert volumes.wait(60)
+    AudioService.get_executor().call(lambda: None)  # the write is queued, not waited for
+    assert slow_backend.endpoints[SPEAKERS]["volume"] == pytest.approx(0.6)
+
+
+def test_rapid_presses_are_coalesced(slow_backend, worker, volumes):
+    worker.read(SPEAKERS)  # keeps the worker busy while the presses queue up
+    presses = [timed(worker.adjust, SPEAKERS, 5) for _ in range(10)]
+
+    assert max(presses) < UI_BUDGET
+    assert volumes.wait(100)
+    assert worker.issued < len(presses)
+    AudioService.get_executor().call(lambda: None)
+    # Changes made while a write is still queued on the executor replace it.
+    assert slow_backend.calls["set_volume"] <= worker.issued
+    assert slow_backend.endpoints[SPEAKERS]["volume"] == pytest.approx(1.0)
+
+
+def test_window_volume_buttons_do_not_wait_on_com(slow_backend, worker, volumes):
+    app_module = pytest.importorskip("gui.app")
+    posted = []
+    # The attributes App's volume handlers use, without creating a Tk root.
+    app = SimpleNamespace(device_map={"Speakers": SPEAKERS}, volume_worker=worker,
+                          mappings={"Screen1": SimpleNamespace(get=lambda: "Speakers")},
+                          root=SimpleNamespace(after=lambda delay, *args: posted.append(args)),
+                          show_volume=lambda device_id, volume: None)
+
+    assert timed(app_module.App.adjust_volume, app, "Screen1", 5) < UI_BUDGET
+    assert timed(app_module.App.on_device_change, app, "Screen1") < UI_BUDGET
+    assert timed(app_module.App.post_volume, app, SPEAKERS, 55) < UI_BUDGET
+    assert posted == [(app.show_volume, SPEAKERS, 55)]  # shown later, on the Tk thread
+    assert volumes.wait(55)
+
+
+def test_changes_replace_a_write_still_queued(audio_backend):
+    audio_backend.add_endpoint(SPEAKERS, "Speakers", volume=0.5)
+    executor = AudioService.get_executor()
+    release = threading.Event()
+    executor.submit(release.wait)  # holds the executor while the changes are made
+
+    AudioService.set_device_volume(SPEAKERS, 55)
+    levels = [AudioService.adjust_device_volume(SPEAKERS, 5) for _ in range(2)]
+    release.set()
+    executor.call(lambda: None)
+
+    assert levels == [60, 65]
+    assert audio_backend.calls["set_volume"] == 1
+    assert audio_backend.endpoints[SPEAKERS]["volume"] == pytest.approx(0.65)
+
+
+def test_adjust_reads_and_writes_in_one_call(audio_backend):
+    audio_backend.add_endpoint(SPEAKERS, "Speakers", volume=0.5)
+    assert AudioService.adjust_device_volume(SPEAKERS, 10) == 60
+    assert AudioService.adjust_device_volume(SPEAKERS, 10) == 70
+    assert audio_backend.calls["activate_endpoint_volume"] == 1
+    assert audio_backend.endpoints[SPEAKERS]["volume"] == pytest.approx(0.7)
+
+
+def test_failed_write_releases_the_interface(audio_backend):
+    audio_backend.add_endpoint(SPEAKERS, "Speakers", volume=0.5)
+    AudioService.get_device_volume(SPEAKERS)
+    audio_backend.endpoints[SPEAKERS]["active"] = False  # gone without a notification
+
+    AudioService.set_device_volume(SPEAKERS, 80)
+    AudioService.get_executor().call(lambda: None)
+
+    assert audio_backend.calls["release_endpoint_volume"] == 1
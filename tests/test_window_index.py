@@ -0,0 +1,103 @@
+# tests/test_window_index.py
+import pytest
+
+from services.dwell import DwellPolicy
+from services.events import DISPLAY, WindowEvent
+from services.monitor_service import _handle_events
+from services.processes import SimulatedProcessTable
+from services.reconciler import Reconciler
+from services.route_queue import RouteQueue
+from services.route_state import AppliedRoutes
+from window.backend import SimulatedWindowBackend
+from window.monitor_topology import MonitorTopology
+from window.window_index import WindowEntry, WindowIndex
+
+SIZES = (100, 1_000, 10_000)
+CALLS_PER_WINDOW = 5  # visible, tool window, cloaked, monitor and pid
+
+
+def desktop(windows: int):
+    """Two side-by-side monitors with windows spread over them; every tenth is hidden, tool or cloaked."""
+    backend = SimulatedWindowBackend()
+    monitors = [backend.add_monitor((0, 0, 1920, 1080)), backend.add_monitor((1920, 0, 3840, 1080))]
+    expected = {}
+    for i in range(windows):
+        monitor = monitors[i % 2]
+        flags = {1: {"visible": False}, 2: {"tool": True}, 3: {"cloaked": True}}.get(i % 10, {})
+        hwnd = backend.add_window(1000 + i, monitor, **flags)
+        if not flags:
+            expected[hwnd] = WindowEntry(hwnd, 1000 + i, monitor, f"Screen{i % 2 + 1}")
+    index = WindowIndex(backend, MonitorTopology(backend))
+    return backend, monitors, index, expected
+
+
+@pytest.mark.parametrize("windows", SIZES)
+def test_rebuild_indexes_routable_windows_in_one_pass(windows):
+    backend, _, index, expected = desktop(windows)
+    index.rebuild()
+
+    assert index.windows == expected
+    assert list(index.windows) == list(expected)  # z-order is kept
+    assert backend.calls["enum_windows"] == 1
+    # Each window is described by a fixed number of calls, so the pass is linear in the number of windows.
+    assert sum(backend.calls.values()) <= CALLS_PER_WINDOW * windows + 4
+
+
+@pytest.mark.parametrize("windows", SIZES)
+def test_window_event_rereads_only_that_window(windows):
+    backend, monitors, index, expected = desktop(windows)
+    index.rebuild()
+    hwnd = next(iter(expected))
+    backend.move_window(hwnd, monitors[1])
+    backend.calls.clear()
+
+    entry = index.refresh_window(hwnd)
+
+    assert entry == WindowEntry(hwnd, expected[hwnd].pid, monitors[1], "Screen2")
+    assert index.windows[hwnd] == entry
+    assert backend.calls["enum_windows"] == 0
+    assert sum(backend.calls.values()) <= CALLS_PER_WINDOW
+
+
+@pytest.mark.parametrize("windows", SIZES)
+def test_closed_or_hidden_window_leaves_the_index(windows):
+    backend, _, index, expected = desktop(windows)
+    index.rebuild()
+    closed, hidden = list(expected)[:2]
+    backend.close_window(closed)
+    backend.windows[hidden]["visible"] = False
+    backend.calls.clear()
+
+    index.refresh([closed, hidden])
+
+    assert closed not in index.windows and hidden not in index.windows
+    assert len(index.windows) == len(expected) - 2
+    assert sum(backend.calls.values()) <= 2 * CALLS_PER_WINDOW
+
+
+def test_screen_pids_use_each_pids_top_most_window():
+    backend, monitors, index, _ = desktop(0)
+    back = backend.add_window(42, monitors[1])
+    front = backend.add_window(42, monitors[0])
+    backend.windows = {front: backend.windows[front], back: backend.windows[back]}  # front first in z-order
+    index.rebuild()
+
+    assert index.screen_pids() == {42: "Screen1"}
+    assert [entry.hwnd for entry in index.windows_for_pid(42)] == [front, back]
+
+
+def test_display_event_relocates_windows_before_the_next_sweep(audio_backend):
+    backend, monitors, index, expected = desktop(100)
+    reconciler = Reconciler(index, RouteQueue(AppliedRoutes(SimulatedProcessTable())), clock=lambda: 0.0)
+    changes = []
+    index.topology.add_listener(changes.append)
+    _handle_events([], {}, DwellPolicy(), reconciler, 0.0)  # the first cycle sweeps
+    hwnd = next(hwnd for hwnd, entry in expected.items() if entry.monitor == monitors[1])
+
+    backend.remove_monitor(monitors[0])  # the right-hand monitor becomes the only one, Screen1
+    _handle_events([], {}, DwellPolicy(), reconciler, 0.0)
+    assert index.windows[hwnd].screen == "Screen2"  # the next sweep is not due yet
+
+    _handle_events([WindowEvent(DISPLAY, 0, 0.0)], {}, DwellPolicy(), reconciler, 0.0)
+    assert index.windows[hwnd].screen == "Screen1"
+    assert [[screen.name for screen in screens] for screens in changes] == [["Screen1"]]